@@ -1,29 +1,152 @@
-from .utils import Database
+from .utils import Database, WriteBuffer
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timezone
 import json
 TABLE = "orderbooks"
+COLUMNS = ["platform_id", "symbol", "sell", "buy", "date"]
+
+SNAPSHOT_TABLE = "orderbook_snapshots"
+SNAPSHOT_COLUMNS = ["platform_id", "symbol", "ts"]
+LEVEL_TABLE = "orderbook_levels"
+LEVEL_COLUMNS = ["snapshot_id", "side", "level", "price", "size"]
+
+LEGACY_DATE_FORMAT = "%m/%d/%Y, %H:%M:%S"
+
+class Side():
+    BUY = 0
+    SELL = 1
+
+def parse_timestamp(timestamp):
+    """
+    convert a snapshot timestamp (epoch milliseconds or legacy '%m/%d/%Y, %H:%M:%S' string) to a naive UTC datetime
+    legacy strings are written in the local time of the connectors, assumed to share the timezone of the collector
+    """
+    if isinstance(timestamp, datetime):
+        return timestamp
+    if isinstance(timestamp, (int, float)):
+        return datetime.fromtimestamp(timestamp/1000, tz=timezone.utc).replace(tzinfo=None)
+    return datetime.strptime(timestamp, LEGACY_DATE_FORMAT).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def to_legacy_date(ts):
+    """
+    format a naive UTC datetime as a legacy local time string, the inverse of parse_timestamp
+    """
+    return ts.replace(tzinfo=timezone.utc).astimezone().strftime(LEGACY_DATE_FORMAT)
+
+
+class JsonOrderbookStorage():
+    """
+    legacy storage: one row per snapshot with JSON encoded sides in the 'orderbooks' table
+
+    'date' keeps its original convention: local time of the collector, formatted as LEGACY_DATE_FORMAT
+    """
+    def __init__(self, database) -> None:
+        self.database = database
+
+    def write(self, snapshots):
+        rows = [(snapshot["platform_id"],
+                 snapshot["symbol"],
+                 json.dumps([{"price": price, "size": size} for price, size in snapshot["sell"]]),
+                 json.dumps([{"price": price, "size": size} for price, size in snapshot["buy"]]),
+                 to_legacy_date(snapshot["ts"])) for snapshot in snapshots]
+        self.database.insert_rows(TABLE, COLUMNS, rows)
+
+
+class LevelOrderbookStorage():
+    """
+    normalized storage: one 'orderbook_snapshots' row per snapshot and one 'orderbook_levels' row per price level
+
+    snapshots are unique on (platform_id, symbol, ts), which makes writes idempotent and
+    turns a symbol history into an index range scan.
+    """
+    def __init__(self, database) -> None:
+        self.database = database
+
+    def write(self, snapshots):
+        snapshot_rows = list(dict.fromkeys((snapshot["platform_id"], snapshot["symbol"], snapshot["ts"]) for snapshot in snapshots))
+        self.database.insert_rows(SNAPSHOT_TABLE, SNAPSHOT_COLUMNS, snapshot_rows, ignore=True)
+
+        # Resolve generated ids through the (platform_id, symbol, ts) unique index
+        placeholders = ", ".join(["(%s, %s, %s)"] * len(snapshot_rows))
+        params = [value for row in snapshot_rows for value in row]
+        query = f"SELECT id, platform_id, symbol, ts FROM {SNAPSHOT_TABLE} WHERE (platform_id, symbol, ts) IN ({placeholders})"
+        snapshot_ids = {(platform_id, symbol, ts): id for id, platform_id, symbol, ts in self.database.execute(query, params, fetch=True)}
+
+        level_rows = []
+        for snapshot in snapshots:
+            snapshot_id = snapshot_ids[(snapshot["platform_id"], snapshot["symbol"], snapshot["ts"])]
+            for side, orders in ((Side.BUY, snapshot["buy"]), (Side.SELL, snapshot["sell"])):
+                for level, (price, size) in enumerate(orders):
+                    level_rows.append((snapshot_id, side, level, float(price), float(size)))
+        self.database.insert_rows(LEVEL_TABLE, LEVEL_COLUMNS, level_rows, ignore=True)
+
+    def get_top_of_book(self, platform_id, symbol, start, end, level=0):
+        """
+        best bid/ask history of one symbol between 'start' and 'end' (inclusive)
+        """
+        query = f"""
+            SELECT s.ts, b.price, b.size, a.price, a.size
+            FROM {SNAPSHOT_TABLE} s
+            LEFT JOIN {LEVEL_TABLE} b ON b.snapshot_id = s.id AND b.side = {Side.BUY} AND b.level = %s
+            LEFT JOIN {LEVEL_TABLE} a ON a.snapshot_id = s.id AND a.side = {Side.SELL} AND a.level = %s
+            WHERE s.platform_id = %s AND s.symbol = %s AND s.ts BETWEEN %s AND %s
+            ORDER BY s.ts
+            """
+        rows = self.database.execute(query, (level, level, platform_id, symbol, parse_timestamp(start), parse_timestamp(end)), fetch=True)
+        return pd.DataFrame(list(rows), columns=["ts", "bid_price", "bid_size", "ask_price", "ask_size"])
+
+
+STORAGES = {
+    "json": JsonOrderbookStorage,
+    "levels": LevelOrderbookStorage,
+}
 
 class Core():
-    def __init__(self, database_config) -> None:
+    def __init__(self, database_config, buffer_config=None, storage="levels", ack_callback=None) -> None:
         self.database = Database(ip=database_config["ip"],
                                  user=database_config["user"],
                                  password=database_config["password"],
                                  dbName=database_config["dbName"])
         self.database.connect()
         self.current_instructions = None
+        self.storage = STORAGES[storage](self.database)
+        # called with the stream ids of the snapshots once they are written
+        self.ack_callback = ack_callback
+
+        # Snapshots are written by batches from a background thread
+        self.write_buffer = WriteBuffer(self.__write, **(buffer_config or {}))
+        self.write_buffer.start()
 
-    def store(self, in_data):
+    def store(self, in_data, stream_id=None):
         in_data = in_data["data"]
-        df = pd.DataFrame.from_records([{
-            "platform_id":in_data["platform_id"],
-            "symbol":in_data["binance_symbol"],
-            "sell":json.dumps(in_data["sell"]),
-            "buy":json.dumps(in_data["buy"]),
-            "date":in_data["timestamp"]
-        }])
-        self.database.append_to_table(TABLE, df)
-    
+        self.write_buffer.put({
+            "platform_id": in_data["platform_id"],
+            "symbol": in_data["binance_symbol"],
+            "ts": parse_timestamp(in_data["timestamp"]),
+            "buy": in_data["buy"],
+            "sell": in_data["sell"],
+            "stream_id": stream_id,
+        })
+
+    def __write(self, snapshots):
+        self.storage.write(snapshots)
+        # acknowledged only once written, unacknowledged snapshots are delivered again after a crash
+        stream_ids = [snapshot["stream_id"] for snapshot in snapshots if snapshot["stream_id"] is not None]
+        if stream_ids and self.ack_callback is not None:
+            try:
+                self.ack_callback(stream_ids)
+            except Exception as e:
+                # written snapshots must not be written again by the buffer retries
+                print(f"[Core][ERROR] Unable to acknowledge {len(stream_ids)} snapshots : {type(e).__name__} - {e}")
+
+    def close(self):
+        """
+        flush pending snapshots and release database connection
+        """
+        self.write_buffer.close()
+        self.database.disconnect()
+
     def check_instructions(self):
         collector_instructions = self.database.getTable("collector_instructions")
         if (self.current_instructions is None) or (not collector_instructions.equals(self.current_instructions)):
@@ -33,4 +156,4 @@ class Core():
             if len(res) > 0:
                 return res
 
-        return None
\ No newline at end of file
+        return None
@@ -1 +1,4 @@
-from .database import *
\ No newline at end of file
+from .database import *
+from .write_buffer import *
+from .stream_consumer import *
+from .codec import *
@@ -0,0 +1,120 @@
+"""
+codec.py
+
+Decoding of the messages sent by the connectors.
+"""
+
+import msgpack
+import array
+import json
+import sys
+
+SCHEMA_VERSION = 1
+
+def unpack_side(packed):
+    """Unpack orderbook levels packed as interleaved little-endian float64 (price, size) values.
+
+    Parameters
+    ----------
+    packed : bytes
+        The packed levels.
+
+    Returns
+    -------
+    list
+        The (price, size) levels.
+    """
+    values = array.array("d")
+    values.frombytes(packed)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return list(zip(values[0::2], values[1::2]))
+
+class JsonCodec():
+    '''
+    JsonCodec class
+
+    Decode JSON messages, levels given as lists of {"price": ..., "size": ...} dicts.
+    '''
+
+    NAME = "json"
+
+    def decode(self, payload):
+        """Decode a message.
+
+        Parameters
+        ----------
+        payload : str or bytes
+            The encoded message.
+
+        Returns
+        -------
+        dict
+            The message, orderbook levels as (price, size) tuples.
+        """
+        message = json.loads(payload)
+        data = message["data"]
+        for side in ("buy", "sell"):
+            if side in data:
+                data[side] = [(order["price"], order["size"]) for order in data[side]]
+        return message
+
+class MsgpackCodec():
+    '''
+    MsgpackCodec class
+
+    Decode msgpack messages, levels packed as float64 (price, size) values.
+    '''
+
+    NAME = "msgpack"
+
+    def decode(self, payload):
+        """Decode a message.
+
+        Parameters
+        ----------
+        payload : bytes
+            The encoded message.
+
+        Returns
+        -------
+        dict
+            The message, orderbook levels as (price, size) tuples.
+        """
+        message = msgpack.unpackb(payload, raw=False)
+        data = message["data"]
+        for side in ("buy", "sell"):
+            if side in data:
+                data[side] = unpack_side(data[side])
+        return message
+
+CODECS = {codec.NAME: codec for codec in (MsgpackCodec(), JsonCodec())}
+
+def decode_message(fields):
+    """Decode a stream entry sent by the connectors.
+
+    Parameters
+    ----------
+    fields : dict
+        The entry fields, 'codec' naming the codec of 'data'. Entries without codec are JSON.
+
+    Returns
+    -------
+    dict
+        The message, orderbook levels as (price, size) tuples.
+
+    Raises
+    ------
+    ValueError
+        If the codec or the schema version is not supported.
+    """
+    fields = {key.decode() if isinstance(key, bytes) else key: value for key, value in fields.items()}
+    name = fields.get("codec", JsonCodec.NAME)
+    name = name.decode() if isinstance(name, bytes) else name
+    if name not in CODECS:
+        raise ValueError(f"Unsupported codec '{name}'")
+
+    message = CODECS[name].decode(fields["data"])
+    if message.get("v", SCHEMA_VERSION) > SCHEMA_VERSION:
+        raise ValueError(f"Unsupported schema version '{message['v']}'")
+    return message
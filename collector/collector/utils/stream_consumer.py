@@ -0,0 +1,152 @@
+"""
+stream_consumer.py
+
+Redis Streams consumer group module for the collector.
+"""
+
+import redis
+import time
+
+def to_str(value):
+    """
+    decode values returned by a client without 'decode_responses'
+    """
+    return value.decode() if isinstance(value, bytes) else value
+
+class StreamConsumer():
+    '''
+    StreamConsumer class
+
+    Read a Redis stream as one consumer of a consumer group.
+
+    Every collector worker of the group receives its own share of the entries. An entry stays pending
+    until it is acknowledged, so entries read but not yet written are not lost on a crash: on start,
+    the consumer reads its own pending entries again, and entries left pending by a consumer idle for
+    more than 'claim_idle' seconds are claimed by the others.
+
+    Methods
+    -------
+    read(count, block)
+        Returns new entries, or recovered pending entries first.
+    ack(ids)
+        Acknowledge written entries.
+    claim(count)
+        Take over entries left pending by idle consumers.
+    get_lag()
+        Returns the group lag and the pending entries of every consumer.
+    '''
+
+    def __init__(self, r, stream, group, consumer, claim_idle=60):
+        """
+        Parameters
+        ----------
+        r : redis.Redis
+            The Redis client, without 'decode_responses' if entries are binary.
+        stream : str
+            The stream key.
+        group : str
+            The consumer group name, created at the end of the stream if missing.
+        consumer : str
+            The consumer name, shall be stable across restarts to recover its pending entries.
+        claim_idle : float
+            Number of seconds after which entries pending for another consumer are claimed.
+        """
+        self.r = r
+        self.stream = stream
+        self.group = group
+        self.consumer = consumer
+        self.claim_idle = claim_idle
+        # Pending entries of a previous run are read first, then only new ones
+        self.__next_id = "0-0"
+        self.__next_claim_id = "0-0"
+        self.__create_group()
+
+    def read(self, count=100, block=1000):
+        """Returns new entries, or pending entries of a previous run first.
+
+        Parameters
+        ----------
+        count : int
+            Maximum number of entries returned.
+        block : int
+            Maximum number of milliseconds to wait for new entries.
+
+        Returns
+        -------
+        list
+            The (id, fields) entries.
+        """
+        try:
+            response = self.r.xreadgroup(self.group, self.consumer, {self.stream: self.__next_id}, count=count,
+                                         block=None if self.__next_id != ">" else block)
+        except redis.exceptions.ResponseError as e:
+            # Stream or group deleted while running
+            if "NOGROUP" not in str(e):
+                raise
+            self.__create_group()
+            return []
+
+        entries = response[0][1] if response else []
+        if self.__next_id != ">":
+            # Pending entries stay pending until acknowledged, the read goes on after the last one
+            self.__next_id = entries[-1][0] if len(entries) == count else ">"
+        # Entries deleted by MAXLEN while pending are returned without fields
+        self.ack([id for id, fields in entries if not fields])
+        return [(id, fields) for id, fields in entries if fields]
+
+    def ack(self, ids):
+        """Acknowledge written entries, they are removed from the pending entries.
+
+        Parameters
+        ----------
+        ids : list
+            The entry ids.
+        """
+        if ids:
+            self.r.xack(self.stream, self.group, *ids)
+
+    def claim(self, count=100):
+        """Take over entries left pending by consumers idle for more than 'claim_idle' seconds.
+
+        Parameters
+        ----------
+        count : int
+            Maximum number of entries claimed.
+
+        Returns
+        -------
+        list
+            The (id, fields) entries now pending for this consumer.
+        """
+        response = self.r.xautoclaim(self.stream, self.group, self.consumer, int(self.claim_idle * 1000),
+                                     start_id=self.__next_claim_id, count=count)
+        self.__next_claim_id = response[0]
+        entries = response[1]
+        self.ack([id for id, fields in entries if not fields])
+        return [(id, fields) for id, fields in entries if fields]
+
+    def get_lag(self):
+        """Returns the group lag and the pending entries of every consumer.
+
+        Returns
+        -------
+        dict
+            'lag' entries not yet delivered to the group, 'pending' entries delivered but not acknowledged,
+            and 'consumers' mapping each consumer name to its 'pending' entries and 'idle' milliseconds.
+        """
+        group = next((group for group in self.r.xinfo_groups(self.stream) if to_str(group["name"]) == self.group), {})
+        consumers = self.r.xinfo_consumers(self.stream, self.group)
+        return {
+            # 'lag' is reported from Redis 7
+            "lag": group.get("lag"),
+            "pending": group.get("pending"),
+            "consumers": {to_str(consumer["name"]): {"pending": consumer["pending"], "idle": consumer["idle"]} for consumer in consumers},
+            "timestamp": time.time(),
+        }
+
+    def __create_group(self):
+        try:
+            self.r.xgroup_create(self.stream, self.group, id="$", mkstream=True)
+        except redis.exceptions.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
@@ -0,0 +1,128 @@
+"""
+write_buffer.py
+
+Write-behind buffer module for the collector.
+"""
+
+import threading
+import queue
+import time
+
+class WriteBuffer():
+    '''
+    WriteBuffer class
+
+    Accumulate items in a bounded queue and flush them by batches from a background thread.
+
+    A batch is flushed as soon as 'batch_size' items are pending or 'flush_interval' seconds
+    elapsed since the last flush. When the queue is full, 'put' blocks the producer (backpressure)
+    until the flushing thread catches up. Remaining items are flushed on 'close'.
+
+    Methods
+    -------
+    start()
+        Start the flushing thread.
+    put(item, timeout)
+        Queue an item to be flushed.
+    close()
+        Flush pending items and stop the flushing thread.
+    '''
+
+    def __init__(self, flush_callback, batch_size=500, flush_interval=5, max_queue_size=10000, retry_timeout=5):
+        """
+        Parameters
+        ----------
+        flush_callback : callable
+            Called with the list of items to write. Shall raise on failure.
+        batch_size : int
+            Number of items triggering a flush.
+        flush_interval : float
+            Maximum number of seconds an item waits before being flushed.
+        max_queue_size : int
+            Maximum number of pending items before 'put' blocks.
+        retry_timeout : float
+            Number of seconds to wait before retrying a failed flush.
+        """
+        self.__flush_callback = flush_callback
+        self.__batch_size = batch_size
+        self.__flush_interval = flush_interval
+        self.__retry_timeout = retry_timeout
+        self.__queue = queue.Queue(maxsize=max_queue_size)
+        self.__stop_event = threading.Event()
+        self.__thread = None
+
+    def start(self):
+        """Start the flushing thread.
+        """
+        if self.__thread is None:
+            self.__thread = threading.Thread(name="write_buffer", target=self.__run, daemon=True)
+            self.__thread.start()
+
+    def put(self, item, timeout=None):
+        """Queue an item to be flushed.
+
+        Blocks while the queue is full.
+
+        Parameters
+        ----------
+        item : any
+            The item passed to the flush callback.
+        timeout : float
+            Maximum number of seconds to block. Defaults to None (block until a slot is free).
+
+        Raises
+        ------
+        queue.Full
+            If no slot has been freed before the timeout.
+        """
+        if self.__stop_event.is_set():
+            raise RuntimeError("WriteBuffer is closed")
+        self.__queue.put(item, timeout=timeout)
+
+    def qsize(self):
+        """Returns the number of pending items.
+        """
+        return self.__queue.qsize()
+
+    def close(self):
+        """Flush pending items and stop the flushing thread.
+        """
+        self.__stop_event.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+    def __run(self):
+        batch = []
+        deadline = time.monotonic() + self.__flush_interval
+        while True:
+            stopped = self.__stop_event.is_set()
+            timeout = max(0, deadline - time.monotonic())
+            try:
+                batch.append(self.__queue.get(timeout=min(timeout, 0.5)))
+                # Drain what is already available without waiting
+                while len(batch) < self.__batch_size:
+                    batch.append(self.__queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            if len(batch) >= self.__batch_size or time.monotonic() >= deadline or stopped:
+                if batch:
+                    self.__flush(batch)
+                    batch = []
+                deadline = time.monotonic() + self.__flush_interval
+
+            if stopped and self.__queue.empty() and not batch:
+                return
+
+    def __flush(self, batch):
+        while True:
+            try:
+                self.__flush_callback(batch)
+                return
+            except Exception as e:
+                print(f"[WriteBuffer][ERROR] Unable to flush {len(batch)} items : {type(e).__name__} - {e}")
+                if self.__stop_event.is_set():
+                    print(f"[WriteBuffer][ERROR] Dropping {len(batch)} items on shutdown")
+                    return
+                time.sleep(self.__retry_timeout)
@@ -1,8 +1,13 @@
 from collector.core import Core
+from collector.utils import StreamConsumer, decode_message
 import redis
 import json
 # import yaml
 from dotenv import load_dotenv
+import signal
+import socket
+import time
+import sys
 import os
 
 load_dotenv()
@@ -12,34 +17,90 @@ USER = os.getenv('USER')
 PASSWORD = os.getenv('PASSWORD')
 DBNAME = os.getenv('DBNAME')
 REDIS_HOST = os.getenv('REDIS_HOST')
+BATCH_SIZE = int(os.getenv('BATCH_SIZE', 500))
+FLUSH_INTERVAL = float(os.getenv('FLUSH_INTERVAL', 5))
+MAX_QUEUE_SIZE = int(os.getenv('MAX_QUEUE_SIZE', 10000))
+ORDERBOOK_STORAGE = os.getenv('ORDERBOOK_STORAGE', "levels")
+# safety poll, instructions are normally re-read on lab_api change events
+INSTRUCTIONS_CHECK_INTERVAL = float(os.getenv('INSTRUCTIONS_CHECK_INTERVAL', 300))
+# workers of the same group share the snapshots, the consumer name shall survive restarts
+STREAM_GROUP = os.getenv('STREAM_GROUP', "collector")
+STREAM_CONSUMER = os.getenv('STREAM_CONSUMER', socket.gethostname())
+STREAM_BATCH_SIZE = int(os.getenv('STREAM_BATCH_SIZE', 100))
+STREAM_CLAIM_IDLE = float(os.getenv('STREAM_CLAIM_IDLE', 60))
+METRICS_INTERVAL = float(os.getenv('METRICS_INTERVAL', 60))
+# codecs accepted from the connectors, by order of preference
+CODECS = os.getenv('CODECS', "msgpack,json").split(",")
 
 
-SUB_KEY = "collector"
+STREAM_KEY = "collector:snapshots"
+STREAM_LAG_KEY = "collector:stream_lag"
 PUB_KEY = "connector_request"
+# read by connectors workers starting after the broadcast
+LAST_INSTRUCTIONS_KEY = "connector_request:last"
+INSTRUCTIONS_KEY = "instructions_update"
+INSTRUCTIONS_TABLE = "collector_instructions"
 
-def stream(core_model, r):
-    p = r.pubsub()
-    p.psubscribe(SUB_KEY)
+def send_instructions(core_model, r):
+    instructions = core_model.check_instructions()
+    if not instructions is None:
+        data_to_send = {"data": instructions,
+                        "from": "collector",
+                        "codecs": CODECS,
+                        }
+        data_to_send = json.dumps(data_to_send, ensure_ascii=False)
+        r.set(LAST_INSTRUCTIONS_KEY, data_to_send)
+        r.publish(PUB_KEY,data_to_send)
+
+def store_entries(core_model, consumer, entries):
+    for stream_id, fields in entries:
+        try:
+            in_data = decode_message(fields)
+            core_model.store(in_data, stream_id=stream_id)
+        except Exception as e:
+            # a malformed snapshot would be delivered again forever
+            print(f"[COLLECTOR][ERROR] Dropping snapshot '{stream_id}' : {type(e).__name__} - {e}")
+            consumer.ack([stream_id])
+
+def publish_lag(consumer, r):
+    r.hset(STREAM_LAG_KEY, STREAM_GROUP, json.dumps(consumer.get_lag()))
+
+def stream(core_model, consumer, r):
+    # pub/sub is kept for control messages, snapshots are read from the stream
+    p = r.pubsub(ignore_subscribe_messages=True)
+    p.psubscribe(INSTRUCTIONS_KEY)
+    next_check = time.monotonic()
+    next_claim = time.monotonic() + STREAM_CLAIM_IDLE
+    next_metrics = time.monotonic()
     while True:
-        # listen to odd_request
-        message = p.get_message()
-        if message is not None and isinstance(message, dict) :
-            # print(message["data"])
-            # print(isinstance(message["data"], dict))
+        # periodic work runs on its own timer, independently of the message rate
+        now = time.monotonic()
+        if now >= next_check:
+            send_instructions(core_model, r)
+            next_check = time.monotonic() + INSTRUCTIONS_CHECK_INTERVAL
+        if now >= next_claim:
+            # snapshots left pending by a dead worker
+            store_entries(core_model, consumer, consumer.claim(STREAM_BATCH_SIZE))
+            next_claim = time.monotonic() + STREAM_CLAIM_IDLE
+        if now >= next_metrics:
+            publish_lag(consumer, r)
+            next_metrics = time.monotonic() + METRICS_INTERVAL
+
+        while (message := p.get_message()) is not None:
+            if not isinstance(message, dict):
+                continue
             try:
                 in_data = json.loads(message["data"])
             except TypeError:
                 in_data = None
-            if isinstance(in_data, dict):
-                core_model.store(in_data)
+            # lab_api mutated an instruction table
+            if isinstance(in_data, dict) and in_data.get("table") == INSTRUCTIONS_TABLE:
+                send_instructions(core_model, r)
+                next_check = time.monotonic() + INSTRUCTIONS_CHECK_INTERVAL
 
-        instructions = core_model.check_instructions()
-        if not instructions is None:
-            data_to_send = {"data": instructions,
-                            "from": "collector",
-                            }
-            data_to_send = json.dumps(data_to_send, ensure_ascii=False)
-            r.publish(PUB_KEY,data_to_send)
+        # block until snapshots arrive, at most one second so that control messages are handled
+        block = min(next_check, next_claim, next_metrics, time.monotonic() + 1) - time.monotonic()
+        store_entries(core_model, consumer, consumer.read(STREAM_BATCH_SIZE, block=max(1, int(block * 1000))))
 
                 
 
@@ -48,6 +109,8 @@ if __name__ == "__main__":
     # global_config = yaml.safe_load(open(sys.argv[1], "r"))
     print(REDIS_HOST)
     r = redis.Redis(REDIS_HOST, 6379, charset="utf-8", decode_responses=True)
+    # snapshots may be binary encoded, the stream is read without decoding
+    r_stream = redis.Redis(REDIS_HOST, 6379)
     print("SETUP INSTANCE")
     database_config = {
         "ip":IP,
@@ -55,8 +118,19 @@ if __name__ == "__main__":
         "password":PASSWORD,
         "dbName":DBNAME
     }
-    core_model = Core(database_config=database_config)
+    buffer_config = {
+        "batch_size":BATCH_SIZE,
+        "flush_interval":FLUSH_INTERVAL,
+        "max_queue_size":MAX_QUEUE_SIZE
+    }
+    consumer = StreamConsumer(r_stream, STREAM_KEY, STREAM_GROUP, STREAM_CONSUMER, claim_idle=STREAM_CLAIM_IDLE)
+    core_model = Core(database_config=database_config, buffer_config=buffer_config, storage=ORDERBOOK_STORAGE, ack_callback=consumer.ack)
     print("STREAM")
 
-
-    stream(core_model,r)
\ No newline at end of file
+    # Exit cleanly on 'docker stop' so that buffered snapshots are flushed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        stream(core_model, consumer, r)
+    finally:
+        print("FLUSH")
+        core_model.close()
@@ -0,0 +1,102 @@
+"""
+codec.py
+
+Encoding of the messages sent to the collector.
+"""
+
+import msgpack
+import array
+import json
+import sys
+
+SCHEMA_VERSION = 1
+
+def pack_side(orders):
+    """Pack orderbook levels into interleaved little-endian float64 (price, size) values.
+
+    Parameters
+    ----------
+    orders : list
+        The levels, as dicts with 'price' and 'size'.
+
+    Returns
+    -------
+    bytes
+        The packed levels.
+    """
+    values = array.array("d", [value for order in orders for value in (order["price"], order["size"])])
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tobytes()
+
+class JsonCodec():
+    '''
+    JsonCodec class
+
+    Encode messages as JSON, levels as lists of {"price": ..., "size": ...} dicts.
+    Understood by every collector, used until the collector announced its codecs.
+    '''
+
+    NAME = "json"
+
+    def encode(self, message):
+        """Encode a message.
+
+        Parameters
+        ----------
+        message : dict
+            The message, with orderbook levels into 'data'.
+
+        Returns
+        -------
+        str
+            The encoded message.
+        """
+        return json.dumps({**message, "v": SCHEMA_VERSION}, ensure_ascii=False)
+
+class MsgpackCodec():
+    '''
+    MsgpackCodec class
+
+    Encode messages with msgpack, levels packed by 'pack_side' instead of one map per level.
+    '''
+
+    NAME = "msgpack"
+
+    def encode(self, message):
+        """Encode a message.
+
+        Parameters
+        ----------
+        message : dict
+            The message, with orderbook levels into 'data'.
+
+        Returns
+        -------
+        bytes
+            The encoded message.
+        """
+        data = message["data"]
+        if "buy" in data or "sell" in data:
+            data = {**data, "buy": pack_side(data.get("buy", [])), "sell": pack_side(data.get("sell", []))}
+        return msgpack.packb({**message, "data": data, "v": SCHEMA_VERSION}, use_bin_type=True)
+
+CODECS = {codec.NAME: codec for codec in (MsgpackCodec(), JsonCodec())}
+
+def negotiate_codec(codecs):
+    """Returns the codec to use given the codecs accepted by the collector.
+
+    Parameters
+    ----------
+    codecs : list
+        The codec names accepted by the collector, by order of preference. None for collectors not announcing them.
+
+    Returns
+    -------
+    JsonCodec or MsgpackCodec
+        The first accepted codec implemented here, JSON otherwise.
+    """
+    for name in codecs or []:
+        if name in CODECS:
+            return CODECS[name]
+    return CODECS[JsonCodec.NAME]
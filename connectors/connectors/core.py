@@ -1,30 +1,98 @@
-from datetime import datetime, timedelta
+from datetime import datetime
 from . import utils
-from connectors.crypto.connector.common.platforms import Exchange
+from .scheduler import FetchScheduler, MISSED
+from .registry import ConnectorRegistry
+from .crypto.connector.common.transport import get_transport
+from .codec import negotiate_codec
+from .crypto.common.pricing_client import PricingClient
 import json
+import time
 
-PUB_KEY_COLLECTOR = "collector"
+STREAM_KEY_COLLECTOR = "collector:snapshots"
+METRICS_KEY = "connectors:metrics"
+HTTP_LATENCY_KEY = "connectors:http_latency"
+
+# platforms whose connectors take the instruction symbols as is
+SUPPORTED_PLATFORMS = [utils.Exchanges.BINANCE.value, utils.Exchanges.DELTA_EXCHANGE.value, utils.Exchanges.DERIBIT.value]
 
 class Core():
-    def __init__(self) -> None:
+    def __init__(self, max_workers=8, exchange_concurrency=2, products_ttl=3600, products_redis=None, stream_maxlen=100000, membership=None, book_max_age=60, min_sample_period=0.1) -> None:
         self.instructions = None
-        self.last_sending = {}
+        # ShardMembership deciding which instructions this worker runs, all of them if None
+        self.membership = membership
+        self.r = None
+        self.stream_maxlen = stream_maxlen
+        # JSON until the collector announces the codecs it accepts
+        self.codec = negotiate_codec(None)
+        self.registry = ConnectorRegistry(products_ttl=products_ttl, products_redis=products_redis)
+        self.scheduler = FetchScheduler(self.__process, max_workers=max_workers, exchange_concurrency=exchange_concurrency)
+        # websocket books are sampled from memory, on their own pool so that REST fetches never delay them
+        self.pricing_client = PricingClient(max_age=book_max_age)
+        self.sampler = FetchScheduler(self.__process, max_workers=max_workers, exchange_concurrency=max_workers,
+                                      period=lambda instruction: instruction["rate"] / 1000, min_period=min_sample_period)
+        # (exchange, symbol) of the books currently watched for the sampler
+        self.sampled_books = set()
 
     def process_instructions(self, instructions):
         """
         change instructions given instructions sent from collector
         """
         self.instructions = instructions
+        self.__schedule()
+
+    def rebalance(self):
+        """
+        reschedule the instructions owned by this worker after the live workers changed
+        """
+        if self.instructions is not None:
+            self.__schedule()
+
+    def __schedule(self):
+        instructions = self.instructions
+        if self.membership is not None:
+            instructions = [instruction for instruction in instructions if self.membership.owns(instruction)]
+
+        fetched, sampled = [], []
+        for instruction in instructions:
+            if instruction["exchange"] not in SUPPORTED_PLATFORMS:
+                # rejected once here rather than failing at every run
+                print(f"UNSUPPORTED PLATFORM {instruction['exchange']} for instruction {instruction['id']}")
+                continue
+            if instruction["data_type"] == utils.DataType.ORDERBOOK_STREAM.value:
+                sampled.append(instruction)
+            else:
+                fetched.append(instruction)
+        self.scheduler.set_instructions(fetched)
+        self.sampler.set_instructions(sampled)
+
+        # subscribed ahead so that books are live at the first sample
+        sampled_books = {(instruction["exchange"], self.get_platform_symbol(instruction["symbol"], instruction["exchange"])) for instruction in sampled}
+        for exchange, plateform_symbol in sampled_books:
+            self.pricing_client.watch_orderbook(exchange, plateform_symbol)
+        # books no longer sampled here, removed or now owned by another worker
+        for exchange, plateform_symbol in self.sampled_books - sampled_books:
+            self.pricing_client.unwatch_orderbook(exchange, plateform_symbol)
+        self.sampled_books = sampled_books
+
+    def negotiate_codec(self, codecs):
+        """
+        pick the codec of the messages sent to the collector among the ones it accepts
+        """
+        codec = negotiate_codec(codecs)
+        if codec is not self.codec:
+            print(f"CODEC {codec.NAME}")
+            self.codec = codec
 
     def get_platform_symbol(self, instruction_symbol, platform_id):
-        if platform_id == utils.Exchanges.BINANCE.value:
+        if platform_id in SUPPORTED_PLATFORMS:
+            # instructions are given with the unified symbols of the connectors
             return instruction_symbol
         else:
             raise NotImplementedError()
     
     def __fetch_data_from_exchange(self, instruction):
         if instruction["data_type"] == utils.DataType.ORDERBOOK.value:
-            connector = Exchange(platform_id=instruction["exchange"]).connector("","")
+            connector = self.registry.get(instruction["exchange"])
             plateform_symbol = self.get_platform_symbol(instruction["symbol"], instruction["exchange"])
             orderbook = connector.get_orderbook(plateform_symbol)
             now = datetime.now().strftime("%m/%d/%Y, %H:%M:%S")
@@ -33,11 +101,33 @@ class Core():
                 "binance_symbol": instruction["symbol"],
                 "buy": orderbook["buy"],
                 "sell": orderbook["sell"],
-                "timestamp": now,
+                # epoch milliseconds, like sampled books
+                "timestamp": int(time.time() * 1000),
                 "created_at": now,
                 "updated_at": now,
             }    
 
+        elif instruction["data_type"] == utils.DataType.ORDERBOOK_STREAM.value:
+            plateform_symbol = self.get_platform_symbol(instruction["symbol"], instruction["exchange"])
+            orderbook = self.pricing_client.get_orderbook(instruction["exchange"], plateform_symbol)
+            if orderbook is None:
+                # not subscribed yet, stale or connection lost, no sample rather than a wrong one
+                # watched again so that a subscription without updates is renewed
+                self.pricing_client.watch_orderbook(instruction["exchange"], plateform_symbol)
+                return MISSED
+            now = datetime.now().strftime("%m/%d/%Y, %H:%M:%S")
+            return {
+                "platform_id":instruction["exchange"],
+                "binance_symbol": instruction["symbol"],
+                "buy": orderbook["buy"],
+                "sell": orderbook["sell"],
+                # epoch milliseconds of the sample, the book is the one of the last exchange update
+                "timestamp": int(time.time() * 1000),
+                "exchange_timestamp": orderbook.get("timestamp"),
+                "created_at": now,
+                "updated_at": now,
+            }
+
         else:
             raise NotImplementedError()       
             
@@ -49,28 +139,46 @@ class Core():
                         "instruction": instruction,
                         "from": "connectors",
                         }
-        data_to_send = json.dumps(data_to_send, ensure_ascii=False)
-        r.publish(PUB_KEY_COLLECTOR,data_to_send)
+        data_to_send = self.codec.encode(data_to_send)
+        # kept until a collector acknowledges it, the oldest snapshots are trimmed beyond 'stream_maxlen'
+        r.xadd(STREAM_KEY_COLLECTOR, {"codec": self.codec.NAME, "data": data_to_send}, maxlen=self.stream_maxlen, approximate=True)
     
-    def __process(self, instruction, r):
+    def __process(self, instruction):
         """
         fetch data from connectors and send it back to collector 
         """
-        self.last_sending[instruction["id"]] = datetime.now()
         data = self.__fetch_data_from_exchange(instruction)
-        self.__send_to_canal(instruction, data, r)
+        if data is MISSED:
+            return MISSED
+        self.__send_to_canal(instruction, data, self.r)
 
     def send_data(self, r):
         """
         sending market data according to instructions and rate
+
+        returns the number of seconds until the next instruction is due, None if there is no instruction
+        """
+        self.r = r
+        due_times = [due for due in (self.scheduler.run_pending(), self.sampler.run_pending()) if due is not None]
+        return min(due_times) if due_times else None
+
+    def publish_metrics(self, r):
+        """
+        publish drift/jitter metrics (in seconds) and missed samples of every instruction into a redis hash keyed by instruction id
         """
-        if self.instructions:
-            for instruction in self.instructions:
-                if instruction["id"] in list(self.last_sending.keys()):
-                    if datetime.now() - self.last_sending[instruction["id"]] >= timedelta(minutes=instruction["rate"]): # rate condition
-                        self.__process(instruction, r)
-                else:
-                    #init
-                    self.__process(instruction, r) 
-                
+        metrics = {**self.scheduler.get_metrics(), **self.sampler.get_metrics()}
+        if metrics:
+            r.hset(METRICS_KEY, mapping={instruction_id: json.dumps(instruction_metrics) for instruction_id, instruction_metrics in metrics.items()})
+
+        # latency histograms of the exchange REST endpoints, keyed by '<method> <host><path>'
+        latencies = get_transport().get_latencies()
+        if latencies:
+            r.hset(HTTP_LATENCY_KEY, mapping={endpoint: json.dumps(histogram) for endpoint, histogram in latencies.items()})
+        return metrics
 
+    def close(self):
+        self.scheduler.shutdown()
+        self.sampler.shutdown()
+        self.pricing_client.close()
+        if self.membership is not None:
+            self.membership.leave()
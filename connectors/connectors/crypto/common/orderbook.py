@@ -0,0 +1,205 @@
+"""
+orderbook.py
+
+Local L2 order book kept up to date from incremental websocket updates.
+"""
+
+from collections import namedtuple
+import threading
+import bisect
+
+OrderBookSnapshot = namedtuple("OrderBookSnapshot", ["symbol", "buy", "sell"])
+
+class OrderBook():
+    '''
+    OrderBook class
+
+    Represent the price levels of one symbol.
+
+    Each side keeps its prices in an ascending list searched with 'bisect' and the sizes in a
+    dict keyed by price. Updating the size of an existing level is a dict assignment, adding or
+    removing a level is a binary search plus a list insertion or deletion, and the best N levels
+    are a slice of the price list. The book is never copied as a whole.
+
+    Methods
+    -------
+    set_snapshot(buy, sell)
+        Replace both sides with the given levels.
+    update(side, price, size)
+        Set the size of a price level, a size of 0 removes the level.
+    update_many(side, levels)
+        Apply several (price, size) updates to one side.
+    clear()
+        Remove every level.
+    best(side)
+        Returns the best (price, size) level of one side.
+    top(side, depth)
+        Returns the best 'depth' (price, size) levels of one side, best first.
+    snapshot(depth)
+        Returns a read-only snapshot of the best 'depth' levels of both sides.
+    to_dict(depth)
+        Returns the best 'depth' levels as {"price", "size"} lists, as returned by 'get_orderbook'.
+    '''
+
+    SIDES = ("buy", "sell")
+
+    def __init__(self, symbol=None):
+        """
+        Parameters
+        ----------
+        symbol : str
+            The uniformized symbol of the book.
+        """
+        self.symbol = symbol
+        self.__mutex = threading.Lock()
+        self.__prices = {side: [] for side in self.SIDES}
+        self.__sizes = {side: {} for side in self.SIDES}
+
+    def __len__(self):
+        return len(self.__prices["buy"]) + len(self.__prices["sell"])
+
+    def set_snapshot(self, buy, sell):
+        """Replace both sides with the given levels.
+
+        Parameters
+        ----------
+        buy : iterable
+            The (price, size) buy levels, in any order.
+        sell : iterable
+            The (price, size) sell levels, in any order.
+        """
+        with self.__mutex:
+            for side, levels in (("buy", buy), ("sell", sell)):
+                sizes = {float(price): float(size) for price, size in levels if float(size) != 0}
+                self.__sizes[side] = sizes
+                self.__prices[side] = sorted(sizes.keys())
+
+    def update(self, side, price, size):
+        """Set the size of a price level, a size of 0 removes the level.
+
+        Parameters
+        ----------
+        side : str
+            'buy' or 'sell'.
+        price : float
+            The level price.
+        size : float
+            The new level size.
+        """
+        with self.__mutex:
+            self.__update(side, float(price), float(size))
+
+    def update_many(self, side, levels):
+        """Apply several (price, size) updates to one side.
+
+        Parameters
+        ----------
+        side : str
+            'buy' or 'sell'.
+        levels : iterable
+            The (price, size) updates, a size of 0 removes the level.
+        """
+        with self.__mutex:
+            for price, size in levels:
+                self.__update(side, float(price), float(size))
+
+    def clear(self):
+        """Remove every level.
+        """
+        with self.__mutex:
+            for side in self.SIDES:
+                self.__prices[side] = []
+                self.__sizes[side] = {}
+
+    def best(self, side):
+        """Returns the best level of one side.
+
+        Parameters
+        ----------
+        side : str
+            'buy' or 'sell'.
+
+        Returns
+        -------
+        tuple
+            The (price, size) best level, None if the side is empty.
+        """
+        levels = self.top(side, 1)
+        return levels[0] if levels else None
+
+    def top(self, side, depth=None):
+        """Returns the best levels of one side.
+
+        Parameters
+        ----------
+        side : str
+            'buy' or 'sell'.
+        depth : int
+            Maximum number of levels. Defaults to the whole side.
+
+        Returns
+        -------
+        list
+            The (price, size) levels, best first.
+        """
+        with self.__mutex:
+            return self.__top(side, depth)
+
+    def snapshot(self, depth=None):
+        """Returns a read-only snapshot of both sides.
+
+        Parameters
+        ----------
+        depth : int
+            Maximum number of levels per side. Defaults to the whole book.
+
+        Returns
+        -------
+        OrderBookSnapshot
+            The symbol and the (price, size) levels of each side as tuples, best first.
+        """
+        with self.__mutex:
+            return OrderBookSnapshot(self.symbol, tuple(self.__top("buy", depth)), tuple(self.__top("sell", depth)))
+
+    def to_dict(self, depth=None):
+        """Returns the best levels of both sides in the 'get_orderbook' format.
+
+        Parameters
+        ----------
+        depth : int
+            Maximum number of levels per side. Defaults to the whole book.
+
+        Returns
+        -------
+        dict
+            The 'symbol', 'buy' and 'sell' keys, each side being a list of {"price", "size"} dicts.
+        """
+        snapshot = self.snapshot(depth)
+        return {
+            "symbol": snapshot.symbol,
+            "buy": [{"price": price, "size": size} for price, size in snapshot.buy],
+            "sell": [{"price": price, "size": size} for price, size in snapshot.sell],
+        }
+
+    def __update(self, side, price, size):
+        # Called with mutex held
+        sizes = self.__sizes[side]
+        if size == 0:
+            if price in sizes:
+                del sizes[price]
+                prices = self.__prices[side]
+                del prices[bisect.bisect_left(prices, price)]
+        else:
+            if price not in sizes:
+                bisect.insort(self.__prices[side], price)
+            sizes[price] = size
+
+    def __top(self, side, depth):
+        # Called with mutex held, buy prices are read from the end of the ascending list
+        prices = self.__prices[side]
+        sizes = self.__sizes[side]
+        if side == "buy":
+            selection = prices[::-1] if depth is None else prices[:-depth-1:-1] if depth > 0 else []
+        else:
+            selection = prices if depth is None else prices[:depth]
+        return [(price, sizes[price]) for price in selection]
@@ -0,0 +1,435 @@
+"""
+pricing_client.py
+
+Pricing clients fed by exchange websockets, passed as 'pricing_client' to the connectors 'get_orderbook'
+and 'get_mark_price' methods so that they read the latest prices instead of calling the REST API.
+"""
+
+from connectors.crypto.connector.common.platforms import Exchange
+from connectors.crypto.common.logger import log
+from connectors.threading.Threads import format_traceback
+import threading
+import queue
+import time
+import json
+
+ORDERBOOK = "orderbook"
+MARK_PRICE = "mark_price"
+
+REDIS_PRICES_KEY = "pricing:{}:{}"
+REDIS_WATCH_KEY = "pricing:watch"
+
+class PricingClient():
+    '''
+    PricingClient class
+
+    Keep websocket subscriptions per platform and the latest orderbooks and mark prices they deliver.
+
+    A symbol is subscribed the first time it is requested: this request returns None and the connector
+    falls back to its REST API, following ones are served from memory. Prices older than 'max_age'
+    seconds, or whose websocket connection is lost, are not served either. Symbols that are no longer
+    requested for 'idle_timeout' seconds are unsubscribed. A failed subscription is tried again on a later
+    request, after a delay doubled on every failure from 'retry_delay' up to 'max_retry_delay' seconds.
+    A subscription that delivered no update for 'max_age' seconds is renewed when watched again.
+
+    When a Redis client is given, every update is also written into Redis for RedisPricingClient
+    instances of other processes, and symbols they request are subscribed as well.
+
+    Orderbook levels are served as lists of {"price", "size"} dicts, like the REST API ones.
+    Returned prices are shared: callers must not modify them.
+
+    Methods
+    -------
+    add_connector(connector)
+        Use the given connector for its platform.
+    watch_orderbook(platform_id, symbols)
+        Subscribe to orderbooks without waiting for a request.
+    watch_mark_price(platform_id, symbols)
+        Subscribe to mark prices without waiting for a request.
+    unwatch_orderbook(platform_id, symbols)
+        Unsubscribe from orderbooks without waiting for them to be idle.
+    get_orderbook(platform_id, symbol)
+        Returns the latest orderbook.
+    get_mark_price(platform_id, symbol)
+        Returns the latest mark price.
+    close()
+        Unsubscribe every symbol and stop the client.
+    '''
+
+    def __init__(self, max_age=5, idle_timeout=600, redis_client=None, watch_interval=1, retry_delay=5, max_retry_delay=300):
+        """
+        Parameters
+        ----------
+        max_age : float
+            Number of seconds after which a price is considered stale.
+        idle_timeout : float
+            Number of seconds without request after which a symbol is unsubscribed.
+        redis_client : redis.Redis
+            Client used to share prices with other processes, with 'decode_responses' enabled.
+        watch_interval : float
+            Number of seconds between two checks of idle symbols and symbols requested through Redis.
+        retry_delay : float
+            Number of seconds before subscribing again after a first failure.
+        max_retry_delay : float
+            Maximum number of seconds before subscribing again after repeated failures.
+        """
+        self.max_age = max_age
+        self.idle_timeout = idle_timeout
+        self.__redis = redis_client
+        self.__watch_interval = watch_interval
+        self.__retry_delay = retry_delay
+        self.__max_retry_delay = max_retry_delay
+
+        self.__mutex = threading.Lock()
+        self.__connectors = {}
+        self.__prices = {ORDERBOOK: {}, MARK_PRICE: {}}
+        self.__subscriptions = {}
+        # Failed subscriptions with their failure count and the time they can be tried again
+        self.__failed = {}
+        self.__pending = set()
+
+        self.__requests = queue.Queue()
+        self.__is_running = True
+        self.__worker = threading.Thread(name="pricing_client", target=self.__run, daemon=True)
+        self.__worker.start()
+
+    def add_connector(self, connector):
+        """Use the given connector for its platform, instead of a public one created on first request.
+
+        Parameters
+        ----------
+        connector : CryptoConnector
+            The connector, its websocket callbacks must not be used by anything else.
+        """
+        with self.__mutex:
+            self.__connectors[int(connector.PLATFORM_ID)] = connector
+
+    def watch_orderbook(self, platform_id, symbols):
+        """Subscribe to orderbooks without waiting for a request.
+
+        Parameters
+        ----------
+        platform_id : int
+            The platform database id.
+        symbols : str or list
+            The symbols to subscribe to.
+        """
+        self.__watch(ORDERBOOK, platform_id, symbols)
+
+    def unwatch_orderbook(self, platform_id, symbols):
+        """Unsubscribe from orderbooks without waiting for them to be idle.
+
+        A later request subscribes again.
+
+        Parameters
+        ----------
+        platform_id : int
+            The platform database id.
+        symbols : str or list
+            The symbols to unsubscribe from.
+        """
+        if isinstance(symbols, str):
+            symbols = [symbols]
+        for symbol in symbols:
+            # Left to the worker, which owns the subscriptions
+            self.__requests.put(("unwatch", (ORDERBOOK, int(platform_id), symbol)))
+
+    def watch_mark_price(self, platform_id, symbols):
+        """Subscribe to mark prices without waiting for a request.
+
+        Parameters
+        ----------
+        platform_id : int
+            The platform database id.
+        symbols : str or list
+            The symbols to subscribe to.
+        """
+        self.__watch(MARK_PRICE, platform_id, symbols)
+
+    def get_orderbook(self, platform_id, symbol):
+        """Returns the latest orderbook received through websocket.
+
+        Parameters
+        ----------
+        platform_id : int
+            The platform database id.
+        symbol : str
+            The product symbol.
+
+        Returns
+        -------
+        dict
+            The orderbook with 'buy' and 'sell' levels, None if not available or stale.
+        """
+        return self.__get(ORDERBOOK, platform_id, symbol)
+
+    def get_mark_price(self, platform_id, symbol):
+        """Returns the latest mark price received through websocket.
+
+        Parameters
+        ----------
+        platform_id : int
+            The platform database id.
+        symbol : str
+            The product symbol.
+
+        Returns
+        -------
+        dict
+            The price with 'mark_price', None if not available or stale.
+        """
+        return self.__get(MARK_PRICE, platform_id, symbol)
+
+    def close(self):
+        """Unsubscribe every symbol and stop the client."""
+        self.__is_running = False
+        self.__requests.put(None)
+        self.__worker.join()
+        for key in list(self.__subscriptions.keys()):
+            self.__unsubscribe(key)
+        for connector in list(self.__connectors.values()):
+            try:
+                connector.cleanup()
+            except Exception as e:
+                log(f"[PricingClient][ERROR] Unable to cleanup {connector} : {type(e).__name__} - {e}")
+
+    def __watch(self, kind, platform_id, symbols):
+        if isinstance(symbols, str):
+            symbols = [symbols]
+        for symbol in symbols:
+            self.__request((kind, int(platform_id), symbol))
+
+    def __get(self, kind, platform_id, symbol):
+        key = (kind, int(platform_id), symbol)
+        subscription = self.__subscriptions.get(key)
+        if subscription is None:
+            self.__request(key)
+            return None
+        subscription["requested_at"] = time.monotonic()
+
+        entry = self.__prices[kind].get(key[1:])
+        if entry is None or time.monotonic() - entry["received_at"] > self.max_age:
+            return None
+        if subscription["connector"].is_connection_lost():
+            return None
+        return entry["data"]
+
+    def __request(self, key):
+        # Subscriptions open websocket connections, they are left to the worker not to block callers
+        if not self.__is_failing(key) and key not in self.__pending:
+            self.__pending.add(key)
+            self.__requests.put(("watch", key))
+
+    def __run(self):
+        next_watch = time.monotonic() + self.__watch_interval
+        while self.__is_running:
+            try:
+                request = self.__requests.get(timeout=max(0, next_watch - time.monotonic()))
+            except queue.Empty:
+                request = None
+            if request is not None:
+                action, key = request
+                if action == "unwatch":
+                    self.__failed.pop(key, None)
+                    if key in self.__subscriptions:
+                        self.__unsubscribe(key)
+                else:
+                    if key in self.__subscriptions and self.__is_silent(key):
+                        self.__unsubscribe(key)
+                    if key not in self.__subscriptions:
+                        self.__subscribe(key)
+                    self.__pending.discard(key)
+
+            if time.monotonic() >= next_watch:
+                next_watch = time.monotonic() + self.__watch_interval
+                try:
+                    self.__watch_redis()
+                    self.__unsubscribe_idle()
+                except Exception as e:
+                    log(f"[PricingClient][ERROR] {type(e).__name__} - {e}\n{format_traceback(e.__traceback__)}")
+
+    def __get_connector(self, platform_id):
+        with self.__mutex:
+            if platform_id not in self.__connectors:
+                connector_class = Exchange(platform_id=platform_id).connector
+                if connector_class is None:
+                    raise NotImplementedError(f"No connector for platform '{platform_id}'")
+                self.__connectors[platform_id] = connector_class("", "")
+            return self.__connectors[platform_id]
+
+    def __subscribe(self, key):
+        kind, platform_id, symbol = key
+        try:
+            connector = self.__get_connector(platform_id)
+            callback = self.__price_callback(kind, platform_id)
+            if kind == ORDERBOOK:
+                connector.subscribe_orderbook(symbol, callback=callback)
+            else:
+                connector.subscribe_mark_price(symbol, callback=callback)
+        except Exception as e:
+            # Requests for this symbol fall back to REST until the subscription is tried again
+            failures = self.__failed[key]["failures"] + 1 if key in self.__failed else 1
+            retry_delay = min(self.__retry_delay * 2 ** (failures - 1), self.__max_retry_delay)
+            self.__failed[key] = {"failures": failures, "retry_at": time.monotonic() + retry_delay}
+            log(f"[PricingClient][ERROR] Unable to subscribe to {kind} of '{symbol}' on platform '{platform_id}' (failure {failures}, next try in {retry_delay}s) : {type(e).__name__} - {e}")
+            return
+        self.__failed.pop(key, None)
+        self.__subscriptions[key] = {"connector": connector, "requested_at": time.monotonic(), "subscribed_at": time.monotonic()}
+
+    def __is_silent(self, key):
+        # No update received for 'max_age' seconds, leaving subscriptions time to deliver their first one
+        kind, platform_id, symbol = key
+        now = time.monotonic()
+        if now - self.__subscriptions[key]["subscribed_at"] <= self.max_age:
+            return False
+        entry = self.__prices[kind].get((platform_id, symbol))
+        return entry is None or now - entry["received_at"] > self.max_age
+
+    def __is_failing(self, key):
+        failure = self.__failed.get(key)
+        return failure is not None and time.monotonic() < failure["retry_at"]
+
+    def __unsubscribe(self, key):
+        kind, platform_id, symbol = key
+        subscription = self.__subscriptions.pop(key)
+        self.__prices[kind].pop((platform_id, symbol), None)
+        try:
+            if kind == ORDERBOOK:
+                subscription["connector"].unsubscribe_orderbook(symbol)
+            else:
+                subscription["connector"].unsubscribe_mark_price(symbol)
+        except Exception as e:
+            log(f"[PricingClient][ERROR] Unable to unsubscribe from {kind} of '{symbol}' on platform '{platform_id}' : {type(e).__name__} - {e}")
+
+    def __unsubscribe_idle(self):
+        now = time.monotonic()
+        for key, subscription in list(self.__subscriptions.items()):
+            if now - subscription["requested_at"] > self.idle_timeout:
+                self.__unsubscribe(key)
+
+    def __price_callback(self, kind, platform_id):
+        def callback(connector, data):
+            if kind == ORDERBOOK:
+                # Some websocket books are given as {price: size} dicts, levels are served as REST ones
+                data = {**data, **{side: [{"price": price, "size": size} for price, size in data[side].items()]
+                                   for side in ("buy", "sell") if isinstance(data.get(side), dict)}}
+            self.__prices[kind][(platform_id, data["symbol"])] = {
+                "received_at": time.monotonic(),
+                "data": data,
+            }
+            if self.__redis is not None:
+                self.__publish(kind, platform_id, data)
+        return callback
+
+    def __publish(self, kind, platform_id, data):
+        try:
+            self.__redis.hset(REDIS_PRICES_KEY.format(kind, platform_id), data["symbol"], json.dumps({
+                "timestamp": time.time(),
+                "data": data,
+            }))
+        except Exception as e:
+            log(f"[PricingClient][ERROR] Unable to publish {kind} of '{data['symbol']}' into redis : {type(e).__name__} - {e}")
+
+    def __watch_redis(self):
+        if self.__redis is None:
+            return
+        # Members are '<kind>:<platform_id>:<symbol>' scored with their last request time
+        watched_since = time.time() - self.idle_timeout
+        self.__redis.zremrangebyscore(REDIS_WATCH_KEY, "-inf", watched_since)
+        for member in self.__redis.zrangebyscore(REDIS_WATCH_KEY, watched_since, "+inf"):
+            kind, platform_id, symbol = member.split(":", 2)
+            key = (kind, int(platform_id), symbol)
+            if key in self.__subscriptions:
+                self.__subscriptions[key]["requested_at"] = time.monotonic()
+            elif not self.__is_failing(key):
+                self.__subscribe(key)
+
+class RedisPricingClient():
+    '''
+    RedisPricingClient class
+
+    Read the prices a PricingClient of another process writes into Redis.
+
+    Symbols that are not available are requested to the PricingClient, requests are renewed while
+    the symbol keeps being read so that it is not unsubscribed. Prices older than 'max_age' seconds
+    are not served.
+
+    Methods
+    -------
+    get_orderbook(platform_id, symbol)
+        Returns the latest orderbook.
+    get_mark_price(platform_id, symbol)
+        Returns the latest mark price.
+    '''
+
+    def __init__(self, redis_client, max_age=5, renew_interval=60):
+        """
+        Parameters
+        ----------
+        redis_client : redis.Redis
+            Client of the Redis the PricingClient writes to, with 'decode_responses' enabled.
+        max_age : float
+            Number of seconds after which a price is considered stale.
+        renew_interval : float
+            Number of seconds between two renewals of the request of a symbol.
+        """
+        self.max_age = max_age
+        self.__redis = redis_client
+        self.__renew_interval = renew_interval
+        self.__requested_at = {}
+
+    def get_orderbook(self, platform_id, symbol):
+        """Returns the latest orderbook written by the PricingClient.
+
+        Parameters
+        ----------
+        platform_id : int
+            The platform database id.
+        symbol : str
+            The product symbol.
+
+        Returns
+        -------
+        dict
+            The orderbook with 'buy' and 'sell' levels, None if not available or stale.
+        """
+        return self.__get(ORDERBOOK, platform_id, symbol)
+
+    def get_mark_price(self, platform_id, symbol):
+        """Returns the latest mark price written by the PricingClient.
+
+        Parameters
+        ----------
+        platform_id : int
+            The platform database id.
+        symbol : str
+            The product symbol.
+
+        Returns
+        -------
+        dict
+            The price with 'mark_price', None if not available or stale.
+        """
+        return self.__get(MARK_PRICE, platform_id, symbol)
+
+    def __get(self, kind, platform_id, symbol):
+        platform_id = int(platform_id)
+        try:
+            self.__renew(kind, platform_id, symbol)
+            value = self.__redis.hget(REDIS_PRICES_KEY.format(kind, platform_id), symbol)
+        except Exception as e:
+            log(f"[RedisPricingClient][ERROR] Unable to read {kind} of '{symbol}' from redis : {type(e).__name__} - {e}")
+            return None
+        if not value:
+            return None
+        entry = json.loads(value)
+        if time.time() - entry["timestamp"] > self.max_age:
+            return None
+        return entry["data"]
+
+    def __renew(self, kind, platform_id, symbol):
+        key = (kind, platform_id, symbol)
+        now = time.time()
+        if now - self.__requested_at.get(key, 0) > self.__renew_interval:
+            self.__redis.zadd(REDIS_WATCH_KEY, {f"{kind}:{platform_id}:{symbol}": now})
+            self.__requested_at[key] = now
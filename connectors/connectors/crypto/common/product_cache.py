@@ -0,0 +1,173 @@
+"""
+product_cache.py
+
+Process-wide cache of exchange product catalogs, optionally shared between processes through Redis.
+"""
+
+from connectors.crypto.singleton import Singleton
+from connectors.crypto.common.logger import log
+from connectors.threading.Threads import format_traceback
+import threading
+import time
+import json
+
+REDIS_KEY_PREFIX = "products"
+
+class ProductCatalogCache(metaclass=Singleton):
+    '''
+    ProductCatalogCache class
+
+    Share product catalogs between every connector instance of the process.
+
+    Catalogs are keyed by (platform_id, testnet, variant), 'variant' separating catalogs that depend
+    on the account, such as Binance with staking products. A cold start loads each catalog once:
+    concurrent callers wait for the first one instead of downloading it again. Once a catalog is older
+    than the TTL, the stale one keeps being served while it is reloaded from a background thread.
+
+    When a Redis client is configured, catalogs are also read from and written to Redis, so that a
+    catalog loaded by one process is reused by the others until it expires.
+
+    Catalogs are shared: callers must not modify them.
+
+    Methods
+    -------
+    configure(ttl, redis_client)
+        Set the TTL and the optional Redis client.
+    get(platform_id, testnet, loader, reload, variant)
+        Returns the catalog, loading it if needed.
+    invalidate(platform_id)
+        Drop cached catalogs.
+    '''
+
+    def __init__(self):
+        self.__ttl = 3600
+        self.__redis = None
+        self.__mutex = threading.Lock()
+        self.__key_mutexes = {}
+        self.__entries = {}
+        self.__refreshing = set()
+
+    def configure(self, ttl=None, redis_client=None):
+        """Set the TTL and the optional Redis client.
+
+        Parameters
+        ----------
+        ttl : float
+            Number of seconds after which a catalog is reloaded.
+        redis_client : redis.Redis
+            Client used to share catalogs between processes, with 'decode_responses' enabled.
+        """
+        if ttl is not None:
+            self.__ttl = ttl
+        if redis_client is not None:
+            self.__redis = redis_client
+
+    def get(self, platform_id, testnet, loader, reload=False, variant=None):
+        """Returns the catalog, loading it if needed.
+
+        Parameters
+        ----------
+        platform_id : int
+            The platform database id.
+        testnet : bool
+            Whether the catalog comes from the testnet endpoints.
+        loader : callable
+            Called without argument to download the catalog, must return a JSON serializable object.
+        reload : bool
+            If True, the catalog is downloaded again even if it is fresh.
+        variant : str
+            Separate catalogs of the same platform that don't hold the same products.
+
+        Returns
+        -------
+        object
+            The catalog returned by the loader.
+        """
+        key = (int(platform_id), bool(testnet), variant)
+        requested_at = time.time()
+
+        entry = self.__entries.get(key)
+        if entry is not None and not reload:
+            if requested_at - entry["loaded_at"] > self.__ttl:
+                self.__refresh(key, loader)
+            return entry["catalog"]
+
+        with self.__key_mutex(key):
+            entry = self.__entries.get(key)
+            # Loaded by another caller while waiting
+            if entry is not None and (not reload or entry["loaded_at"] >= requested_at):
+                return entry["catalog"]
+            if not reload and (entry := self.__redis_get(key)):
+                self.__entries[key] = entry
+                return entry["catalog"]
+            return self.__load(key, loader)["catalog"]
+
+    def invalidate(self, platform_id=None):
+        """Drop cached catalogs, they are loaded again on next access.
+
+        Parameters
+        ----------
+        platform_id : int
+            The platform whose catalogs are dropped. Defaults to every platform.
+        """
+        with self.__mutex:
+            for key in list(self.__entries.keys()):
+                if platform_id is None or key[0] == int(platform_id):
+                    del self.__entries[key]
+
+    def __key_mutex(self, key):
+        with self.__mutex:
+            return self.__key_mutexes.setdefault(key, threading.Lock())
+
+    def __load(self, key, loader):
+        # Called with key mutex held
+        entry = {"loaded_at": time.time(), "catalog": loader()}
+        self.__entries[key] = entry
+        self.__redis_set(key, entry)
+        return entry
+
+    def __refresh(self, key, loader):
+        with self.__mutex:
+            if key in self.__refreshing:
+                return
+            self.__refreshing.add(key)
+        threading.Thread(name=f"products_refresh_{key[0]}", target=self.__reload, args=[key, loader], daemon=True).start()
+
+    def __reload(self, key, loader):
+        try:
+            with self.__key_mutex(key):
+                # Another process may have refreshed the shared catalog already
+                entry = self.__redis_get(key)
+                if entry is not None and time.time() - entry["loaded_at"] <= self.__ttl:
+                    self.__entries[key] = entry
+                else:
+                    self.__load(key, loader)
+        except Exception as e:
+            log(f"[ProductCatalogCache][ERROR] Unable to reload products of platform '{key[0]}' : {type(e).__name__} - {e}\n{format_traceback(e.__traceback__)}")
+        finally:
+            with self.__mutex:
+                self.__refreshing.discard(key)
+
+    def __redis_key(self, key):
+        platform_id, testnet, variant = key
+        redis_key = f"{REDIS_KEY_PREFIX}:{platform_id}:{'testnet' if testnet else 'mainnet'}"
+        return f"{redis_key}:{variant}" if variant else redis_key
+
+    def __redis_get(self, key):
+        if self.__redis is None:
+            return None
+        try:
+            value = self.__redis.get(self.__redis_key(key))
+            return json.loads(value) if value else None
+        except Exception as e:
+            log(f"[ProductCatalogCache][ERROR] Unable to read products of platform '{key[0]}' from redis : {type(e).__name__} - {e}")
+            return None
+
+    def __redis_set(self, key, entry):
+        if self.__redis is None:
+            return
+        try:
+            # Expired catalogs are still better than nothing for a process starting while the exchange is down
+            self.__redis.set(self.__redis_key(key), json.dumps(entry), ex=int(self.__ttl * 2))
+        except Exception as e:
+            log(f"[ProductCatalogCache][ERROR] Unable to write products of platform '{key[0]}' into redis : {type(e).__name__} - {e}")
@@ -0,0 +1,288 @@
+"""
+rate_limiter.py
+
+Process-wide token buckets consulted by REST connectors before sending a request.
+"""
+
+from connectors.crypto.singleton import Singleton
+from connectors.crypto.common.logger import log
+import threading
+import asyncio
+import time
+
+class TokenBucket():
+    '''
+    TokenBucket class
+
+    Pace requests so that at most 'limit' weight is spent over any 'period' seconds.
+
+    The bucket holds up to 'burst' tokens and is refilled continuously at (limit - burst) / period
+    tokens per second, so a fixed exchange window never sees more than 'limit' even when it starts
+    on a full bucket. Requests wait for the tokens they need instead of being stalled for a whole window.
+    A request heavier than the bucket waits for a full bucket and leaves it in debt.
+
+    Methods
+    -------
+    acquire(weight)
+        Wait until 'weight' tokens are available and consume them.
+    acquire_async(weight)
+        Same as 'acquire', from an event loop.
+    sync(used)
+        Account for the weight the exchange reports as used in the current window.
+    penalize(retry_after)
+        Block the bucket for 'retry_after' seconds.
+    '''
+
+    def __init__(self, limit, period, burst=None):
+        """
+        Parameters
+        ----------
+        limit : float
+            Maximum weight spent over one period.
+        period : float
+            Duration of the exchange window, in seconds.
+        burst : float
+            Maximum weight spent at once. Defaults to a tenth of the limit.
+        """
+        self.limit = limit
+        self.period = period
+        self.burst = burst if burst else max(1, limit / 10)
+        self.rate = (limit - self.burst) / period if limit > self.burst else limit / period
+        self.__mutex = threading.Lock()
+        self.__tokens = self.burst
+        self.__updated_at = time.monotonic()
+        self.__blocked_until = 0
+
+    def acquire(self, weight=1):
+        """Wait until 'weight' tokens are available and consume them.
+
+        Parameters
+        ----------
+        weight : float
+            The request weight.
+
+        Returns
+        -------
+        float
+            The number of seconds waited.
+        """
+        waited = 0
+        while (delay := self.__consume(weight)) > 0:
+            time.sleep(delay)
+            waited += delay
+        return waited
+
+    async def acquire_async(self, weight=1):
+        """Wait until 'weight' tokens are available and consume them, without blocking the event loop.
+
+        Parameters
+        ----------
+        weight : float
+            The request weight.
+
+        Returns
+        -------
+        float
+            The number of seconds waited.
+        """
+        waited = 0
+        while (delay := self.__consume(weight)) > 0:
+            await asyncio.sleep(delay)
+            waited += delay
+        return waited
+
+    def sync(self, used):
+        """Account for the weight the exchange reports as used in the current window.
+
+        Requests sent by other processes on the same key are counted by the exchange,
+        the bucket is lowered to what the window has left.
+
+        Parameters
+        ----------
+        used : float
+            The weight used in the current window.
+        """
+        with self.__mutex:
+            self.__refill()
+            self.__tokens = min(self.__tokens, self.limit - used)
+
+    def penalize(self, retry_after):
+        """Block the bucket for 'retry_after' seconds, after a rate limit response.
+
+        Parameters
+        ----------
+        retry_after : float
+            Number of seconds to wait before the next request.
+        """
+        with self.__mutex:
+            now = self.__refill()
+            self.__tokens = min(self.__tokens, 0)
+            self.__blocked_until = max(self.__blocked_until, now + retry_after)
+
+    def __consume(self, weight):
+        # Consume the tokens and returns 0, or returns the number of seconds to wait before trying again
+        with self.__mutex:
+            now = self.__refill()
+            if now < self.__blocked_until:
+                return self.__blocked_until - now
+            elif self.__tokens >= min(weight, self.burst):
+                self.__tokens -= weight
+                return 0
+            return (min(weight, self.burst) - self.__tokens) / self.rate
+
+    def __refill(self):
+        # Called with mutex held
+        now = time.monotonic()
+        self.__tokens = min(self.burst, self.__tokens + (now - self.__updated_at) * self.rate)
+        self.__updated_at = now
+        return now
+
+class RateLimiter(metaclass=Singleton):
+    '''
+    RateLimiter class
+
+    Keep one token bucket per (exchange, key, endpoint class) for the whole process, so that
+    every connector sharing an API key, or an IP for IP-based limits, shares the same budget.
+
+    Limits are declared once per (exchange, endpoint class) with 'configure', buckets are then
+    created on first use for each key. Requests on an unconfigured endpoint class are not limited.
+
+    Methods
+    -------
+    configure(exchange, endpoint_class, limit, period, burst)
+        Declare the limit of an endpoint class.
+    acquire(exchange, key, endpoint_class, weight)
+        Wait until the request can be sent.
+    acquire_async(exchange, key, endpoint_class, weight)
+        Same as 'acquire', from an event loop.
+    sync(exchange, key, endpoint_class, used)
+        Feed the used weight reported by the exchange.
+    penalize(exchange, key, endpoint_class, retry_after)
+        Block requests after a rate limit response.
+    '''
+
+    def __init__(self):
+        self.__mutex = threading.Lock()
+        self.__limits = {}
+        self.__buckets = {}
+
+    def configure(self, exchange, endpoint_class, limit, period, burst=None):
+        """Declare the limit of an endpoint class.
+
+        Existing buckets keep their state, configuring the same limit again is a no-op.
+
+        Parameters
+        ----------
+        exchange : str
+            The exchange name.
+        endpoint_class : str
+            The group of endpoints sharing the limit.
+        limit : float
+            Maximum weight spent over one period.
+        period : float
+            Duration of the exchange window, in seconds.
+        burst : float
+            Maximum weight spent at once. Defaults to a tenth of the limit.
+        """
+        with self.__mutex:
+            self.__limits[(exchange, endpoint_class)] = (limit, period, burst)
+
+    def get_bucket(self, exchange, key, endpoint_class):
+        """Returns the bucket of an (exchange, key, endpoint class).
+
+        Parameters
+        ----------
+        exchange : str
+            The exchange name.
+        key : str
+            The API key, None for limits shared by the whole IP.
+        endpoint_class : str
+            The group of endpoints sharing the limit.
+
+        Returns
+        -------
+        TokenBucket
+            The bucket, None if the endpoint class is not configured.
+        """
+        bucket_key = (exchange, key, endpoint_class)
+        bucket = self.__buckets.get(bucket_key)
+        if bucket is None:
+            with self.__mutex:
+                bucket = self.__buckets.get(bucket_key)
+                if bucket is None and (exchange, endpoint_class) in self.__limits:
+                    limit, period, burst = self.__limits[(exchange, endpoint_class)]
+                    bucket = self.__buckets[bucket_key] = TokenBucket(limit, period, burst)
+        return bucket
+
+    def acquire(self, exchange, key, endpoint_class, weight=1):
+        """Wait until the request can be sent.
+
+        Parameters
+        ----------
+        exchange : str
+            The exchange name.
+        key : str
+            The API key, None for limits shared by the whole IP.
+        endpoint_class : str
+            The group of endpoints sharing the limit.
+        weight : float
+            The request weight.
+        """
+        if bucket := self.get_bucket(exchange, key, endpoint_class):
+            waited = bucket.acquire(weight)
+            if waited >= 1:
+                log(f"[RateLimiter] Waited {round(waited, 3)} seconds for '{endpoint_class}' on {exchange}")
+
+    async def acquire_async(self, exchange, key, endpoint_class, weight=1):
+        """Wait until the request can be sent, without blocking the event loop.
+
+        Parameters
+        ----------
+        exchange : str
+            The exchange name.
+        key : str
+            The API key, None for limits shared by the whole IP.
+        endpoint_class : str
+            The group of endpoints sharing the limit.
+        weight : float
+            The request weight.
+        """
+        if bucket := self.get_bucket(exchange, key, endpoint_class):
+            waited = await bucket.acquire_async(weight)
+            if waited >= 1:
+                log(f"[RateLimiter] Waited {round(waited, 3)} seconds for '{endpoint_class}' on {exchange}")
+
+    def sync(self, exchange, key, endpoint_class, used):
+        """Feed the used weight reported by the exchange.
+
+        Parameters
+        ----------
+        exchange : str
+            The exchange name.
+        key : str
+            The API key, None for limits shared by the whole IP.
+        endpoint_class : str
+            The group of endpoints sharing the limit.
+        used : float
+            The weight used in the current window.
+        """
+        if bucket := self.get_bucket(exchange, key, endpoint_class):
+            bucket.sync(used)
+
+    def penalize(self, exchange, key, endpoint_class, retry_after):
+        """Block requests after a rate limit response.
+
+        Parameters
+        ----------
+        exchange : str
+            The exchange name.
+        key : str
+            The API key, None for limits shared by the whole IP.
+        endpoint_class : str
+            The group of endpoints sharing the limit.
+        retry_after : float
+            Number of seconds to wait before the next request.
+        """
+        if bucket := self.get_bucket(exchange, key, endpoint_class):
+            log(f"[RateLimiter] Rate limit reached for '{endpoint_class}' on {exchange}, blocking {retry_after} seconds")
+            bucket.penalize(retry_after)
@@ -1,3 +1,4 @@
+from connectors.crypto.connector.common.transport import get_transport
 import requests
 import time
 import json
@@ -9,7 +10,7 @@ class BCB:
         self.api_secret = api_secret
         self.client_name = "TILVEST"
         self.base_url = "https://api.production.bcb.group"
-        self.session = requests.Session()
+        self.session = get_transport().session()
         self.__auth_token = None
         self.__auth_timeout = None
 
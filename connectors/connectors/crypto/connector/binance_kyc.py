@@ -1,3 +1,4 @@
+from connectors.crypto.connector.common.transport import get_transport
 import requests
 import hashlib
 import hmac
@@ -9,7 +10,7 @@ class BinanceKyc:
         self.business_entity_key = business_entity_key
         self.api_secret = api_secret
         self.base_url = "https://cb.link-kycapi.com"
-        self.session = requests.Session()
+        self.session = get_transport().session()
 
     def check_kyc_status(self, customer_id, kyc_type, main_account_id, subacccount_id):
         response = self.__api_check_kyc_status(customer_id, kyc_type, main_account_id, subacccount_id)
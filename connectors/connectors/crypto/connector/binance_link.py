@@ -1,5 +1,6 @@
 from connectors.crypto.connector.exchanges.coinbase import CbForex
 from connectors.crypto.common.logger import log
+from connectors.crypto.connector.common.transport import get_transport
 from urllib.parse import urlencode
 import requests
 import datetime
@@ -150,7 +151,7 @@ class BinanceLink:
         self.api_key = api_key
         self.api_secret = api_secret
         self.base_url = "https://api.binance.com"
-        self.session = requests.Session()
+        self.session = get_transport().session()
 
     def get_broker_account(self):
         response = self.__api_get_broker_account()
@@ -1,18 +1,23 @@
 from connectors.crypto.singleton import Singleton
+from connectors.crypto.common.rate_limiter import RateLimiter
 from connectors.crypto.common.logger import log
 from connectors.crypto.exceptions import *
+from connectors.crypto.connector.common.transport import get_transport
 import threading
 import requests
 import datetime
-import time
 
 class Coingecko(metaclass=Singleton):
 
     def __init__(self):
         self.base_url = "https://api.coingecko.com/api/v3"
-        self.session = requests.Session()
+        self.session = get_transport().session()
         self.__mutex = threading.Lock()
 
+        # Public API allows about 30 calls per minute
+        self.__rate_limiter = RateLimiter()
+        self.__rate_limiter.configure("CoinGecko", "public", 30, 60)
+
         self.__coins = {}
         self.__get_coins()
 
@@ -63,30 +68,32 @@ class Coingecko(metaclass=Singleton):
 
             url = f"{self.base_url}/{path}"
 
-            tries = 0
-            while tries < 3:
-                if method == "GET":
-                    payload_str = self.__serialize(payload)
-                    response = self.session.request(method, f"{url}?{payload_str}", timeout=(3, 27), headers=headers)
-                else:
-                    response = self.session.request(method, url, params=payload, timeout=(3, 27), headers=headers)
-
-                try:
-                    parsed_response = self.__parse_response(response)
-                    break
-                except TooManyRequestsError:
-                    timeout = tries*60
-                    log(f"[CoinGecko] Too Many Requests. Waiting {timeout} seconds...")
-                    time.sleep(timeout)
-                    tries += 1
+            # Retried by the transport, each retry waits for the bucket penalized by a rate limit response
+            def on_retry(response):
+                if response is not None:
+                    self.__update_rate_limit(response)
+                self.__rate_limiter.acquire("CoinGecko", None, "public")
 
-            if tries >= 3:
-                raise TooManyRequestsError
+            self.__rate_limiter.acquire("CoinGecko", None, "public")
+            if method == "GET":
+                payload_str = self.__serialize(payload)
+                response = self.session.request(method, f"{url}?{payload_str}", timeout=(3, 27), headers=headers, on_retry=on_retry)
+            else:
+                response = self.session.request(method, url, params=payload, timeout=(3, 27), headers=headers, on_retry=on_retry)
+            self.__update_rate_limit(response)
+            parsed_response = self.__parse_response(response)
 
             return parsed_response
         finally:
             self.__mutex.release()
 
+    def __update_rate_limit(self, response):
+        if response.status_code == 429:
+            # Next acquire waits for the delay asked by the server
+            retry_after = float(response.headers.get("Retry-After", 60))
+            log(f"[CoinGecko] Too Many Requests. Waiting {retry_after} seconds...")
+            self.__rate_limiter.penalize("CoinGecko", None, "public", retry_after)
+
     def __parse_response(self, response):
         status_code = response.status_code
         if response.status_code != 200:
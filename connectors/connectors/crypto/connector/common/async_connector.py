@@ -0,0 +1,387 @@
+"""
+async_connector.py
+
+Define abstract asyncio exchange connector class.
+
+Asyncio connectors expose the public market data methods of 'CryptoConnector' as coroutines,
+so that fan-out operations (pricing many positions, fetching many orderbooks) run concurrently.
+Output formats are the same as the ones documented in 'connector.py'.
+"""
+
+from connectors.crypto.common.logger import log
+from abc import ABC, abstractmethod, abstractproperty
+from urllib.parse import urlsplit
+import threading
+import asyncio
+import aiohttp
+
+class AsyncSessionPool():
+    '''
+    AsyncSessionPool class
+
+    Share one aiohttp session, and thus one connection pool, per host between every asyncio connector.
+
+    aiohttp sessions are bound to the event loop that created them, sessions are therefore kept
+    per (event loop, host).
+
+    Methods
+    -------
+    get_session(url)
+        Returns the session used to request the host of the given url.
+    close()
+        Close the sessions of the running event loop.
+    shutdown(timeout)
+        Close the sessions of every event loop.
+    '''
+
+    def __init__(self, limit_per_host=20, timeout=30):
+        """
+        Parameters
+        ----------
+        limit_per_host : int
+            Maximum number of simultaneous connections to one host.
+        timeout : float
+            Total timeout of a request, in seconds.
+        """
+        self.__limit_per_host = limit_per_host
+        self.__timeout = timeout
+        self.__sessions = {}
+
+    def get_session(self, url):
+        """Returns the session used to request the host of the given url.
+
+        Must be called from a running event loop.
+
+        Parameters
+        ----------
+        url : str
+            The requested url.
+
+        Returns
+        -------
+        aiohttp.ClientSession
+            The session of the url host for the running event loop.
+        """
+        loop = asyncio.get_running_loop()
+        key = (loop, urlsplit(url).netloc)
+        session = self.__sessions.get(key)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(limit_per_host=self.__limit_per_host)
+            session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=self.__timeout))
+            self.__sessions[key] = session
+        return session
+
+    async def close(self):
+        """Close the sessions of the running event loop.
+        """
+        loop = asyncio.get_running_loop()
+        for key in [key for key in self.__sessions.keys() if key[0] is loop]:
+            await self.__sessions.pop(key).close()
+
+    def shutdown(self, timeout=10):
+        """Close the sessions of every event loop, on process shutdown.
+
+        Must not be called from a running event loop, coroutines close the sessions of their own loop with 'close'.
+
+        Parameters
+        ----------
+        timeout : float
+            Maximum number of seconds to wait for the sessions of a loop running into another thread.
+        """
+        for loop in {key[0] for key in self.__sessions.keys()}:
+            try:
+                if loop.is_closed():
+                    # Sessions of a closed loop can't be closed anymore
+                    for key in [key for key in self.__sessions.keys() if key[0] is loop]:
+                        self.__sessions.pop(key)
+                elif loop.is_running():
+                    asyncio.run_coroutine_threadsafe(self.close(), loop).result(timeout)
+                else:
+                    loop.run_until_complete(self.close())
+            except Exception as e:
+                log(f"[AsyncSessionPool][ERROR] Unable to close sessions : {type(e).__name__} - {e}")
+
+shared_session_pool = AsyncSessionPool()
+
+def get_session_pool():
+    """Returns the session pool shared by the whole process.
+
+    Returns
+    -------
+    AsyncSessionPool
+        The shared instance.
+    """
+    return shared_session_pool
+
+def close_session_pool(timeout=10):
+    """Close the sessions of the process-wide pool, once every asyncio connector is done.
+
+    Parameters
+    ----------
+    timeout : float
+        Maximum number of seconds to wait for the sessions of each event loop.
+    """
+    shared_session_pool.shutdown(timeout)
+
+class AsyncCryptoConnector(ABC):
+    """
+    AsyncCryptoConnector class
+
+    Represent an abstract asyncio API connector class.
+
+    Attributes
+    ----------
+        PLATFORM_ID: The database id of the platform.
+        PLATFORM_NAME: The name of the platform.
+
+    Methods
+    -------
+    get_products(reload)
+        Retrieve and returns all the available products on the exchange.
+    get_product(symbol)
+        Returns the product of the given symbol.
+    get_orderbook(symbol)
+        Returns the orderbook of the given symbol.
+    get_spot_price(symbol)
+        Returns the spot price of the given symbol.
+    get_mark_price(symbol)
+        Returns the mark price of the given symbol.
+    get_orderbooks(symbols)
+        Returns the orderbooks of several symbols, fetched concurrently.
+    get_mark_prices(symbols)
+        Returns the mark prices of several symbols, fetched concurrently.
+    close()
+        Release the connector resources, the shared HTTP sessions are kept.
+    """
+
+    @abstractproperty
+    def PLATFORM_ID(self):
+        pass
+    @abstractproperty
+    def PLATFORM_NAME(self):
+        pass
+
+    @abstractmethod
+    def __init__(self, testnet=False, session_pool=None):
+        """Create and returns the connector object.
+
+        Parameters
+        ----------
+        testnet : bool
+            Either the connector shall use the testnet endpoints or not. Defaults to 'False'.
+        session_pool : AsyncSessionPool
+            The pool of HTTP sessions. Defaults to the process-wide pool.
+
+        Returns
+        -------
+        AsyncCryptoConnector
+            The AsyncCryptoConnector object instance.
+        """
+        pass
+
+    @abstractmethod
+    async def get_products(self, reload=False):
+        """Retrieve and returns all the available products on the exchange.
+
+        See 'CryptoConnector.get_products' for the output format.
+
+        Parameters
+        ----------
+        reload : bool
+            If True, force reload of products from the exchange.
+            Defaults to False.
+
+        Returns
+        -------
+        dict
+            The dict of products, keyed by symbol.
+        """
+        pass
+
+    @abstractmethod
+    async def get_product(self, symbol):
+        """Returns the product of the given symbol.
+
+        See 'CryptoConnector.get_product' for the output format.
+
+        Parameters
+        ----------
+        symbol : str
+            The product symbol.
+
+        Returns
+        -------
+        dict
+            The product.
+        """
+        pass
+
+    @abstractmethod
+    async def get_orderbook(self, symbol):
+        """Returns the orderbook of the given symbol.
+
+        See 'CryptoConnector.get_orderbook' for the output format.
+
+        Parameters
+        ----------
+        symbol : str
+            The product symbol.
+
+        Returns
+        -------
+        dict
+            The orderbook.
+        """
+        pass
+
+    @abstractmethod
+    async def get_spot_price(self, symbol):
+        """Returns the spot price of the given symbol.
+
+        See 'CryptoConnector.get_spot_price' for the output format.
+
+        Parameters
+        ----------
+        symbol : str
+            The product symbol.
+
+        Returns
+        -------
+        dict
+            The spot price.
+        """
+        pass
+
+    @abstractmethod
+    async def get_mark_price(self, symbol):
+        """Returns the mark price of the given symbol.
+
+        See 'CryptoConnector.get_mark_price' for the output format.
+
+        Parameters
+        ----------
+        symbol : str
+            The product or asset symbol.
+
+        Returns
+        -------
+        dict
+            The mark price.
+        """
+        pass
+
+    async def get_orderbooks(self, symbols):
+        """Returns the orderbooks of several symbols, fetched concurrently.
+
+        Parameters
+        ----------
+        symbols : list
+            The product symbols.
+
+        Returns
+        -------
+        dict
+            The orderbooks keyed by symbol.
+        """
+        orderbooks = await asyncio.gather(*[self.get_orderbook(symbol) for symbol in symbols])
+        return dict(zip(symbols, orderbooks))
+
+    async def get_mark_prices(self, symbols):
+        """Returns the mark prices of several symbols, fetched concurrently.
+
+        Parameters
+        ----------
+        symbols : list
+            The product or asset symbols.
+
+        Returns
+        -------
+        dict
+            The mark prices keyed by symbol.
+        """
+        mark_prices = await asyncio.gather(*[self.get_mark_price(symbol) for symbol in symbols])
+        return dict(zip(symbols, mark_prices))
+
+    async def close(self):
+        """Release the connector resources.
+
+        HTTP sessions are shared with the other connectors and kept open, they are closed once for
+        the whole process by 'close_session_pool'.
+        """
+        pass
+
+    def __str__(self):
+        return f"{self.PLATFORM_NAME}"
+
+class SyncConnectorAdapter():
+    '''
+    SyncConnectorAdapter class
+
+    Expose an asyncio connector to synchronous callers.
+
+    Coroutine methods of the wrapped connector are run on the process-wide event loop thread and
+    their result is returned, other attributes are returned as is. Every adapter shares the same
+    event loop, and thus the same HTTP sessions.
+
+    Methods
+    -------
+    run(coroutine)
+        Run a coroutine on the shared event loop and returns its result.
+    '''
+
+    def __init__(self, connector, timeout=60):
+        """
+        Parameters
+        ----------
+        connector : AsyncCryptoConnector
+            The wrapped asyncio connector.
+        timeout : float
+            Maximum number of seconds to wait for a result.
+        """
+        self.connector = connector
+        self.timeout = timeout
+
+    def run(self, coroutine):
+        """Run a coroutine on the shared event loop and returns its result.
+
+        Parameters
+        ----------
+        coroutine : coroutine
+            The coroutine to run.
+
+        Returns
+        -------
+        object
+            The coroutine result, its exception is raised into the caller thread.
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, get_event_loop()).result(self.timeout)
+
+    def __getattr__(self, name):
+        attribute = getattr(self.connector, name)
+        if not asyncio.iscoroutinefunction(attribute):
+            return attribute
+        def call(*args, **kwargs):
+            return self.run(attribute(*args, **kwargs))
+        return call
+
+    def __str__(self):
+        return str(self.connector)
+
+shared_event_loop = None
+shared_event_loop_mutex = threading.Lock()
+
+def get_event_loop():
+    """Returns the event loop running the coroutines of synchronous callers.
+
+    Returns
+    -------
+    asyncio.AbstractEventLoop
+        The shared event loop, started into a daemon thread on first call.
+    """
+    global shared_event_loop
+    with shared_event_loop_mutex:
+        if shared_event_loop is None:
+            shared_event_loop = asyncio.new_event_loop()
+            threading.Thread(name="async_connectors_event_loop", target=shared_event_loop.run_forever, daemon=True).start()
+            log("[SyncConnectorAdapter] Event loop started")
+        return shared_event_loop
@@ -1602,6 +1602,7 @@ class CryptoConnector(ABC):
                         },
                         ...
                     ],
+                    "timestamp": <timestamp>,
                 }
 
                 Fields
@@ -1612,6 +1613,8 @@ class CryptoConnector(ABC):
                     The product buy or sell price.
                 <size>: int
                     The available size for the associated price.
+                <timestamp>: int
+                    The exchange time of the update in milliseconds, missing if the exchange does not provide it.
         """
         pass
 
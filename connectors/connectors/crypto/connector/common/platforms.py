@@ -5,6 +5,9 @@ from connectors.crypto.connector.exchanges.deribit import Deribit
 from connectors.crypto.connector.exchanges.woorton import Woorton
 from connectors.crypto.connector.exchanges.coinbase import Coinbase
 from connectors.crypto.connector.exchanges.kraken import Kraken
+from connectors.crypto.connector.exchanges.delta_exchange_async import AsyncDeltaExchange
+from connectors.crypto.connector.exchanges.binance_async import AsyncBinance
+from connectors.crypto.connector.exchanges.deribit_async import AsyncDeribit
 from enum import IntEnum
 
 class Exchanges(IntEnum):
@@ -35,18 +38,23 @@ class Exchange:
     def __init__(self, platform_id):
         self.platform_id = platform_id
         self.__fireblocks_account = None
+        # Asyncio connector, only implemented for public market data of some platforms
+        self.async_connector = None
         if platform_id is None:
             self.name = "Unknown"
             self.connector = None
         elif int(platform_id) == Exchanges.BINANCE:
             self.name = "Binance"
             self.connector = Binance
+            self.async_connector = AsyncBinance
         elif int(platform_id) == Exchanges.DELTA_EXCHANGE:
             self.name = "Delta Exchange"
             self.connector = DeltaExchange
+            self.async_connector = AsyncDeltaExchange
         elif int(platform_id) == Exchanges.DERIBIT:
             self.name = "Deribit"
             self.connector = Deribit
+            self.async_connector = AsyncDeribit
         elif int(platform_id) == Exchanges.KRAKEN:
             self.name = "Kraken"
             self.connector = Kraken
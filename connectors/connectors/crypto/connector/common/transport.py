@@ -0,0 +1,308 @@
+"""
+transport.py
+
+Shared HTTP transport used by every REST connector.
+
+Connectors get their session from 'get_transport().session()' instead of creating a 'requests.Session'.
+Sessions keep their own headers and cookies but share the connection pools of the transport, enforce
+timeouts, retry idempotent requests and record latencies.
+"""
+
+from connectors.crypto.common.logger import log
+from urllib.parse import urlsplit
+from email.utils import parsedate_to_datetime
+import requests.adapters
+import requests
+import threading
+import datetime
+import bisect
+import random
+import time
+import re
+
+IDEMPOTENT_METHODS = ["GET", "HEAD", "OPTIONS", "PUT", "DELETE"]
+RETRY_STATUS_CODES = [429, 500, 502, 503, 504]
+
+class LatencyHistogram():
+    '''
+    LatencyHistogram class
+
+    Count request latencies into fixed buckets.
+
+    Methods
+    -------
+    observe(latency)
+        Record one latency, in seconds.
+    to_dict()
+        Returns the bucket counts and summary statistics.
+    '''
+
+    BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+
+    def __init__(self):
+        self.__mutex = threading.Lock()
+        self.__counts = [0] * (len(self.BUCKETS) + 1)
+        self.__count = 0
+        self.__sum = 0
+        self.__max = 0
+
+    def observe(self, latency):
+        """Record one latency.
+
+        Parameters
+        ----------
+        latency : float
+            The request latency, in seconds.
+        """
+        with self.__mutex:
+            self.__counts[bisect.bisect_left(self.BUCKETS, latency)] += 1
+            self.__count += 1
+            self.__sum += latency
+            self.__max = max(self.__max, latency)
+
+    def to_dict(self):
+        """Returns the bucket counts and summary statistics.
+
+        Returns
+        -------
+        dict
+            'count', 'mean', 'max', 'p50', 'p99' in seconds, and 'buckets' mapping each upper bound to its count.
+            Percentiles are the upper bound of the bucket holding them.
+        """
+        with self.__mutex:
+            counts = list(self.__counts)
+            count, total, maximum = self.__count, self.__sum, self.__max
+        bounds = [str(bound) for bound in self.BUCKETS] + ["inf"]
+        return {
+            "count": count,
+            "mean": total / count if count else None,
+            "max": maximum if count else None,
+            "p50": self.__percentile(counts, count, 0.5),
+            "p99": self.__percentile(counts, count, 0.99),
+            "buckets": dict(zip(bounds, counts)),
+        }
+
+    def __percentile(self, counts, count, quantile):
+        if not count:
+            return None
+        cumulated = 0
+        for index, bucket_count in enumerate(counts):
+            cumulated += bucket_count
+            if cumulated >= quantile * count:
+                return self.BUCKETS[index] if index < len(self.BUCKETS) else self.__max
+        return self.__max
+
+class TransportSession(requests.Session):
+    '''
+    TransportSession class
+
+    'requests.Session' bound to an HttpTransport.
+
+    The session is used exactly as a 'requests.Session', its 'request' method adds the transport
+    default timeout, the retries of idempotent requests and the latency recording.
+    '''
+
+    def __init__(self, transport):
+        """
+        Parameters
+        ----------
+        transport : HttpTransport
+            The transport owning the connection pools.
+        """
+        super().__init__()
+        self.transport = transport
+        self.mount("https://", transport.adapter)
+        self.mount("http://", transport.adapter)
+
+    def request(self, method, url, *args, timeout=None, on_retry=None, **kwargs):
+        return self.transport.send(super().request, method, url, *args, timeout=timeout, on_retry=on_retry, **kwargs)
+
+    def close(self):
+        # Connection pools belong to the transport and outlive the session
+        pass
+
+class HttpTransport():
+    '''
+    HttpTransport class
+
+    Own the connection pools shared by every connector session.
+
+    Every session mounts the same adapter, so a host gets one pool of keep-alive connections for
+    the whole process. Requests without a timeout get the default one.
+
+    Idempotent requests answered by 429 or 5xx, or failing to connect, are retried with a jittered
+    exponential backoff. A 'Retry-After' header sets the delay instead, unless it is longer than
+    'max_backoff', in which case the response is returned to the connector as is. Other requests
+    are never retried, an order placement could be executed twice.
+
+    Connectors pacing their requests with a rate limiter pass an 'on_retry' callback, called before
+    each retry so that retries are charged too. A 429 response is then left to the rate limiter the
+    callback penalizes, instead of waiting for the backoff.
+
+    Latencies are recorded per (method, host, path) into histograms.
+
+    Methods
+    -------
+    session()
+        Returns a new session using the transport.
+    send(request, method, url)
+        Send a request with timeout, retries and latency recording.
+    get_latencies()
+        Returns the latency histograms of every endpoint.
+    '''
+
+    def __init__(self, pool_connections=32, pool_maxsize=32, timeout=(3, 30), max_retries=3, backoff_factor=0.5, max_backoff=30, max_endpoints=1000):
+        """
+        Parameters
+        ----------
+        pool_connections : int
+            Number of hosts whose pool is kept.
+        pool_maxsize : int
+            Maximum number of keep-alive connections per host.
+        timeout : tuple
+            Default (connect, read) timeout, in seconds.
+        max_retries : int
+            Maximum number of retries of an idempotent request.
+        backoff_factor : float
+            Base delay of the exponential backoff, in seconds.
+        max_backoff : float
+            Maximum delay between two tries, in seconds.
+        max_endpoints : int
+            Maximum number of endpoints with their own histogram, others are recorded per host.
+        """
+        self.adapter = requests.adapters.HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.__max_endpoints = max_endpoints
+        self.__latencies_mutex = threading.Lock()
+        self.__latencies = {}
+
+    def session(self):
+        """Returns a new session using the transport.
+
+        Returns
+        -------
+        TransportSession
+            The session, headers set on it are not shared with other sessions.
+        """
+        return TransportSession(self)
+
+    def send(self, request, method, url, *args, timeout=None, on_retry=None, **kwargs):
+        """Send a request with timeout, retries and latency recording.
+
+        Parameters
+        ----------
+        request : callable
+            The function actually sending the request, 'requests.Session.request' signature.
+        method : str
+            The HTTP method.
+        url : str
+            The requested url.
+        timeout : float or tuple
+            The (connect, read) timeout. Defaults to the transport timeout.
+        on_retry : callable
+            Called before each retry with the response to retry, None after a connection error.
+            Returns once the request can be sent again, optionally with a dict of request arguments
+            replacing the previous ones, such as a new signature.
+
+        Returns
+        -------
+        requests.Response
+            The last response received.
+        """
+        timeout = timeout if timeout is not None else self.timeout
+        retry = method.upper() in IDEMPOTENT_METHODS
+        endpoint = self.__endpoint(method, url)
+
+        tries = 0
+        while True:
+            start = time.monotonic()
+            try:
+                response = request(method, url, *args, timeout=timeout, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self.__observe(endpoint, time.monotonic() - start)
+                # A read timeout may have reached the server, only idempotent requests are sent again
+                if not retry or tries >= self.max_retries:
+                    raise
+                delay = self.__backoff(tries)
+                retried_response = None
+                log(f"[HttpTransport] {type(e).__name__} on {endpoint}, retrying in {round(delay, 3)} seconds")
+            else:
+                self.__observe(endpoint, time.monotonic() - start)
+                if not retry or tries >= self.max_retries or response.status_code not in RETRY_STATUS_CODES:
+                    return response
+                delay = self.__retry_after(response)
+                if delay is not None and delay > self.max_backoff:
+                    return response
+                if response.status_code == 429 and on_retry is not None:
+                    # The rate limiter penalized by 'on_retry' makes the retry wait
+                    delay = 0
+                elif delay is None:
+                    delay = self.__backoff(tries)
+                retried_response = response
+                log(f"[HttpTransport] Status {response.status_code} on {endpoint}, retrying in {round(delay, 3)} seconds")
+                response.close()
+            time.sleep(delay)
+            if on_retry is not None:
+                kwargs.update(on_retry(retried_response) or {})
+            tries += 1
+
+    def get_latencies(self):
+        """Returns the latency histograms of every endpoint.
+
+        Returns
+        -------
+        dict
+            The 'LatencyHistogram.to_dict' of every endpoint, keyed by '<method> <host><path>'.
+        """
+        with self.__latencies_mutex:
+            latencies = dict(self.__latencies)
+        return {endpoint: histogram.to_dict() for endpoint, histogram in latencies.items()}
+
+    def __endpoint(self, method, url):
+        # Numeric path segments are ids, they are grouped to keep the number of histograms bounded
+        url_parts = urlsplit(url)
+        path = re.sub(r"/\d+(?=/|$)", "/{id}", url_parts.path)
+        return f"{method.upper()} {url_parts.netloc}{path}"
+
+    def __observe(self, endpoint, latency):
+        histogram = self.__latencies.get(endpoint)
+        if histogram is None:
+            with self.__latencies_mutex:
+                if endpoint not in self.__latencies and len(self.__latencies) >= self.__max_endpoints:
+                    method, _, path = endpoint.partition(" ")
+                    endpoint = f"{method} {path.split('/')[0]}/*"
+                histogram = self.__latencies.setdefault(endpoint, LatencyHistogram())
+        histogram.observe(latency)
+
+    def __backoff(self, tries):
+        # Full jitter, spreads the retries of concurrent requests
+        return random.uniform(0, min(self.max_backoff, self.backoff_factor * 2 ** tries))
+
+    def __retry_after(self, response):
+        retry_after = response.headers.get("Retry-After")
+        if retry_after is None:
+            return None
+        try:
+            return max(0, float(retry_after))
+        except ValueError:
+            pass
+        try:
+            retry_date = parsedate_to_datetime(retry_after)
+            return max(0, (retry_date - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return None
+
+shared_transport = HttpTransport()
+
+def get_transport():
+    """Returns the HTTP transport shared by the whole process.
+
+    Returns
+    -------
+    HttpTransport
+        The shared instance.
+    """
+    return shared_transport
@@ -1,4 +1,5 @@
 from connectors.crypto.common.logger import log
+from connectors.crypto.connector.common.transport import get_transport
 import requests
 import json
 
@@ -8,7 +9,7 @@ class ComplyAdvantage(object):
     def __init__(self, api_key):
         self.comply_advantage_key = api_key
         self.base_url = "https://api.complyadvantage.com"
-        self.session = requests.Session()
+        self.session = get_transport().session()
 
     def get_user_risk(self, search_term, *, is_company, birth_year=None, country_codes=None, fuzziness=0.6):
         headers = {'Authorization': 'Token ' + self.comply_advantage_key}
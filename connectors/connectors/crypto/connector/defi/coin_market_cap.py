@@ -1,3 +1,4 @@
+from connectors.crypto.connector.common.transport import get_transport
 from urllib.parse import urlencode
 import requests
 import json
@@ -8,7 +9,7 @@ class CoinMarketCap:
         self.base_url = "https://pro-api.coinmarketcap.com"
         self.api_key = api_key
         self.public_key = public_key
-        self.session = requests.Session()
+        self.session = get_transport().session()
 
     def get_token_price(self, symbols, convert="USD"):
         data = {}
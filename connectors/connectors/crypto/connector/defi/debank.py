@@ -1,4 +1,5 @@
 from connectors.crypto.connector.exchanges.coinbase import CbForex
+from connectors.crypto.connector.common.transport import get_transport
 from urllib.parse import urlencode
 import requests
 import datetime
@@ -13,7 +14,7 @@ class Debank:
         self.strategy = strategy
         self.base_currency = base_currency
         self.database = strategy.database if strategy else None
-        self.session = requests.Session()
+        self.session = get_transport().session()
 
         self.__known_addresses = [
             "0x76b712c313584063a814db4aa4c82587b9aef0ee",
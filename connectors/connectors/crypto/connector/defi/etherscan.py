@@ -1,3 +1,4 @@
+from connectors.crypto.connector.common.transport import get_transport
 import requests
 import datetime
 import json
@@ -10,7 +11,7 @@ class Etherscan:
         self.api_key = api_key
         self.public_key = public_key
         self.base_currency = base_currency
-        self.session = requests.Session()
+        self.session = get_transport().session()
 
     def get_gas_prices(self):
         response = self.__request("GET", {
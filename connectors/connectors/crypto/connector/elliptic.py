@@ -1,3 +1,4 @@
+from connectors.crypto.connector.common.transport import get_transport
 import requests
 import json
 import base64
@@ -12,7 +13,7 @@ class Elliptic(object):
 		self.elliptic_key = elliptic_key
 		self.elliptic_secret = elliptic_secret
 		self.base_url = 'https://aml-api.elliptic.co/v2'
-		self.session = requests.Session()
+		self.session = get_transport().session()
 
 
 	def __get_elliptic_sign(self, timestamp, http_method, http_path, payload):
@@ -1,4 +1,5 @@
 from connectors.threading.Threads import StoppableThread, format_traceback
+from connectors.threading.Multiplexer import get_multiplexer
 from connectors.crypto.connector.common.connector import CryptoConnector
 from connectors.crypto.connector.fireblocks import Fireblocks
 from connectors.crypto.connector.binance_link import BinanceLink
@@ -6,9 +7,13 @@ import connectors.crypto.connector.common.websocket_codes as op_codes
 from connectors.crypto.connector.core import is_stable_coin, is_fiat
 from connectors.crypto.connector.exchanges.coinbase import CbForex
 from connectors.crypto.common.randomizer import TradeRandomizer
+from connectors.crypto.common.orderbook import OrderBook
+from connectors.crypto.common.rate_limiter import RateLimiter
+from connectors.crypto.common.product_cache import ProductCatalogCache
 from connectors.crypto.connector.core import get_contract_size
 from connectors.crypto.common.logger import log
 from connectors.crypto.exceptions import *
+from connectors.crypto.connector.common.transport import get_transport
 from urllib.parse import urlencode
 import connectors.config as connectors_config
 from decimal import Decimal
@@ -19,8 +24,8 @@ import threading
 import websocket
 import requests
 import datetime
+import collections
 import hashlib
-import select
 import queue
 import hmac
 import time
@@ -35,6 +40,64 @@ class BinanceEndpoints(str, Enum):
     def __str__(self):
         return f"{self.value}"
 
+# Weight limits, IP limits are shared by every key
+WEIGHT_LIMITS = {
+    "X-SAPI-USED-IP-WEIGHT-1M": {"header": "X-SAPI-USED-IP-WEIGHT-1M", "limit": 12000, "period": 60, "per_key": False},
+    "X-SAPI-USED-UID-WEIGHT-1M": {"header": "X-SAPI-USED-UID-WEIGHT-1M", "limit": 180000, "period": 60, "per_key": True},
+    "SPOT-X-MBX-USED-WEIGHT-1M": {"header": "X-MBX-USED-WEIGHT-1M", "limit": 6000, "period": 60, "per_key": False},
+    "FUTURE-X-MBX-USED-WEIGHT-1M": {"header": "X-MBX-USED-WEIGHT-1M", "limit": 2400, "period": 60, "per_key": False},
+}
+
+def get_endpoint_classes(path):
+    """Returns the weight limits reported on a path, the first one is charged for the request.
+
+    Parameters
+    ----------
+    path : str
+        The request path.
+
+    Returns
+    -------
+    list
+        The 'WEIGHT_LIMITS' keys.
+    """
+    if path.startswith("/sapi/"):
+        return ["X-SAPI-USED-IP-WEIGHT-1M", "X-SAPI-USED-UID-WEIGHT-1M"]
+    elif path.startswith("/api/"):
+        return ["SPOT-X-MBX-USED-WEIGHT-1M"]
+    elif path.startswith("/fapi/"):
+        return ["FUTURE-X-MBX-USED-WEIGHT-1M"]
+    return []
+
+def get_request_weight(path, payload=None):
+    """Returns the weight of a market data request, some of them depending on the requested 'limit'.
+
+    Parameters
+    ----------
+    path : str
+        The request path.
+    payload : dict
+        The request parameters.
+
+    Returns
+    -------
+    int
+        The request weight, 1 for paths without known weight.
+    """
+    limit = (payload or {}).get("limit")
+    if path == "/api/v3/depth":
+        limit = int(limit) if limit else 100
+        return 5 if limit <= 100 else 25 if limit <= 500 else 50 if limit <= 1000 else 250
+    elif path == "/fapi/v1/depth":
+        limit = int(limit) if limit else 500
+        return 2 if limit <= 50 else 5 if limit <= 100 else 10 if limit <= 500 else 20
+    elif path == "/api/v3/klines":
+        return 2
+    elif path == "/fapi/v1/klines":
+        limit = int(limit) if limit else 500
+        return 1 if limit < 100 else 2 if limit < 500 else 5 if limit <= 1000 else 10
+    return 1
+
 class Binance(CryptoConnector):
     PLATFORM_ID = 1
     PLATFORM_NAME = "Binance"
@@ -48,7 +111,7 @@ class Binance(CryptoConnector):
         self.base_currency = base_currency
         self.database = strategy.database if strategy else None
         self.brokerage_strategy = brokerage_strategy
-        self.session = requests.Session()
+        self.session = get_transport().session()
 
         self.tilvest_brokering_fees = 0.00125
         #TODO: Uses strategy brokering fees instead of hard coded values
@@ -125,11 +188,7 @@ class Binance(CryptoConnector):
             self.options_ws_url =    "wss://vstream.binance.com/ws"
             """
 
-        # Define weights
-        self.__weight_limits = {
-            "X-SAPI-USED-IP-WEIGHT-1M": {"limit": 12000, "timeout": 60},
-            "X-SAPI-USED-UID-WEIGHT-1M": {"limit": 180000, "timeout": 60},
-        }
+        # Define weights of private endpoints, market data weights are given by 'get_request_weight'
         self.__weights = {
             "/api/v3/openOrders": {"header": "X-SAPI-USED-UID-WEIGHT-1M", "weight": 40},
             "/fapi/v1/openOrders": {"header": "X-SAPI-USED-UID-WEIGHT-1M", "weight": 40},
@@ -142,12 +201,14 @@ class Binance(CryptoConnector):
             "/sapi/v1/sub-account/transfer/subUserHistory": {"header": "X-SAPI-USED-UID-WEIGHT-1M", "weight": 1},
         }
 
-        # Initialize weight limits
-        self.__current_weights = {}
-        for header in self.__weight_limits.keys():
-            self.__current_weights[header] = 0
+        # Initialize weight limits, buckets are shared with every Binance connector of the process
+        self.__rate_limiter = RateLimiter()
+        for endpoint_class, weight_limit in WEIGHT_LIMITS.items():
+            self.__rate_limiter.configure(self.PLATFORM_NAME, endpoint_class, weight_limit["limit"], weight_limit["period"])
 
+        self.__product_cache = ProductCatalogCache()
         self.__products = {}
+        self.__products_by_exchange_symbol = {}
         self.__assets = {}
         self.__margin_assets = {}
         self.__margin_products = {}
@@ -195,15 +256,13 @@ class Binance(CryptoConnector):
 
         self.__spot_public_websocket = websocket.WebSocket()
         self.__future_public_websocket = websocket.WebSocket()
-        self.__spot_public_thread = None
-        self.__future_public_thread = None
+        # Websockets are read by the process-wide multiplexer
+        self.__multiplexer = get_multiplexer()
         self.__public_callbacks_mutex = threading.Lock()
         self.__public_callbacks = {}
 
         self.__spot_private_websocket = None
         self.__future_private_websocket = None
-        self.__spot_private_thread = None
-        self.__future_private_thread = None
         self.__private_callbacks_mutex = threading.Lock()
         self.__private_callbacks = {}
 
@@ -220,6 +279,10 @@ class Binance(CryptoConnector):
         self.__future_auth_channel_number = 0
 
         self.__spot_orderbooks = {}
+        self.__spot_orderbooks_depth = {}
+        self.__spot_orderbooks_sync = {}
+        self.__spot_orderbook_snapshot_depth = 1000
+        self.__spot_orderbook_buffer_size = 1000
 
         self.__show_websocket_logs = False
 
@@ -498,98 +561,160 @@ class Binance(CryptoConnector):
         return self.__assets
 
     def get_products(self, reload=False):
-        if not self.__products or reload:
-            data = {}
+        # Catalog is shared with every Binance connector of the process, staking products depend on the account
+        products = self.__product_cache.get(self.PLATFORM_ID, self.testing, self.__load_products, reload=reload,
+                                            variant="staking" if self.__has_staking_enabled else None)
+        if products is not self.__products:
+            self.__products = products
+
+            # Reverse index used to resolve websocket messages, spot and futures may share an exchange symbol
+            products_by_exchange_symbol = {}
+            for product in products.values():
+                products_by_exchange_symbol.setdefault(product["exchange_symbol"], []).append(product)
+            self.__products_by_exchange_symbol = products_by_exchange_symbol
 
-            # Spot part
-            self.__spot_exchange_info = self.__api_spot_get_exchange_info()
-            for product in self.__spot_exchange_info["symbols"]:
-                if product["status"] != "TRADING":
-                    continue
+        return self.__products
 
-                base_asset_symbol = product["baseAsset"]
-                quote_asset_symbol = product["quoteAsset"]
-                generated_symbol = f"{base_asset_symbol}_{quote_asset_symbol}"
+    def __load_products(self):
+        data = {}
 
-                product_refactored = {
-                    "symbol": generated_symbol,
-                    "exchange_id": product["symbol"],
-                    "exchange_symbol": product["symbol"],
-                    "contract_type": "spot",
-                    # Contract size is always 1 for spot
-                    "contract_size": 1,
-                    "strike_price": None,
-                    "settlement_date": None,
-                    "settlement_time": None,
-                    "duration": None,
-                    "precision": {
-                        "amount": None,
-                        "price": None,
-                        "notional": None,
-                    },
-                    "limits": {
-                        "amount": {"min": None, "max": None},
-                        "price": {"min": None, "max": None},
-                        "notional": {"min": None, "max": None},
-                    },
-                }
+        # Spot part
+        self.__spot_exchange_info = self.__api_spot_get_exchange_info()
+        for product in self.__spot_exchange_info["symbols"]:
+            if product["status"] != "TRADING":
+                continue
 
-                for filter in product["filters"]:
-                    if filter["filterType"] == "LOT_SIZE":
-                        product_refactored["precision"]["amount"] = float(filter["stepSize"])
-                        product_refactored["limits"]["amount"]["min"] = float(filter["minQty"])
-                        product_refactored["limits"]["amount"]["max"] = float(filter["maxQty"])
-                    if filter["filterType"] == "PRICE_FILTER":
-                        product_refactored["precision"]["price"] = float(filter["tickSize"])
-                        product_refactored["limits"]["price"]["min"] = float(filter["minPrice"])
-                        product_refactored["limits"]["price"]["max"] = float(filter["maxPrice"])
-                    if filter["filterType"] == "NOTIONAL":
-                        product_refactored["precision"]["notional"] = float(filter["maxNotional"])
-                        product_refactored["limits"]["notional"]["min"] = float(filter["minNotional"])
-                        product_refactored["limits"]["notional"]["max"] = float(filter["maxNotional"])
-
-                product_refactored["base_asset_id"] = base_asset_symbol
-                product_refactored["base_asset_symbol"] = base_asset_symbol
-                product_refactored["quote_asset_id"] = quote_asset_symbol
-                product_refactored["quote_asset_symbol"] = quote_asset_symbol
+            base_asset_symbol = product["baseAsset"]
+            quote_asset_symbol = product["quoteAsset"]
+            generated_symbol = f"{base_asset_symbol}_{quote_asset_symbol}"
+
+            product_refactored = {
+                "symbol": generated_symbol,
+                "exchange_id": product["symbol"],
+                "exchange_symbol": product["symbol"],
+                "contract_type": "spot",
+                # Contract size is always 1 for spot
+                "contract_size": 1,
+                "strike_price": None,
+                "settlement_date": None,
+                "settlement_time": None,
+                "duration": None,
+                "precision": {
+                    "amount": None,
+                    "price": None,
+                    "notional": None,
+                },
+                "limits": {
+                    "amount": {"min": None, "max": None},
+                    "price": {"min": None, "max": None},
+                    "notional": {"min": None, "max": None},
+                },
+            }
 
-                data[generated_symbol] = product_refactored
+            for filter in product["filters"]:
+                if filter["filterType"] == "LOT_SIZE":
+                    product_refactored["precision"]["amount"] = float(filter["stepSize"])
+                    product_refactored["limits"]["amount"]["min"] = float(filter["minQty"])
+                    product_refactored["limits"]["amount"]["max"] = float(filter["maxQty"])
+                if filter["filterType"] == "PRICE_FILTER":
+                    product_refactored["precision"]["price"] = float(filter["tickSize"])
+                    product_refactored["limits"]["price"]["min"] = float(filter["minPrice"])
+                    product_refactored["limits"]["price"]["max"] = float(filter["maxPrice"])
+                if filter["filterType"] == "NOTIONAL":
+                    product_refactored["precision"]["notional"] = float(filter["maxNotional"])
+                    product_refactored["limits"]["notional"]["min"] = float(filter["minNotional"])
+                    product_refactored["limits"]["notional"]["max"] = float(filter["maxNotional"])
+
+            product_refactored["base_asset_id"] = base_asset_symbol
+            product_refactored["base_asset_symbol"] = base_asset_symbol
+            product_refactored["quote_asset_id"] = quote_asset_symbol
+            product_refactored["quote_asset_symbol"] = quote_asset_symbol
+
+            data[generated_symbol] = product_refactored
+
+        # Future part
+        self.__future_exchange_info = self.__api_future_get_exchange_info()
+        for product in self.__future_exchange_info["symbols"]:
+
+            if product["status"] != "TRADING":
+                continue
 
-            # Future part
-            self.__future_exchange_info = self.__api_future_get_exchange_info()
-            for product in self.__future_exchange_info["symbols"]:
+            base_asset_symbol = product["baseAsset"]
+            quote_asset_symbol = product["quoteAsset"]
 
-                if product["status"] != "TRADING":
-                    continue
+            if product["contractType"] == "PERPETUAL":
+                settlement_time = None
+                settlement_date = None
+                duration = None
+                generated_symbol = f"{base_asset_symbol}_PERP_{quote_asset_symbol}"
+                contract_type = "perpetual_future"
+            else:
+                settlement_datetime = datetime.datetime.fromtimestamp(product["deliveryDate"]/1000,
+                                    tz=datetime.timezone.utc)
+                settlement_time = settlement_datetime.strftime('%Y-%m-%dT%H:%M:%SZ')
+                settlement_date = settlement_time[:10]
+                duration = (settlement_datetime.date() - datetime.date.today()).days
+                generated_symbol = f"{base_asset_symbol}_FUT_{settlement_date}_{quote_asset_symbol}"
+                contract_type = "future"
+
+            product_refactored = {
+                "symbol": generated_symbol,
+                "exchange_id": product["symbol"],
+                "exchange_symbol": product["symbol"],
+                "contract_type": contract_type,
+                "contract_size": float(product["contractSize"]) if "contractSize" in product else 1,
+                "strike_price": None,
+                "settlement_date": settlement_date,
+                "settlement_time": settlement_time,
+                "duration": duration,
+                "precision": {
+                    "amount": None,
+                    "price": None,
+                    "notional": None,
+                },
+                "limits": {
+                    "amount": {"min": None, "max": None},
+                    "price": {"min": None, "max": None},
+                    "notional": {"min": None, "max": None},
+                }
+            }
 
-                base_asset_symbol = product["baseAsset"]
-                quote_asset_symbol = product["quoteAsset"]
+            for filter in product["filters"]:
+                if filter["filterType"] == "LOT_SIZE":
+                    product_refactored["precision"]["amount"] = float(filter["stepSize"])
+                    product_refactored["limits"]["amount"]["min"] = float(filter["minQty"])
+                    product_refactored["limits"]["amount"]["max"] = float(filter["maxQty"])
+                if filter["filterType"] == "PRICE_FILTER":
+                    product_refactored["precision"]["price"] = float(filter["tickSize"])
+                    product_refactored["limits"]["price"]["min"] = float(filter["minPrice"])
+                    product_refactored["limits"]["price"]["max"] = float(filter["maxPrice"])
+                if filter["filterType"] == "NOTIONAL":
+                    product_refactored["precision"]["notional"] = float(filter["maxNotional"])
+                    product_refactored["limits"]["notional"]["min"] = float(filter["minNotional"])
+                    product_refactored["limits"]["notional"]["max"] = float(filter["maxNotional"])
+
+            product_refactored["base_asset_id"] = base_asset_symbol
+            product_refactored["base_asset_symbol"] = base_asset_symbol
+            product_refactored["quote_asset_id"] = quote_asset_symbol
+            product_refactored["quote_asset_symbol"] = quote_asset_symbol
+
+            data[generated_symbol] = product_refactored
 
-                if product["contractType"] == "PERPETUAL":
-                    settlement_time = None
-                    settlement_date = None
-                    duration = None
-                    generated_symbol = f"{base_asset_symbol}_PERP_{quote_asset_symbol}"
-                    contract_type = "perpetual_future"
-                else:
-                    settlement_datetime = datetime.datetime.fromtimestamp(product["deliveryDate"]/1000,
-                                        tz=datetime.timezone.utc)
-                    settlement_time = settlement_datetime.strftime('%Y-%m-%dT%H:%M:%SZ')
-                    settlement_date = settlement_time[:10]
-                    duration = (settlement_datetime.date() - datetime.date.today()).days
-                    generated_symbol = f"{base_asset_symbol}_FUT_{settlement_date}_{quote_asset_symbol}"
-                    contract_type = "future"
+        if self.__has_staking_enabled:
+            staking_products = self.__api_get_staking_product_list()
+            for product in staking_products:
 
+                generated_symbol = product["projectId"]
                 product_refactored = {
                     "symbol": generated_symbol,
-                    "exchange_id": product["symbol"],
-                    "exchange_symbol": product["symbol"],
-                    "contract_type": contract_type,
-                    "contract_size": float(product["contractSize"]) if "contractSize" in product else 1,
+                    "exchange_id": generated_symbol,
+                    "exchange_symbol": generated_symbol,
+                    "contract_type": "staking",
+                    "contract_size": 0,
                     "strike_price": None,
-                    "settlement_date": settlement_date,
-                    "settlement_time": settlement_time,
-                    "duration": duration,
+                    "settlement_date": None,
+                    "settlement_time": None,
+                    "duration": product["detail"]["duration"],
                     "precision": {
                         "amount": None,
                         "price": None,
@@ -598,69 +723,17 @@ class Binance(CryptoConnector):
                     "limits": {
                         "amount": {"min": None, "max": None},
                         "price": {"min": None, "max": None},
-                        "notional": {"min": None, "max": None},
-                    }
+                        "notional": {"min": product["quota"]["minimum"], "max": None},
+                    },
+                    "base_asset_id": product["detail"]["asset"],
+                    "base_asset_symbol": product["detail"]["asset"],
+                    "quote_asset_id": product["detail"]["rewardAsset"],
+                    "quote_asset_symbol": product["detail"]["rewardAsset"],
                 }
 
-                for filter in product["filters"]:
-                    if filter["filterType"] == "LOT_SIZE":
-                        product_refactored["precision"]["amount"] = float(filter["stepSize"])
-                        product_refactored["limits"]["amount"]["min"] = float(filter["minQty"])
-                        product_refactored["limits"]["amount"]["max"] = float(filter["maxQty"])
-                    if filter["filterType"] == "PRICE_FILTER":
-                        product_refactored["precision"]["price"] = float(filter["tickSize"])
-                        product_refactored["limits"]["price"]["min"] = float(filter["minPrice"])
-                        product_refactored["limits"]["price"]["max"] = float(filter["maxPrice"])
-                    if filter["filterType"] == "NOTIONAL":
-                        product_refactored["precision"]["notional"] = float(filter["maxNotional"])
-                        product_refactored["limits"]["notional"]["min"] = float(filter["minNotional"])
-                        product_refactored["limits"]["notional"]["max"] = float(filter["maxNotional"])
-
-                product_refactored["base_asset_id"] = base_asset_symbol
-                product_refactored["base_asset_symbol"] = base_asset_symbol
-                product_refactored["quote_asset_id"] = quote_asset_symbol
-                product_refactored["quote_asset_symbol"] = quote_asset_symbol
-
                 data[generated_symbol] = product_refactored
 
-            if self.__has_staking_enabled:
-                staking_products = self.__api_get_staking_product_list()
-                for product in staking_products:
-
-                    generated_symbol = product["projectId"]
-                    product_refactored = {
-                        "symbol": generated_symbol,
-                        "exchange_id": generated_symbol,
-                        "exchange_symbol": generated_symbol,
-                        "contract_type": "staking",
-                        "contract_size": 0,
-                        "strike_price": None,
-                        "settlement_date": None,
-                        "settlement_time": None,
-                        "duration": product["detail"]["duration"],
-                        "precision": {
-                            "amount": None,
-                            "price": None,
-                            "notional": None,
-                        },
-                        "limits": {
-                            "amount": {"min": None, "max": None},
-                            "price": {"min": None, "max": None},
-                            "notional": {"min": product["quota"]["minimum"], "max": None},
-                        },
-                        "base_asset_id": product["detail"]["asset"],
-                        "base_asset_symbol": product["detail"]["asset"],
-                        "quote_asset_id": product["detail"]["rewardAsset"],
-                        "quote_asset_symbol": product["detail"]["rewardAsset"],
-                    }
-
-                    data[generated_symbol] = product_refactored
-
-            self.__products = data
-
-            return data
-        else:
-            return self.__products
+        return data
 
     def get_product(self, symbol):
         if not self.__products:
@@ -3195,11 +3268,9 @@ class Binance(CryptoConnector):
             self.__spot_public_websocket.connect(self.urls["websocket"][BinanceEndpoints.SPOT], timeout=5)
             self.__future_public_websocket.connect(self.urls["websocket"][BinanceEndpoints.FUTURE], timeout=5)
 
-            # Launch reception threads
-            self.__spot_public_thread = StoppableThread(name="spot_public_websocket_callback", target=self.__spot_public_websocket_callback)
-            self.__spot_public_thread.start()
-            self.__future_public_thread = StoppableThread(name="future_public_websocket_callback", target=self.__future_public_websocket_callback)
-            self.__future_public_thread.start()
+            # Start reception
+            self.__multiplexer.register(self.__spot_public_websocket, self.__frame_handler(self.__on_spot_public_message), self.__on_connection_closed)
+            self.__multiplexer.register(self.__future_public_websocket, self.__frame_handler(self.__on_future_public_message), self.__on_connection_closed)
 
             self.__is_connected = True
             self.__connection_lost = False
@@ -3217,15 +3288,9 @@ class Binance(CryptoConnector):
             self.__ws_log("Disconnecting", "DISCONNECT")
 
             if not self.__connection_lost:
-                # Stop reception threads
-                if self.__spot_public_thread:
-                    self.__spot_public_thread.stop()
-                    self.__spot_public_thread.join()
-                    self.__spot_public_thread = None
-                if self.__future_public_thread:
-                    self.__future_public_thread.stop()
-                    self.__future_public_thread.join()
-                    self.__future_public_thread = None
+                # Stop reception
+                self.__multiplexer.unregister(self.__spot_public_websocket)
+                self.__multiplexer.unregister(self.__future_public_websocket)
 
                 # Disconnect websocket
                 if self.__spot_public_websocket:
@@ -3233,21 +3298,13 @@ class Binance(CryptoConnector):
                 if self.__future_public_websocket:
                     self.__future_public_websocket.close()
 
-                # Stop user data thread
-                if self.__spot_private_thread:
-                    self.__spot_private_thread.stop()
-                    self.__spot_private_thread.join()
-                    self.__spot_private_thread = None
-                if self.__future_private_thread:
-                    self.__future_private_thread.stop()
-                    self.__future_private_thread.join()
-                    self.__future_private_thread = None
-
                 # Disconnect user data websocket
                 if self.__spot_private_websocket:
+                    self.__multiplexer.unregister(self.__spot_private_websocket)
                     self.__spot_private_websocket.close()
                     self.__spot_private_websocket = None
                 if self.__future_private_websocket:
+                    self.__multiplexer.unregister(self.__future_private_websocket)
                     self.__future_private_websocket.close()
                     self.__future_private_websocket = None
 
@@ -3261,14 +3318,10 @@ class Binance(CryptoConnector):
                 self.__spot_public_websocket.close()
                 self.__future_public_websocket.close()
             else:
-                if self.__spot_public_thread:
-                    self.__spot_public_thread.stop()
-                if self.__future_public_thread:
-                    self.__future_public_thread.stop()
-                if self.__spot_private_thread:
-                    self.__spot_private_thread.stop()
-                if self.__future_private_thread:
-                    self.__future_private_thread.stop()
+                for ws in [self.__spot_public_websocket, self.__future_public_websocket,
+                           self.__spot_private_websocket, self.__future_private_websocket]:
+                    if ws:
+                        self.__multiplexer.unregister(ws)
 
             self.__is_connected = False
             self.__is_spot_auth = False
@@ -3328,17 +3381,8 @@ class Binance(CryptoConnector):
                     "symbol": symbol,
                 })
 
-                self.__spot_orderbooks[symbol] = {
-                    "symbol": symbol,
-                    "buy": {},
-                    "sell": {},
-                }
-
-                orderbook = self.get_orderbook(symbol)
-                for order in orderbook["buy"]:
-                    self.__spot_orderbooks[symbol]["buy"][order["price"]] = order["size"]
-                for order in orderbook["sell"]:
-                    self.__spot_orderbooks[symbol]["sell"][order["price"]] = order["size"]
+                # Callbacks receive the best 'depth' levels of the local book
+                self.__init_spot_orderbook(symbol, depth)
 
             elif self.__is_product_future(symbol):
                 depth = 20
@@ -3350,6 +3394,10 @@ class Binance(CryptoConnector):
 
         if spot_channels:
             self.__spot_public_subscribe(spot_channels, "depthUpdate", callback=callback)
+
+            # Updates are buffered until the REST snapshot is loaded, so it has to be requested after subscribing
+            for channel in spot_channels:
+                self.__resync_spot_orderbook(channel["symbol"])
         if future_channels:
             self.__future_public_subscribe(future_channels, "depthUpdate", callback=callback)
 
@@ -3369,11 +3417,14 @@ class Binance(CryptoConnector):
                 exchange_symbol = self.__products[symbol]["exchange_symbol"]
 
             if self.__is_product_spot(symbol):
-                interval = "1000ms"
+                interval = "100ms"
                 spot_channels.append({
                     "channel": f"{exchange_symbol.lower()}@depth@{interval}",
                     "symbol": symbol,
                 })
+                self.__spot_orderbooks.pop(symbol, None)
+                self.__spot_orderbooks_depth.pop(symbol, None)
+                self.__spot_orderbooks_sync.pop(symbol, None)
             elif self.__is_product_future(symbol):
                 depth = 20
                 interval = "100ms"
@@ -3387,6 +3438,28 @@ class Binance(CryptoConnector):
         if future_channels:
             self.__future_public_unsubscribe(future_channels, "depthUpdate")
 
+    def get_orderbook_sync_status(self):
+        """Returns the synchronization state of the local spot orderbooks.
+
+        Returns
+        -------
+        dict
+            Keyed by symbol, with 'synced', 'last_update_id', 'buffered' events, 'gaps' detected,
+            'resyncs' triggered by a gap and 'snapshots' loaded through REST.
+        """
+        status = {}
+        for symbol, state in list(self.__spot_orderbooks_sync.items()):
+            with state["mutex"]:
+                status[symbol] = {
+                    "synced": state["last_update_id"] is not None,
+                    "last_update_id": state["last_update_id"],
+                    "buffered": len(state["buffer"]),
+                    "gaps": state["gaps"],
+                    "resyncs": state["resyncs"],
+                    "snapshots": state["snapshots"],
+                }
+        return status
+
     def subscribe_mark_price(self, symbols, callback=None):
         if not self.__products:
             self.get_products()
@@ -4512,28 +4585,36 @@ class Binance(CryptoConnector):
         if headers is None:
             headers = {}
 
-        # Check weights before request
+        # Wait for weight before request
         if path in self.__weights:
-            header = self.__weights[path]["header"]
+            endpoint_class = self.__weights[path]["header"]
             path_weight = self.__weights[path]["weight"]
-            current_weight = self.__current_weights[header]
-            if current_weight + path_weight > self.__weight_limits[header]["limit"]:
-                timeout = self.__weight_limits[header]["timeout"]
-                log(f"[{self}][ERROR] Issuing request on '{path}' would overflow weight limit ({current_weight + path_weight} / {self.__weight_limits[header]['limit']}). Waiting {timeout} seconds...")
-                time.sleep(timeout)
-                self.__current_weights[header] = 0
+        else:
+            endpoint_classes = get_endpoint_classes(path)
+            endpoint_class = endpoint_classes[0] if endpoint_classes else None
+            path_weight = get_request_weight(path, payload)
+        if endpoint_class:
+            self.__rate_limiter.acquire(self.PLATFORM_NAME, self.__rate_limit_key(endpoint_class), endpoint_class, path_weight)
 
         url = '%s%s' % (base_url, path)
 
         if auth:
-            payload["timestamp"] = self.__get_timestamp()
-            query_string = self.__query_string(payload)
             if self.api_key is None or self.api_secret is None:
                 raise Exception('Api_key or Api_secret missing')
-            signature = self.__generate_signature(query_string)
-            payload['signature'] = signature
-
-        params = {"url": url}
+            self.__sign(payload)
+
+        # Retries of the transport are charged as well, after a rate limit response penalized the bucket
+        def on_retry(response):
+            if response is not None:
+                self.__update_weights(path, response)
+            if endpoint_class:
+                self.__rate_limiter.acquire(self.PLATFORM_NAME, self.__rate_limit_key(endpoint_class), endpoint_class, path_weight)
+            if auth:
+                # The signed timestamp is only valid during 'recvWindow', the retry is signed again
+                self.__sign(payload)
+                return {"params": self.__query_string(payload)}
+
+        params = {"url": url, "on_retry": on_retry}
         if payload:
             params["params"] = self.__query_string(payload)
 
@@ -4541,10 +4622,26 @@ class Binance(CryptoConnector):
 
         self.__request_log(response)
 
+        self.__update_weights(path, response)
+
         parsed_response = self.__parse_response(response)
 
         return parsed_response
 
+    def __rate_limit_key(self, endpoint_class):
+        return self.api_key if WEIGHT_LIMITS[endpoint_class]["per_key"] else None
+
+    def __update_weights(self, path, response):
+        headers = response.headers
+        for endpoint_class in get_endpoint_classes(path):
+            key = self.__rate_limit_key(endpoint_class)
+            header = WEIGHT_LIMITS[endpoint_class]["header"]
+            if header in headers:
+                self.__rate_limiter.sync(self.PLATFORM_NAME, key, endpoint_class, int(headers[header]))
+            # 418 is returned instead of 429 once an IP keeps sending after being rate limited
+            if response.status_code in [418, 429] and "Retry-After" in headers:
+                self.__rate_limiter.penalize(self.PLATFORM_NAME, key, endpoint_class, float(headers["Retry-After"]))
+
     def _dispatch_request(self, http_method):
         return {
             "GET": self.session.get,
@@ -4557,11 +4654,6 @@ class Binance(CryptoConnector):
         status_code = response.status_code
         headers = response.headers
 
-        # Update weights
-        for header in self.__weight_limits.keys():
-            if header in headers:
-                self.__current_weights[header] = int(headers[header])
-
         if status_code != 200:
             if status_code == 429:
                 raise requests.exceptions.HTTPError("{} : Too Many Requests, need to wait {} s ==> headers : '{}'".format(status_code, response.headers["Retry-After"], response.headers))
@@ -4606,6 +4698,11 @@ class Binance(CryptoConnector):
     def __get_timestamp(self):
         return int(time.time() * 1000)
 
+    def __sign(self, payload):
+        payload.pop("signature", None)
+        payload["timestamp"] = self.__get_timestamp()
+        payload["signature"] = self.__generate_signature(self.__query_string(payload))
+
     def __generate_signature(self, data):
         hash = hmac.new(self.api_secret.encode("utf-8"), data.encode("utf-8"), hashlib.sha256)
         return hash.hexdigest()
@@ -4684,7 +4781,7 @@ class Binance(CryptoConnector):
 
     def __compose_spot_uniformized_symbol(self, symbol):
         #TODO: Find a way to differenciate spots and futures having the same exchange symbol
-        uniformized_products = [product for key, product in self.__products.items() if product["exchange_symbol"] == symbol]
+        uniformized_products = self.__products_by_exchange_symbol[symbol]
 
         if len(uniformized_products) > 1:
             uniformized_symbol = [product["symbol"] for product in uniformized_products if product["contract_type"] == "spot"][0]
@@ -4694,7 +4791,7 @@ class Binance(CryptoConnector):
 
     def __compose_future_uniformized_symbol(self, symbol):
         #TODO: Find a way to differenciate spots and futures having the same exchange symbol
-        uniformized_products = [product for key, product in self.__products.items() if product["exchange_symbol"] == symbol]
+        uniformized_products = self.__products_by_exchange_symbol[symbol]
 
         if len(uniformized_products) > 1:
             uniformized_symbol = [product["symbol"] for product in uniformized_products if product["contract_type"] == "perpetual_future"][0]
@@ -4842,8 +4939,7 @@ class Binance(CryptoConnector):
                 self.__spot_private_websocket.connect(self.urls["websocket"][BinanceEndpoints.SPOT]+f"/{self.__spot_listen_key}")
                 self.__spot_private_websocket.settimeout(1)
 
-                self.__spot_private_thread = StoppableThread(name="websocket_user_callback", target=self.__spot_private_websocket_callback)
-                self.__spot_private_thread.start()
+                self.__multiplexer.register(self.__spot_private_websocket, self.__frame_handler(self.__on_spot_private_message), self.__on_connection_closed)
         finally:
             self.__spot_auth_mutex.release()
 
@@ -4879,10 +4975,8 @@ class Binance(CryptoConnector):
             if self.__spot_auth_channel_number == 0:
                 self.__spot_unauth()
 
-                if self.__spot_private_thread:
-                    self.__spot_private_thread.stop()
-                    self.__spot_private_thread.join()
                 if self.__spot_private_websocket:
+                    self.__multiplexer.unregister(self.__spot_private_websocket)
                     self.__spot_private_websocket.close()
         finally:
             self.__spot_auth_mutex.release()
@@ -4903,8 +4997,7 @@ class Binance(CryptoConnector):
                 self.__future_private_websocket.connect(self.urls["websocket"][BinanceEndpoints.FUTURE]+f"/{self.__future_listen_key}")
                 self.__future_private_websocket.settimeout(1)
 
-                self.__future_private_thread = StoppableThread(name="websocket_user_callback", target=self.__future_private_websocket_callback)
-                self.__future_private_thread.start()
+                self.__multiplexer.register(self.__future_private_websocket, self.__frame_handler(self.__on_future_private_message), self.__on_connection_closed)
         finally:
             self.__future_auth_mutex.release()
 
@@ -4940,10 +5033,8 @@ class Binance(CryptoConnector):
             if self.__future_auth_channel_number == 0:
                 self.__future_unauth()
 
-                if self.__future_private_thread:
-                    self.__future_private_thread.stop()
-                    self.__future_private_thread.join()
                 if self.__future_private_websocket:
+                    self.__multiplexer.unregister(self.__future_private_websocket)
                     self.__future_private_websocket.close()
         finally:
             self.__future_auth_mutex.release()
@@ -4977,82 +5068,10 @@ class Binance(CryptoConnector):
 
         self.__ws_log("Reconnected", "RECONNECT")
 
-    def __spot_public_websocket_callback(self):
-        while not self.__spot_public_thread.is_stopped():
-            has_data = select.select([self.__spot_public_websocket], [], [], 1)
-            if has_data[0]:
-                try:
-                    op_code, frame = self.__spot_public_websocket.recv_data_frame()
-                except websocket._exceptions.WebSocketConnectionClosedException:
-                    log(f"[{self}][RECEIVE] Connection closed by remote host")
-                    self.__on_close()
-                    return
-                except websocket._exceptions.WebSocketTimeoutException:
-                    log(f"[{self}][RECEIVE] Read timeout")
-                    continue
-
-                if op_code == op_codes.OPCODE_CLOSE:
-                    self.__ws_log(f"Close frame", "RECEIVE")
-                    self.__on_close()
-                    return
-                elif op_code == op_codes.OPCODE_PING:
-                    self.__ws_log(f"Ping frame : Not supported yet", "RECEIVE")
-                elif op_code == op_codes.OPCODE_PONG:
-                    self.__ws_log(f"Pong frame : Not supported yet", "RECEIVE")
-                elif op_code == op_codes.OPCODE_CONT:
-                    self.__ws_log(f"Continuation frame : Not supported yet", "RECEIVE")
-                elif op_code == op_codes.OPCODE_BINARY:
-                    self.__ws_log(f"Binary frame : Not supported yet", "RECEIVE")
-                else:
-                    self.__on_spot_public_message(frame.data.decode("utf-8"))
-
-    def __future_public_websocket_callback(self):
-        while not self.__future_public_thread.is_stopped():
-            has_data = select.select([self.__future_public_websocket], [], [], 1)
-            if has_data[0]:
-
-                try:
-                    op_code, frame = self.__future_public_websocket.recv_data_frame()
-                except websocket._exceptions.WebSocketConnectionClosedException:
-                    log(f"[{self}][RECEIVE] Connection closed by remote host")
-                    self.__on_close()
-                    return
-                except websocket._exceptions.WebSocketTimeoutException:
-                    log(f"[{self}][RECEIVE] Read timeout")
-                    continue
-
-                if op_code == op_codes.OPCODE_CLOSE:
-                    self.__ws_log(f"Close frame", "RECEIVE")
-                    self.__on_close()
-                    return
-                elif op_code == op_codes.OPCODE_PING:
-                    self.__ws_log(f"Ping frame : Not supported yet", "RECEIVE")
-                elif op_code == op_codes.OPCODE_PONG:
-                    self.__ws_log(f"Pong frame : Not supported yet", "RECEIVE")
-                elif op_code == op_codes.OPCODE_CONT:
-                    self.__ws_log(f"Continuation frame : Not supported yet", "RECEIVE")
-                elif op_code == op_codes.OPCODE_BINARY:
-                    self.__ws_log(f"Binary frame : Not supported yet", "RECEIVE")
-                else:
-                    self.__on_future_public_message(frame.data.decode("utf-8"))
-
-    def __spot_private_websocket_callback(self):
-        while not self.__spot_private_thread.is_stopped():
-
-            try:
-                op_code, frame = self.__spot_private_websocket.recv_data_frame()
-            except websocket._exceptions.WebSocketTimeoutException:
-                continue
-            except websocket._exceptions.WebSocketConnectionClosedException:
-                log(f"[{self}][RECEIVE] Connection closed by remote host")
-                self.__on_close()
-                return
-
-            if op_code == op_codes.OPCODE_CLOSE:
-                self.__ws_log(f"Close frame", "RECEIVE")
-                self.__on_close()
-                return
-            elif op_code == op_codes.OPCODE_PING:
+    def __frame_handler(self, on_message):
+        # Called by the multiplexer workers, in reception order for a given websocket
+        def on_frame(websocket, op_code, frame):
+            if op_code == op_codes.OPCODE_PING:
                 self.__ws_log(f"Ping frame : Not supported yet", "RECEIVE")
             elif op_code == op_codes.OPCODE_PONG:
                 self.__ws_log(f"Pong frame : Not supported yet", "RECEIVE")
@@ -5061,34 +5080,12 @@ class Binance(CryptoConnector):
             elif op_code == op_codes.OPCODE_BINARY:
                 self.__ws_log(f"Binary frame : Not supported yet", "RECEIVE")
             else:
-                self.__on_spot_private_message(frame.data.decode("utf-8"))
-
-    def __future_private_websocket_callback(self):
-        while not self.__future_private_thread.is_stopped():
+                on_message(frame.data.decode("utf-8"))
+        return on_frame
 
-            try:
-                op_code, frame = self.__future_private_websocket.recv_data_frame()
-            except websocket._exceptions.WebSocketTimeoutException:
-                continue
-            except websocket._exceptions.WebSocketConnectionClosedException:
-                log(f"[{self}][RECEIVE] Connection closed by remote host")
-                self.__on_close()
-                return
-
-            if op_code == op_codes.OPCODE_CLOSE:
-                self.__ws_log(f"Close frame", "RECEIVE")
-                self.__on_close()
-                return
-            elif op_code == op_codes.OPCODE_PING:
-                self.__ws_log(f"Ping frame : Not supported yet", "RECEIVE")
-            elif op_code == op_codes.OPCODE_PONG:
-                self.__ws_log(f"Pong frame : Not supported yet", "RECEIVE")
-            elif op_code == op_codes.OPCODE_CONT:
-                self.__ws_log(f"Continuation frame : Not supported yet", "RECEIVE")
-            elif op_code == op_codes.OPCODE_BINARY:
-                self.__ws_log(f"Binary frame : Not supported yet", "RECEIVE")
-            else:
-                self.__on_future_private_message(frame.data.decode("utf-8"))
+    def __on_connection_closed(self, websocket):
+        log(f"[{self}][RECEIVE] Connection closed on {websocket}")
+        self.__on_close()
 
     def __on_close(self):
         self.__connection_lost = True
@@ -5113,6 +5110,94 @@ class Binance(CryptoConnector):
         if self.__connection_lost:
             self.__connection_aborted = True
 
+    def __init_spot_orderbook(self, symbol, depth):
+        self.__spot_orderbooks_depth[symbol] = depth
+        self.__spot_orderbooks[symbol] = OrderBook(symbol)
+        self.__spot_orderbooks_sync[symbol] = {
+            "mutex": threading.Lock(),
+            # Update id the local book is aligned on, None until a snapshot is loaded
+            "last_update_id": None,
+            "buffer": collections.deque(maxlen=self.__spot_orderbook_buffer_size),
+            "loading": False,
+            "gaps": 0,
+            "resyncs": 0,
+            "snapshots": 0,
+        }
+
+    def __resync_spot_orderbook(self, symbol, gap=False):
+        state = self.__spot_orderbooks_sync.get(symbol)
+        if state is None:
+            return
+        if gap:
+            # Called from the websocket thread with the symbol mutex held
+            state["resyncs"] += 1
+            state["last_update_id"] = None
+            state["buffer"].clear()
+            if state["loading"]:
+                return
+            state["loading"] = True
+        else:
+            with state["mutex"]:
+                if state["loading"]:
+                    return
+                state["loading"] = True
+        threading.Thread(name=f"binance_orderbook_sync_{symbol}", target=self.__load_spot_orderbook_snapshot, args=[symbol, state], daemon=True).start()
+
+    def __load_spot_orderbook_snapshot(self, symbol, state):
+        exchange_symbol = self.__products[symbol]["exchange_symbol"]
+        tries = 0
+        while self.__spot_orderbooks_sync.get(symbol) is state:
+            try:
+                snapshot = self.__api_spot_get_orderbook(exchange_symbol, self.__spot_orderbook_snapshot_depth)
+            except Exception as e:
+                log(f"[{self}][ERROR] Unable to load '{symbol}' orderbook snapshot : {type(e).__name__} - {e}")
+                tries += 1
+                time.sleep(min(2**tries, 30))
+                continue
+
+            with state["mutex"]:
+                state["snapshots"] += 1
+                last_update_id = snapshot["lastUpdateId"]
+
+                # The snapshot is older than the first buffered update, updates in between are missing
+                if state["buffer"] and state["buffer"][0]["U"] > last_update_id + 1:
+                    self.__ws_log(f"'{symbol}' snapshot {last_update_id} older than buffered update {state['buffer'][0]['U']}", "ORDERBOOK_SYNC")
+                else:
+                    self.__spot_orderbooks[symbol].set_snapshot(buy=snapshot["bids"], sell=snapshot["asks"])
+                    state["last_update_id"] = last_update_id
+                    state["loading"] = False
+                    buffer = list(state["buffer"])
+                    state["buffer"].clear()
+                    for data in buffer:
+                        if not self.__apply_spot_depth_update(symbol, state, data):
+                            break
+                    return
+            time.sleep(0.5)
+
+    def __apply_spot_depth_update(self, symbol, state, data):
+        # Called with the symbol mutex held, returns False if the book has to be resynchronized
+        last_update_id = state["last_update_id"]
+
+        # Already contained into the snapshot
+        if data["u"] <= last_update_id:
+            return True
+
+        # Updates shall follow each other, the first one after the snapshot shall contain 'lastUpdateId' + 1
+        if data["U"] > last_update_id + 1:
+            state["gaps"] += 1
+            log(f"[{self}][WARNING] Gap into '{symbol}' depth updates (expected {last_update_id + 1}, received {data['U']}), resynchronizing orderbook")
+            self.__resync_spot_orderbook(symbol, gap=True)
+            # First update to replay on the new snapshot
+            state["buffer"].append(data)
+            return False
+
+        # A size of 0 removes the level
+        orderbook = self.__spot_orderbooks[symbol]
+        orderbook.update_many("buy", data["b"])
+        orderbook.update_many("sell", data["a"])
+        state["last_update_id"] = data["u"]
+        return True
+
     def __on_spot_public_message(self, message):
         self.__ws_log(message, "RECEIVE")
         event = ""
@@ -5142,96 +5227,26 @@ class Binance(CryptoConnector):
             elif event == "depthUpdate":
                 symbol = self.__compose_spot_uniformized_symbol(data["s"])
 
-                if symbol not in self.__spot_orderbooks:
-                    self.__spot_orderbooks[symbol] = {
-                        "symbol": symbol,
-                        "buy": {},
-                        "sell": {},
-                    }
-
-                for order in data["b"]:
-                    price = float(order[0])
-                    size = float(order[1])
-
-                    # Delete if size is 0
-                    if size == 0:
-                        if price in self.__spot_orderbooks[symbol]["buy"]:
-                            #print(f"-- BUY {order} DELETE")
-                            del self.__spot_orderbooks[symbol]["buy"][price]
-                    else:
-                        #print(f"-- BUY {order} UPDATE")
-                        self.__spot_orderbooks[symbol]["buy"][price] = size
-
-                for order in data["a"]:
-                    price = float(order[0])
-                    size = float(order[1])
-
-                    # Delete if size is 0
-                    if size == 0:
-                        if price in self.__spot_orderbooks[symbol]["sell"]:
-                            #print(f"-- SELL {order} DELETE")
-                            del self.__spot_orderbooks[symbol]["sell"][price]
-                    else:
-                        #print(f"-- SELL {order} UPDATE")
-                        self.__spot_orderbooks[symbol]["sell"][price] = size
-                """
-                for order in data["b"]:
-                    found = False
-                    index = None
-                    price = float(order[0])
-                    size = float(order[1])
-                    # Update size if price exists
-                    for idx, spot_order in enumerate(self.__spot_orderbooks[symbol]["buy"]):
-                        if spot_order["price"] == price:
-                            print(f"-- BUY {order} UPDATE")
-                            self.__spot_orderbooks[symbol]["buy"][idx]["size"] = size
-                            index = idx
-                            found = True
-                            break
-
-                    # Add if price doesn't exist yet
-                    if not found:
-                        print(f"-- BUY {order} APPEND")
-                        order_refactored = {}
-                        order_refactored["price"] = price
-                        order_refactored["size"] = size
-                        self.__spot_orderbooks[symbol]["buy"].append(order_refactored)
-                    # Remove if size is 0
-                    elif size == 0 and index:
-                        print(f"-- BUY {order} DELETE")
-                        del self.__spot_orderbooks[symbol]["buy"][index]
-
-                for order in data["a"]:
-                    found = False
-                    index = None
-                    price = float(order[0])
-                    size = float(order[1])
-                    # Update size if price exists
-                    for idx, spot_order in enumerate(self.__spot_orderbooks[symbol]["sell"]):
-                        if spot_order["price"] == price:
-                            print(f"-- SELL {order} UPDATE")
-                            self.__spot_orderbooks[symbol]["sell"][idx]["size"] = size
-                            index = idx
-                            found = True
-                            break
+                # Late update of an unsubscribed symbol
+                state = self.__spot_orderbooks_sync.get(symbol)
+                orderbook = self.__spot_orderbooks.get(symbol)
+                if state is None or orderbook is None:
+                    return
 
-                    # Add if price doesn't exist yet
-                    if not found:
-                        print(f"-- SELL {order} APPEND")
-                        order_refactored = {}
-                        order_refactored["price"] = price
-                        order_refactored["size"] = size
-                        self.__spot_orderbooks[symbol]["sell"].append(order_refactored)
-                    # Remove if size is 0
-                    elif size == 0 and index:
-                        print(f"-- SELL {order} DELETE")
-                        del self.__spot_orderbooks[symbol]["sell"][index]
-                """
+                with state["mutex"]:
+                    # No snapshot yet, keep the update to replay it once the snapshot is loaded
+                    if state["last_update_id"] is None:
+                        state["buffer"].append(data)
+                        return
+                    if not self.__apply_spot_depth_update(symbol, state, data):
+                        return
 
+                depth = self.__spot_orderbooks_depth.get(symbol)
                 data_refactored = {
                     "symbol": symbol,
-                    "buy": dict(sorted(self.__spot_orderbooks[symbol]["buy"].items(), reverse=True)),
-                    "sell": dict(sorted(self.__spot_orderbooks[symbol]["sell"].items(), reverse=False)),
+                    "buy": dict(orderbook.top("buy", depth)),
+                    "sell": dict(orderbook.top("sell", depth)),
+                    "timestamp": data["E"],
                 }
             else:
                 data_refactored = data
@@ -5239,7 +5254,10 @@ class Binance(CryptoConnector):
         if event in self.__public_callbacks:
             if symbol in self.__public_callbacks[event] and self.__public_callbacks[event][symbol]["callback"]:
                 try:
-                    self.__public_callbacks[event][symbol]["callback"](self, copy.deepcopy(data_refactored))
+                    # Orderbook sides are built for this callback only, no need to copy them
+                    if event != "depthUpdate":
+                        data_refactored = copy.deepcopy(data_refactored)
+                    self.__public_callbacks[event][symbol]["callback"](self, data_refactored)
                 except Exception as e:
                     log(f"[{self}] An exception occured into callback with input data : '{data_refactored}'\n{type(e).__name__} : {e}\n{format_traceback(e.__traceback__)}")
 
@@ -5259,6 +5277,7 @@ class Binance(CryptoConnector):
                     "symbol": symbol,
                     "buy": [],
                     "sell": [],
+                    "timestamp": data.get("E"),
                 }
 
                 for order in data["b"]:
@@ -0,0 +1,172 @@
+from connectors.crypto.connector.common.async_connector import AsyncCryptoConnector, get_session_pool
+from connectors.crypto.connector.exchanges.binance import Binance, BinanceEndpoints, WEIGHT_LIMITS, get_endpoint_classes, get_request_weight
+from connectors.crypto.common.rate_limiter import RateLimiter
+from connectors.crypto.exceptions import *
+import requests
+import asyncio
+
+class AsyncBinance(AsyncCryptoConnector):
+    PLATFORM_ID = 1
+    PLATFORM_NAME = "Binance"
+
+    def __init__(self, testnet=False, session_pool=None):
+        self.testing = testnet
+        self.session_pool = session_pool if session_pool else get_session_pool()
+
+        # Product catalog is parsed by the synchronous connector so that both return the same products
+        self.__connector = Binance("", "", testnet=testnet)
+        self.urls = self.__connector.urls
+        # Weight limits are configured by the synchronous connector, buckets are shared with it
+        self.__rate_limiter = RateLimiter()
+        self.__products = {}
+        self.__products_lock = None
+
+    async def get_products(self, reload=False):
+        if not self.__products or reload:
+            if self.__products_lock is None:
+                self.__products_lock = asyncio.Lock()
+            async with self.__products_lock:
+                if not self.__products or reload:
+                    loop = asyncio.get_running_loop()
+                    self.__products = await loop.run_in_executor(None, self.__connector.get_products, reload)
+        return self.__products
+
+    async def get_product(self, symbol):
+        products = await self.get_products()
+        if symbol not in products:
+            raise UnknownProductSymbolError(f"Unknown product symbol '{symbol}'")
+        return products[symbol]
+
+    async def get_orderbook(self, symbol, depth=None):
+        product = await self.get_product(symbol)
+        exchange_symbol = product["exchange_symbol"]
+
+        if product["contract_type"] == "spot":
+            orderbook = await self.__api_spot_get_orderbook(exchange_symbol, depth)
+        elif product["contract_type"] in ["future", "perpetual_future"]:
+            orderbook = await self.__api_future_get_orderbook(exchange_symbol)
+        else:
+            raise UnknownProductSymbolError(f"Unknown product symbol '{symbol}'")
+
+        return {
+            "symbol": symbol,
+            "exchange_id": product["exchange_id"],
+            "exchange_symbol": exchange_symbol,
+            "buy": [{"price": float(order[0]), "size": float(order[1])} for order in orderbook["bids"]],
+            "sell": [{"price": float(order[0]), "size": float(order[1])} for order in orderbook["asks"]],
+        }
+
+    async def get_spot_price(self, symbol):
+        product = await self.get_product(symbol)
+
+        if product["contract_type"] == "spot":
+            data = await self.__api_spot_get_spot_price(product["exchange_symbol"])
+        elif product["contract_type"] in ["future", "perpetual_future"]:
+            data = await self.__api_spot_get_spot_price(product["base_asset_symbol"])
+        else:
+            raise UnknownProductSymbolError(f"Unknown product symbol '{symbol}'")
+
+        return {
+            "symbol": symbol,
+            "exchange_id": product["exchange_id"],
+            "exchange_symbol": product["exchange_symbol"],
+            "spot_price": float(data["price"]),
+        }
+
+    async def get_mark_price(self, symbol):
+        products = await self.get_products()
+        product = products.get(symbol)
+
+        if product and product["contract_type"] == "spot":
+            data = await self.__api_spot_get_mark_price(product["exchange_symbol"])
+            mark_price = float(data["price"])
+        elif product and product["contract_type"] in ["future", "perpetual_future"]:
+            data = await self.__api_future_get_mark_price(product["exchange_symbol"])
+            mark_price = float(data["markPrice"])
+        else:
+            # Assets and staking products are priced from several products, left to the synchronous connector
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self.__connector.get_mark_price, symbol)
+
+        return {
+            "symbol": symbol,
+            "exchange_id": product["exchange_id"],
+            "exchange_symbol": product["exchange_symbol"],
+            "mark_price": mark_price,
+        }
+
+    async def __api_spot_get_orderbook(self, symbol, depth=None):
+        url = self.urls["api"][BinanceEndpoints.SPOT]
+        payload = {
+            "symbol": str(symbol),
+        }
+        if depth:
+            payload["limit"] = depth
+        response = await self.__request("GET", url, "/api/v3/depth", payload)
+        return response
+
+    async def __api_future_get_orderbook(self, symbol):
+        url = self.urls["api"][BinanceEndpoints.FUTURE]
+        response = await self.__request("GET", url, "/fapi/v1/depth", payload={
+            "symbol": str(symbol)
+        })
+        return response
+
+    async def __api_spot_get_spot_price(self, symbol):
+        url = self.urls["api"][BinanceEndpoints.SPOT]
+        response = await self.__request("GET", url, "/api/v3/ticker/price", payload={
+            "symbol": symbol,
+        })
+        return response
+
+    async def __api_spot_get_mark_price(self, symbol):
+        url = self.urls["api"][BinanceEndpoints.SPOT]
+        response = await self.__request("GET", url, "/api/v3/avgPrice", payload={
+            "symbol": str(symbol)
+        })
+        return response
+
+    async def __api_future_get_mark_price(self, symbol):
+        url = self.urls["api"][BinanceEndpoints.FUTURE]
+        response = await self.__request("GET", url, "/fapi/v1/premiumIndex", payload={
+            "symbol": str(symbol)
+        })
+        return response
+
+    async def __request(self, method, base_url, path, payload=None):
+        # Only public endpoints are requested, their limits are per IP
+        endpoint_classes = get_endpoint_classes(path)
+        if endpoint_classes:
+            await self.__rate_limiter.acquire_async(self.PLATFORM_NAME, None, endpoint_classes[0], get_request_weight(path, payload))
+
+        url = '%s%s' % (base_url, path)
+        session = self.session_pool.get_session(url)
+        async with session.request(method, url, params=payload) as response:
+            self.__update_weights(path, response)
+            return await self.__parse_response(response)
+
+    def __update_weights(self, path, response):
+        headers = response.headers
+        for endpoint_class in get_endpoint_classes(path):
+            header = WEIGHT_LIMITS[endpoint_class]["header"]
+            if header in headers:
+                self.__rate_limiter.sync(self.PLATFORM_NAME, None, endpoint_class, int(headers[header]))
+            # 418 is returned instead of 429 once an IP keeps sending after being rate limited
+            if response.status in [418, 429] and "Retry-After" in headers:
+                self.__rate_limiter.penalize(self.PLATFORM_NAME, None, endpoint_class, float(headers["Retry-After"]))
+
+    async def __parse_response(self, response):
+        status_code = response.status
+        if status_code != 200:
+            if status_code == 429:
+                raise requests.exceptions.HTTPError("{} : Too Many Requests, need to wait {} s ==> headers : '{}'".format(status_code, response.headers.get("Retry-After"), response.headers))
+            if status_code == 404:
+                raise requests.exceptions.HTTPError("{} : Not Found".format(status_code))
+            try:
+                response_json = await response.json(content_type=None)
+            except:
+                raise requests.exceptions.HTTPError(status_code)
+            if "Invalid symbol." in response_json["msg"]:
+                raise InvalidSymbolError
+            raise requests.exceptions.HTTPError("{} : {}".format(status_code, response_json["msg"]))
+        return await response.json(content_type=None)
@@ -3,6 +3,7 @@ from connectors.crypto.exceptions import *
 from urllib.parse import urlencode
 import requests
 from connectors.crypto.connector.core import is_stable_coin, is_fiat
+from connectors.crypto.connector.common.transport import get_transport
 import datetime
 import hashlib
 import hmac
@@ -20,7 +21,7 @@ class Bitmex(CryptoConnector):
         self.passphrase = passphrase
         self.testing = testnet
         self.strategy = strategy
-        self.session = requests.Session()
+        self.session = get_transport().session()
 
         if self.testing:
             self.base_url = "https://testnet.bitmex.com"
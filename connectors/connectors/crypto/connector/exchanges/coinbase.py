@@ -5,6 +5,7 @@ from connectors.crypto.connector.forex import Forex
 from connectors.crypto.singleton import Singleton
 from connectors.crypto.common.logger import log
 from connectors.crypto.exceptions import *
+from connectors.crypto.connector.common.transport import get_transport
 from urllib.parse import urlencode
 from decimal import Decimal
 import pandas as pd
@@ -60,7 +61,7 @@ class Coinbase:
         self.strategy = strategy
         self.base_currency = base_currency
         self.database = strategy.database if strategy else None
-        self.session = requests.Session()
+        self.session = get_transport().session()
         self.brokerage_fees_profile_id = '3655dc39-8a33-4a4c-a012-da594a2031f2'
         self.tilvest_brokering_fees = 0.00125
 
@@ -1,10 +1,14 @@
 from connectors.threading.Threads import StoppableThread, format_traceback
+from connectors.threading.Multiplexer import get_multiplexer
 from connectors.crypto.connector.common.connector import CryptoConnector
 import connectors.crypto.connector.common.websocket_codes as op_codes
 from connectors.crypto.connector.core import is_stable_coin, is_fiat
 from connectors.crypto.connector.exchanges.coinbase import CbForex
+from connectors.crypto.common.rate_limiter import RateLimiter
+from connectors.crypto.common.product_cache import ProductCatalogCache
 from connectors.crypto.common.logger import log
 from connectors.crypto.exceptions import *
+from connectors.crypto.connector.common.transport import get_transport
 from decimal import Decimal
 import pandas as pd
 import websocket
@@ -13,7 +17,6 @@ import requests
 import datetime
 import hashlib
 import urllib
-import select
 import queue
 import time
 import hmac
@@ -36,7 +39,7 @@ class DeltaExchange(CryptoConnector):
         self.strategy = strategy
         self.base_currency = base_currency
         self.database = strategy.database if strategy else None
-        self.session = requests.Session()
+        self.session = get_transport().session()
 
         if self.testing:
             self.base_url = "https://testnet-api.delta.exchange"
@@ -50,8 +53,15 @@ class DeltaExchange(CryptoConnector):
         self.option_fees = 0.0005
         self.future_fees = 0.001
 
+        # Private quota is per key, public endpoints are limited per IP
+        self.__rate_limiter = RateLimiter()
+        self.__rate_limiter.configure(self.PLATFORM_NAME, "private", 10000, 300)
+        self.__rate_limiter.configure(self.PLATFORM_NAME, "public", 10000, 300)
+
         self.__assets = {}
+        self.__product_cache = ProductCatalogCache()
         self.__products = {}
+        self.__products_by_exchange_symbol = {}
         self.__orderbooks = {}
         self.__ignored_assets = ["XRP"]
 
@@ -71,7 +81,8 @@ class DeltaExchange(CryptoConnector):
         self.__subscribe_mutex = threading.Lock()
 
         self.__heartbeat_timeout = 35
-        self.__receive_thread = None
+        # Websockets are read by the process-wide multiplexer
+        self.__multiplexer = get_multiplexer()
         self.__connection_lost = False
         self.__connection_aborted = False
         self.__reconnect_timeout = 30
@@ -299,80 +310,84 @@ class DeltaExchange(CryptoConnector):
             return self.__assets
 
     def get_products(self, reload=False):
-        if not self.__products or reload:
-            data = {}
-            products = self.__api_get_products_redacted()
-            for product in products:
-
-                generated_symbol = self.__compose_product_symbol(product)
-
-                product_refactored = {
-                    "symbol": generated_symbol,
-                    "exchange_id": product["id"],
-                    "exchange_symbol": product["symbol"],
-                    "contract_size": None,
-                    "strike_price": None,
-                    "settlement_date": None,
-                    "settlement_time": None,
-                    "duration": None,
-                    "precision": {
-                        "amount": None,
-                        "price": None,
-                        "notional": None,
-                    },
-                    "limits": {
-                        "amount": {
-                            "min": float(product["tick_size"]),
-                            "max": None},
-                        "price": {
-                            "min": None,
-                            "max": None},
-                        "notional": {
-                            "min": None,
-                            "max": None},
-                    },
-                }
+        # Catalog is shared with every Delta Exchange connector of the process
+        catalog = self.__product_cache.get(self.PLATFORM_ID, self.testing, self.__load_products, reload=reload)
+        if catalog is not self.__products:
+            self.__products = catalog
+            # Reverse index used to resolve websocket messages
+            self.__products_by_exchange_symbol = {product["exchange_symbol"]: product for product in self.__products.values()}
+        return self.__products
+
+    def __load_products(self):
+        data = {}
+        products = self.__api_get_products_redacted()
+        for product in products:
+
+            generated_symbol = self.__compose_product_symbol(product)
+
+            product_refactored = {
+                "symbol": generated_symbol,
+                "exchange_id": product["id"],
+                "exchange_symbol": product["symbol"],
+                "contract_size": None,
+                "strike_price": None,
+                "settlement_date": None,
+                "settlement_time": None,
+                "duration": None,
+                "precision": {
+                    "amount": None,
+                    "price": None,
+                    "notional": None,
+                },
+                "limits": {
+                    "amount": {
+                        "min": float(product["tick_size"]),
+                        "max": None},
+                    "price": {
+                        "min": None,
+                        "max": None},
+                    "notional": {
+                        "min": None,
+                        "max": None},
+                },
+            }
 
-                strike_price = product["strike_price"]
-                settlement_time = product["settlement_time"]
-                settlement_date = settlement_time[:10] if settlement_time else None
-                duration = (datetime.datetime.strptime(settlement_date, "%Y-%m-%d").date() - datetime.date.today()).days if settlement_date else None
-
-                if not (contract_type := self.__compose_contract_type(product)):
-                    # Do not handle this product types
-                    continue
-                product_refactored["contract_type"] = contract_type
-                product_refactored["contract_size"] = float(product["contract_value"])
-                product_refactored["strike_price"] = float(strike_price) if strike_price else None
-                product_refactored["settlement_date"] = settlement_date
-                product_refactored["settlement_time"] = settlement_time
-                product_refactored["duration"] = duration
-
-                if "underlying_asset" not in product:
-                    if not self.__assets:
-                        self.get_assets()
-                    product_refactored["base_asset_id"] = product["underlying_asset_id"]
-                    product_refactored["base_asset_symbol"] = [asset["symbol"] for asset in self.__assets.values() if asset["id"] == product["underlying_asset_id"]][0]
+            strike_price = product["strike_price"]
+            settlement_time = product["settlement_time"]
+            settlement_date = settlement_time[:10] if settlement_time else None
+            duration = (datetime.datetime.strptime(settlement_date, "%Y-%m-%d").date() - datetime.date.today()).days if settlement_date else None
 
-                else:
-                    product_refactored["base_asset_id"] = product["underlying_asset"]["id"]
-                    product_refactored["base_asset_symbol"] = product["underlying_asset"]["symbol"]
-
-                if "quoting_asset" not in product:
-                    if not self.__assets:
-                        self.get_assets()
-                    product_refactored["quote_asset_id"] = product["quoting_asset_id"]
-                    product_refactored["quote_asset_symbol"] = [asset["symbol"] for asset in self.__assets.values() if asset["id"] == product["quoting_asset_id"]][0]
-                else:
-                    product_refactored["quote_asset_id"] = product["quoting_asset"]["id"]
-                    product_refactored["quote_asset_symbol"] = product["quoting_asset"]["symbol"]
+            if not (contract_type := self.__compose_contract_type(product)):
+                # Do not handle this product types
+                continue
+            product_refactored["contract_type"] = contract_type
+            product_refactored["contract_size"] = float(product["contract_value"])
+            product_refactored["strike_price"] = float(strike_price) if strike_price else None
+            product_refactored["settlement_date"] = settlement_date
+            product_refactored["settlement_time"] = settlement_time
+            product_refactored["duration"] = duration
+
+            if "underlying_asset" not in product:
+                if not self.__assets:
+                    self.get_assets()
+                product_refactored["base_asset_id"] = product["underlying_asset_id"]
+                product_refactored["base_asset_symbol"] = [asset["symbol"] for asset in self.__assets.values() if asset["id"] == product["underlying_asset_id"]][0]
 
-                data[generated_symbol] = product_refactored
-                self.__products[generated_symbol] = product_refactored
+            else:
+                product_refactored["base_asset_id"] = product["underlying_asset"]["id"]
+                product_refactored["base_asset_symbol"] = product["underlying_asset"]["symbol"]
+
+            if "quoting_asset" not in product:
+                if not self.__assets:
+                    self.get_assets()
+                product_refactored["quote_asset_id"] = product["quoting_asset_id"]
+                product_refactored["quote_asset_symbol"] = [asset["symbol"] for asset in self.__assets.values() if asset["id"] == product["quoting_asset_id"]][0]
+            else:
+                product_refactored["quote_asset_id"] = product["quoting_asset"]["id"]
+                product_refactored["quote_asset_symbol"] = product["quoting_asset"]["symbol"]
 
-            return data
-        else:
-            return self.__products
+            data[generated_symbol] = product_refactored
+        return data
 
     def get_product(self, symbol):
         if not self.__products:
@@ -1627,11 +1642,9 @@ class DeltaExchange(CryptoConnector):
 
         if disconnect_all:
 
-            self.__receive_thread.stop()
-            self.__receive_thread.join()
-
             with self.__websocket_mutex:
                 for websocket in self.__websockets:
+                    self.__multiplexer.unregister(websocket)
                     websocket.close()
                 self.__websockets = []
 
@@ -2062,7 +2075,7 @@ class DeltaExchange(CryptoConnector):
 
         return price
 
-    def __request(self, method, path, payload=None, query=None, auth=False, base_url=None, headers=None, retry=3, parse="json", paginated=False):
+    def __request(self, method, path, payload=None, query=None, auth=False, base_url=None, headers=None, parse="json", paginated=False):
         if base_url is None:
             base_url = self.base_url
         if not headers:
@@ -2083,50 +2096,63 @@ class DeltaExchange(CryptoConnector):
 
             signature_timestamp = timestamp
 
-        while retry > 0:
-            try:
-                bef_request_timestamp = self.__get_timestamp()
-                response = self.session.request(method, url, data=body_string, params=query, timeout=(3, 60), headers=headers)
-                self.__request_log(response)
-                af_request_timestamp = self.__get_timestamp()
-                parsed_response = self.__parse_response(response, parse, paginated)
-                break
-            except OrderNotFoundError as e:
-                # Set exception's order id
-                e.order_id = payload["id"] if "id" in payload else None
-                raise e
-            except InternalServerError:
-                # If placing order
-                if method == "POST" and path == "/v2/orders":
-                    log(f"[{self}] ERROR 500 on place_order")
-                    # Break if order placed
-                    if self.__check_order_placed(payload["product_id"], payload["side"], payload["size"], payload["order_type"]):
-                        break
-                retry -= 1
-            #except (UnauthorizedError, requests.exceptions.ReadTimeout) as e:
-            except UnauthorizedError as e:
-                print("#################################################################")
-                print(f"Method : {method}")
-                print("#################################################################")
-                print(f"URL : {url}")
-                print("#################################################################")
-                print(f"Data : {body_string}")
-                print("#################################################################")
-                print(f"Query : {query}")
-                print("#################################################################")
-                print(f"Headers : {headers}")
-                print("#################################################################")
-                #print(f"Signature timestamp : {signature_timestamp}")
-                print(f"Before request timestamp : {bef_request_timestamp}")
-                print(f"After request timestamp : {af_request_timestamp}")
-                print("#################################################################")
-                raise e
+        endpoint_class = "private" if auth else "public"
+        rate_limit_key = self.api_key if auth else None
 
-        if retry == 0:
-            raise InternalServerError
+        # Idempotent requests are retried by the transport, each retry waits for the rate limiter
+        def on_retry(response):
+            if response is not None:
+                self.__update_rate_limit(response, rate_limit_key, endpoint_class)
+            self.__rate_limiter.acquire(self.PLATFORM_NAME, rate_limit_key, endpoint_class)
+            if auth:
+                # Signatures expire after a few seconds, the headers are sent again with a new one
+                timestamp = self.__get_timestamp()
+                headers['timestamp'] = timestamp
+                headers['signature'] = self.__generate_signature(method + timestamp + path + query_string + body_string)
+
+        try:
+            self.__rate_limiter.acquire(self.PLATFORM_NAME, rate_limit_key, endpoint_class)
+            bef_request_timestamp = self.__get_timestamp()
+            response = self.session.request(method, url, data=body_string, params=query, timeout=(3, 60), headers=headers, on_retry=on_retry)
+            self.__request_log(response)
+            self.__update_rate_limit(response, rate_limit_key, endpoint_class)
+            af_request_timestamp = self.__get_timestamp()
+            parsed_response = self.__parse_response(response, parse, paginated)
+        except OrderNotFoundError as e:
+            # Set exception's order id
+            e.order_id = payload["id"] if "id" in payload else None
+            raise e
+        except InternalServerError:
+            # Order placements are never sent twice, the order may have been placed anyway
+            if method == "POST" and path == "/v2/orders":
+                log(f"[{self}] ERROR 500 on place_order")
+            raise
+        #except (UnauthorizedError, requests.exceptions.ReadTimeout) as e:
+        except UnauthorizedError as e:
+            print("#################################################################")
+            print(f"Method : {method}")
+            print("#################################################################")
+            print(f"URL : {url}")
+            print("#################################################################")
+            print(f"Data : {body_string}")
+            print("#################################################################")
+            print(f"Query : {query}")
+            print("#################################################################")
+            print(f"Headers : {headers}")
+            print("#################################################################")
+            #print(f"Signature timestamp : {signature_timestamp}")
+            print(f"Before request timestamp : {bef_request_timestamp}")
+            print(f"After request timestamp : {af_request_timestamp}")
+            print("#################################################################")
+            raise e
 
         return parsed_response
 
+    def __update_rate_limit(self, response, rate_limit_key, endpoint_class):
+        if response.status_code == 429 and "X-RATE-LIMIT-RESET" in response.headers:
+            # Reset is given in milliseconds
+            self.__rate_limiter.penalize(self.PLATFORM_NAME, rate_limit_key, endpoint_class, int(response.headers["X-RATE-LIMIT-RESET"])/1000)
+
     def __parse_response(self, response, parse="json", paginated=False):
         status_code = response.status_code
         if status_code != 200:
@@ -2239,25 +2265,6 @@ class DeltaExchange(CryptoConnector):
                 query_strings.append(key + '=' + urllib.parse.quote_plus(str(value)))
             return '?' + '&'.join(query_strings)
 
-    def __check_order_placed(self, product_id, side, size, order_type):
-        orders = self.get_order_history()
-
-        if len(orders) == 0:
-            return False
-
-        # Find last API order
-        for order in orders:
-            if "source" in order["meta_data"] and order["meta_data"]["source"] == "api":
-                last_order = order
-                break
-
-        if (last_order["product_id"] == product_id and
-            last_order["side"] == side and
-            last_order["size"] == size and
-            last_order["order_type"] == order_type):
-            return True
-        return False
-
     def __compose_order_type(self, response):
         order_type = "unknown"
         if (response["stop_order_type"] == None and
@@ -2393,10 +2400,8 @@ class DeltaExchange(CryptoConnector):
                 # Connect websocket
                 ws.connect(self.ws_url)
 
-                # Launch reception thread
-                if not self.__receive_thread:
-                    self.__receive_thread = StoppableThread(name="Thread-DeltaExchange-websocket_callback", target=self.__websocket_callback)
-                    self.__receive_thread.start()
+                # Start reception
+                self.__multiplexer.register(ws, self.__on_frame, self.__on_connection_closed)
 
                 # Tell server to enable heartbeat
                 self.__heartbeat(ws)
@@ -2433,18 +2438,11 @@ class DeltaExchange(CryptoConnector):
             self.__websockets.remove(websocket)
 
             # Close websocket connection
+            self.__multiplexer.unregister(websocket)
             websocket.close()
 
             self.__websocket_number -= 1
 
-            # Stop reception thread if no websocket anymore
-            if self.__websocket_number == 0:
-                self.__receive_thread.stop()
-                log(f"[{self}][DELETE] Joining reception thread")
-                #self.__receive_thread.join()
-                log(f"[{self}][DELETE] Reception thread joined")
-                self.__receive_thread = None
-
         self.__ws_log(f"Websocket removed '{websocket}'.", "DELETE")
 
     def __subscribe_dispatcher(self, channel, symbols=None, auth=False, callback=None):
@@ -2740,7 +2738,9 @@ class DeltaExchange(CryptoConnector):
 
         # Connect websocket
         with self.__websocket_mutex:
+            self.__multiplexer.unregister(websocket)
             websocket.connect(self.ws_url)
+            self.__multiplexer.register(websocket, self.__on_frame, self.__on_connection_closed)
             self.__heartbeat(websocket)
 
         # Set websocket handler
@@ -2792,41 +2792,23 @@ class DeltaExchange(CryptoConnector):
         if connection_lost:
             self.__connection_aborted = True
 
-    def __websocket_callback(self):
-        while not self.__receive_thread.is_stopped():
-            with self.__websocket_handlers_mutex:
-                connected_websockets = [ws for ws in self.__websocket_handlers.keys() if self.__websocket_handlers[ws]["is_connected"]]
-            websockets,_,_ = select.select(connected_websockets, [], [], 0.1)
-            for ws in websockets:
-                try:
-                    op_code, frame = ws.recv_data_frame()
-                except websocket._exceptions.WebSocketConnectionClosedException:
-                    log(f"[{self}] [RECEIVE - {ws}] Connection closed by remote host")
-                    self.__connection_lost = True
-                    self.__on_close(ws)
-                    continue
-                except Exception as e:
-                    log(f"Exception occured in thread __websocket_callback on {ws}: {e}")
-                    log(format_traceback(e.__traceback__))
-                    continue
-
-                if op_code == op_codes.OPCODE_CLOSE:
-                    self.__ws_log(f"Close frame", f"RECEIVE - {ws}")
-                    self.__on_close(ws)
-                elif op_code == op_codes.OPCODE_PING:
-                    self.__ws_log(f"Ping frame : Not supported yet", f"RECEIVE - {ws}")
-                elif op_code == op_codes.OPCODE_PONG:
-                    self.__ws_log(f"Pong frame : Not supported yet", f"RECEIVE - {ws}")
-                elif op_code == op_codes.OPCODE_CONT:
-                    self.__ws_log(f"Continuation frame : Not supported yet", f"RECEIVE - {ws}")
-                elif op_code == op_codes.OPCODE_BINARY:
-                    self.__ws_log(f"Binary frame : Not supported yet", f"RECEIVE - {ws}")
-                else:
-                    self.__on_message(ws, frame.data.decode("utf-8"))
+    def __on_frame(self, ws, op_code, frame):
+        # Called by the multiplexer workers, in reception order for a given websocket
+        if op_code == op_codes.OPCODE_PING:
+            self.__ws_log(f"Ping frame : Not supported yet", f"RECEIVE - {ws}")
+        elif op_code == op_codes.OPCODE_PONG:
+            self.__ws_log(f"Pong frame : Not supported yet", f"RECEIVE - {ws}")
+        elif op_code == op_codes.OPCODE_CONT:
+            self.__ws_log(f"Continuation frame : Not supported yet", f"RECEIVE - {ws}")
+        elif op_code == op_codes.OPCODE_BINARY:
+            self.__ws_log(f"Binary frame : Not supported yet", f"RECEIVE - {ws}")
+        else:
+            self.__on_message(ws, frame.data.decode("utf-8"))
 
-        # Reset thread object if exiting
-        log(f"[{self}] Exit reception thread")
-        #self.__receive_thread = None
+    def __on_connection_closed(self, ws):
+        log(f"[{self}] [RECEIVE - {ws}] Connection closed")
+        self.__connection_lost = True
+        self.__on_close(ws)
 
     def __on_close(self, websocket):
 
@@ -2871,12 +2853,14 @@ class DeltaExchange(CryptoConnector):
                     self.__ws_log(f"Message delayed by {timestamp_delay} (event {event_timestamp} / received {reception_timestamp}", f"DELAY - {websocket}")
                     return
 
-                symbol = [key for key, product in self.__products.items() if product["exchange_symbol"] == data["symbol"]][0]
+                symbol = self.__products_by_exchange_symbol[data["symbol"]]["symbol"]
 
                 data_refactored = {
                     "symbol": symbol,
                     "buy": [],
                     "sell": [],
+                    # Microseconds on Delta Exchange
+                    "timestamp": data["timestamp"] // 1000,
                 }
 
                 """
@@ -2922,7 +2906,7 @@ class DeltaExchange(CryptoConnector):
                 if len(data["bids"]) == 0 and len(data["asks"]) == 0:
                     return
 
-                product = [product for key, product in self.__products.items() if product["exchange_symbol"] == data["symbol"]][0]
+                product = self.__products_by_exchange_symbol[data["symbol"]]
                 symbol = product["symbol"]
 
                 if symbol not in self.__orderbooks:
@@ -2934,6 +2918,8 @@ class DeltaExchange(CryptoConnector):
                     "exchange_symbol": product["exchange_symbol"],
                     "buy": [],
                     "sell": [],
+                    # Microseconds on Delta Exchange
+                    "timestamp": data["timestamp"] // 1000,
                 }
 
                 if data["action"] == "snapshot":
@@ -3005,7 +2991,7 @@ class DeltaExchange(CryptoConnector):
             elif event == "mark_price":
 
                 product_symbol = data["symbol"].split(":")[1]
-                symbol = [key for key, product in self.__products.items() if product["exchange_symbol"] == product_symbol][0]
+                symbol = self.__products_by_exchange_symbol[product_symbol]["symbol"]
 
                 data_refactored = {
                     "symbol": symbol,
@@ -3016,7 +3002,7 @@ class DeltaExchange(CryptoConnector):
             elif event == "funding_rate":
 
                 product_symbol = data["symbol"]
-                symbol = [key for key, product in self.__products.items() if product["exchange_symbol"] == product_symbol][0]
+                symbol = self.__products_by_exchange_symbol[product_symbol]["symbol"]
 
                 data_refactored = {
                     "symbol": symbol,
@@ -3027,7 +3013,7 @@ class DeltaExchange(CryptoConnector):
             elif event == "v2/ticker":
 
                 product_symbol = data["symbol"]
-                symbol = [key for key, product in self.__products.items() if product["exchange_symbol"] == product_symbol][0]
+                symbol = self.__products_by_exchange_symbol[product_symbol]["symbol"]
 
                 data_refactored = {
                     "symbol": symbol,
@@ -3041,7 +3027,7 @@ class DeltaExchange(CryptoConnector):
                 if "action" in data and data["action"] == "snapshot":
                     return
 
-                symbol = [key for key, product in self.__products.items() if product["exchange_symbol"] == data["symbol"]][0]
+                symbol = self.__products_by_exchange_symbol[data["symbol"]]["symbol"]
 
                 data_refactored = {
                     "id": str(data["id"]),
@@ -3083,10 +3069,10 @@ class DeltaExchange(CryptoConnector):
 
                 for position in positions:
                     if data["action"] == "snapshot":
-                        product = [product for key, product in self.__products.items() if product["exchange_symbol"] == position["product_symbol"]][0]
+                        product = self.__products_by_exchange_symbol[position["product_symbol"]]
                         exchange_symbol = position["product_symbol"]
                     else:
-                        product = [product for key, product in self.__products.items() if product["exchange_symbol"] == position["symbol"]][0]
+                        product = self.__products_by_exchange_symbol[position["symbol"]]
                         exchange_symbol = position["symbol"]
 
                     symbol = product["symbol"]
@@ -0,0 +1,131 @@
+from connectors.crypto.connector.common.async_connector import AsyncCryptoConnector, get_session_pool
+from connectors.crypto.connector.exchanges.delta_exchange import DeltaExchange
+from connectors.crypto.common.rate_limiter import RateLimiter
+from connectors.crypto.exceptions import *
+import requests
+import asyncio
+
+class AsyncDeltaExchange(AsyncCryptoConnector):
+    PLATFORM_ID = 2
+    PLATFORM_NAME = "Delta Exchange"
+
+    def __init__(self, testnet=False, session_pool=None):
+        self.testing = testnet
+        self.session_pool = session_pool if session_pool else get_session_pool()
+
+        # Product catalog is parsed by the synchronous connector so that both return the same products
+        self.__connector = DeltaExchange("", "", testnet=testnet)
+        self.base_url = self.__connector.base_url
+        # Public limit is configured by the synchronous connector, buckets are shared with it
+        self.__rate_limiter = RateLimiter()
+        self.__products = {}
+        self.__products_lock = None
+
+    async def get_products(self, reload=False):
+        if not self.__products or reload:
+            if self.__products_lock is None:
+                self.__products_lock = asyncio.Lock()
+            async with self.__products_lock:
+                if not self.__products or reload:
+                    loop = asyncio.get_running_loop()
+                    self.__products = await loop.run_in_executor(None, self.__connector.get_products, reload)
+        return self.__products
+
+    async def get_product(self, symbol):
+        products = await self.get_products()
+        if symbol not in products:
+            raise UnknownProductSymbolError(f"Unknown product symbol '{symbol}'")
+        return products[symbol]
+
+    async def get_orderbook(self, symbol):
+        product = await self.get_product(symbol)
+        response = await self.__api_get_orderbook(product["exchange_id"])
+        return {
+            "symbol": symbol,
+            "exchange_id": product["exchange_id"],
+            "exchange_symbol": product["exchange_symbol"],
+            "buy": [{"price": float(order["price"]), "size": order["size"]} for order in response["buy"]],
+            "sell": [{"price": float(order["price"]), "size": order["size"]} for order in response["sell"]],
+        }
+
+    async def get_spot_price(self, symbol):
+        product = await self.get_product(symbol)
+        response = await self.__api_get_ticker(product["exchange_symbol"])
+        return {
+            "symbol": symbol,
+            "exchange_id": product["exchange_id"],
+            "exchange_symbol": product["exchange_symbol"],
+            "spot_price": float(response["spot_price"]),
+        }
+
+    async def get_mark_price(self, symbol):
+        products = await self.get_products()
+        if symbol not in products:
+            # Assets are priced from several products, left to the synchronous connector
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self.__connector.get_mark_price, symbol)
+
+        product = products[symbol]
+        response = await self.__api_get_ticker(product["exchange_symbol"])
+        if product["contract_type"] == "spot":
+            mark_price = float(response["spot_price"])
+        else:
+            mark_price = float(response["mark_price"])
+        return {
+            "symbol": symbol,
+            "exchange_id": product["exchange_id"],
+            "exchange_symbol": product["exchange_symbol"],
+            "mark_price": mark_price,
+        }
+
+    async def __api_get_orderbook(self, symbol):
+        response = await self.__request("GET", "/v2/l2orderbook/{}".format(symbol))
+        return response
+
+    async def __api_get_ticker(self, symbol):
+        response = await self.__request("GET", "/v2/tickers/{}".format(symbol))
+        return response
+
+    async def __request(self, method, path, query=None, retry=3):
+        url = '%s%s' % (self.base_url, path)
+        session = self.session_pool.get_session(url)
+        while retry > 0:
+            try:
+                await self.__rate_limiter.acquire_async(self.PLATFORM_NAME, None, "public")
+                async with session.request(method, url, params=query, headers={"Content-Type": "application/json"}) as response:
+                    if response.status == 429 and "X-RATE-LIMIT-RESET" in response.headers:
+                        # Reset is given in milliseconds
+                        self.__rate_limiter.penalize(self.PLATFORM_NAME, None, "public", int(response.headers["X-RATE-LIMIT-RESET"])/1000)
+                    return await self.__parse_response(response)
+            except InternalServerError:
+                retry -= 1
+        raise InternalServerError
+
+    async def __parse_response(self, response):
+        status_code = response.status
+        if status_code != 200:
+            if status_code == 429:
+                raise requests.exceptions.HTTPError("{} : Too Many Requests, need to wait {} ms".format(status_code, response.headers.get("X-RATE-LIMIT-RESET")))
+            try:
+                response_json = await response.json(content_type=None)
+            except:
+                raise requests.exceptions.HTTPError(status_code)
+
+            if "error" in response_json:
+                if response_json["error"]["code"] == "internal_server_error":
+                    raise InternalServerError
+                elif response_json["error"]["code"] == "unavailable":
+                    raise UnavailableProductError
+                elif response_json["error"]["code"] == "unsupported":
+                    raise UnsupportedProductError
+                raise requests.exceptions.HTTPError("{} : {}".format(status_code, response_json["error"]))
+            else:
+                raise requests.exceptions.HTTPError(status_code)
+
+        response_json = await response.json(content_type=None)
+        if response_json['success']:
+            return response_json['result']
+        elif 'error' in response_json:
+            raise requests.exceptions.HTTPError(response_json['error'])
+        else:
+            raise requests.exceptions.HTTPError()
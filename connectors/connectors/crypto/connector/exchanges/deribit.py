@@ -1,11 +1,16 @@
 from connectors.threading.Threads import StoppableThread, format_traceback
+from connectors.threading.Multiplexer import get_multiplexer
 from connectors.crypto.connector.common.connector import CryptoConnector
 import connectors.crypto.connector.common.websocket_codes as op_codes
 from connectors.crypto.connector.core import is_stable_coin, is_fiat
 from connectors.crypto.connector.exchanges.coinbase import CbForex
 from connectors.threading.Threads import format_traceback
+from connectors.crypto.common.orderbook import OrderBook
+from connectors.crypto.common.rate_limiter import RateLimiter
+from connectors.crypto.common.product_cache import ProductCatalogCache
 from connectors.crypto.common.logger import log
 from connectors.crypto.exceptions import *
+from connectors.crypto.connector.common.transport import get_transport
 from urllib.parse import urlencode
 from decimal import Decimal
 from enum import IntEnum
@@ -13,7 +18,6 @@ import websocket
 import threading
 import requests
 import datetime
-import select
 import queue
 import time
 import json
@@ -29,6 +33,8 @@ class DeribitErrorCodes(IntEnum):
 class Deribit(CryptoConnector):
     PLATFORM_ID = 8
     PLATFORM_NAME = "Deribit"
+    # Levels per side passed to orderbook callbacks when 'subscribe_orderbook' is given no depth
+    ORDERBOOK_DEPTH = 20
 
     SCOPE_REGEX = {
         "account": "^.*(account:(read_write|read)).*$",
@@ -44,7 +50,12 @@ class Deribit(CryptoConnector):
         self.strategy = strategy
         self.base_currency = base_currency
         self.database = strategy.database if strategy else None
-        self.session = requests.Session()
+        self.session = get_transport().session()
+
+        # Shared with the async connector, which consults the same buckets
+        self.__rate_limiter = RateLimiter()
+        self.__rate_limiter.configure(self.PLATFORM_NAME, "public", 120, 1, burst=100)
+        self.__rate_limiter.configure(self.PLATFORM_NAME, "private", 20, 1, burst=100)
 
         if self.testing:
             self.base_url = "http://test.deribit.com/api/v2"
@@ -59,7 +70,9 @@ class Deribit(CryptoConnector):
         self.future_fees = 0.001
 
         self.currencies = ['BTC','ETH','USDC','SOL', 'USDT']
+        self.__product_cache = ProductCatalogCache()
         self.__products = {}
+        self.__products_by_exchange_symbol = {}
         self.__assets = {}
 
         self.__CHANNELS_LIMITS = {
@@ -83,7 +96,8 @@ class Deribit(CryptoConnector):
         self.__subscribe_mutex = threading.Lock()
 
         self.__heartbeat_timeout = 35
-        self.__receive_thread = None
+        # Websockets are read by the process-wide multiplexer
+        self.__multiplexer = get_multiplexer()
         self.__connection_lost = False
         self.__connection_aborted = False
         self.__reconnect_timeout = 30
@@ -99,6 +113,7 @@ class Deribit(CryptoConnector):
         self.__last_volume = {}
 
         self.__orderbooks = {}
+        self.__orderbooks_depth = {}
 
 ######################
 ### Public methods ###
@@ -288,81 +303,88 @@ class Deribit(CryptoConnector):
         return self.__assets
 
     def get_products(self, reload=False):
-        if not self.__products or reload:
-            data = {}
-            for currency in self.currencies:
-                response = self.__api_get_products(currency)
-                product_refactored = {}
-                for product in response:
-
-                    generated_symbol = self.__compose_product_symbol(product)
-
-                    product_refactored = {
-                        "symbol": generated_symbol,
-                        "exchange_id": product["instrument_name"],
-                        "exchange_symbol": product["instrument_name"],
-                        "contract_type": None,
-                        # Contract size is always 1 for spot
-                        "contract_size": None,
-                        "strike_price": None,
-                        "settlement_date": None,
-                        "settlement_time": None,
-                        "duration": None,
-                        "precision": {
-                            "amount": None,
-                            "price": None,
-                            "notional": None,
-                        },
-                        "limits": {
-                            "amount": {
-                                "min": product["min_trade_amount"],
-                                "max": None},
-                            "price": {
-                                "min": product["tick_size"],
-                                "max": None},
-                            "notional": {
-                                "min": None,
-                                "max": None},
-                        },
-                    }
+        # Catalog is shared with every Deribit connector of the process
+        catalog = self.__product_cache.get(self.PLATFORM_ID, self.testing, self.__load_products, reload=reload)
+        if catalog["products"] is not self.__products:
+            self.__products = catalog["products"]
+            self.__tick_size_steps = catalog["tick_size_steps"]
+            # Reverse index used to resolve websocket messages
+            self.__products_by_exchange_symbol = {product["exchange_symbol"]: product for product in self.__products.values()}
+        return self.__products
+
+    def __load_products(self):
+        data = {}
+        tick_size_steps = {}
+        for currency in self.currencies:
+            response = self.__api_get_products(currency)
+            product_refactored = {}
+            for product in response:
+
+                generated_symbol = self.__compose_product_symbol(product)
+
+                product_refactored = {
+                    "symbol": generated_symbol,
+                    "exchange_id": product["instrument_name"],
+                    "exchange_symbol": product["instrument_name"],
+                    "contract_type": None,
+                    # Contract size is always 1 for spot
+                    "contract_size": None,
+                    "strike_price": None,
+                    "settlement_date": None,
+                    "settlement_time": None,
+                    "duration": None,
+                    "precision": {
+                        "amount": None,
+                        "price": None,
+                        "notional": None,
+                    },
+                    "limits": {
+                        "amount": {
+                            "min": product["min_trade_amount"],
+                            "max": None},
+                        "price": {
+                            "min": product["tick_size"],
+                            "max": None},
+                        "notional": {
+                            "min": None,
+                            "max": None},
+                    },
+                }
 
-                    if not (contract_type := self.__compose_contract_type(product)):
-                        # Do not handle this product types
-                        continue
-                    product_refactored["contract_type"] = contract_type
-                    product_refactored["contract_size"] = product["contract_size"]
-
-                    product_refactored["strike_price"] = float(product["strike"]) if "strike" in product else None
-
-                    settlement_datetime = datetime.datetime.fromtimestamp(product["expiration_timestamp"]/1000,
-                                            tz=datetime.timezone.utc)
-                    settlement_time = settlement_datetime.strftime('%Y-%m-%dT%H:%M:%SZ')
-                    settlement_date = settlement_time[:10] if settlement_time else None
-                    duration = (settlement_datetime.date() - datetime.date.today()).days
-                    product_refactored["settlement_date"] = settlement_date
-                    product_refactored["settlement_time"] = settlement_time
-                    product_refactored["duration"] = duration
-                    product_refactored["base_asset_id"] = product["base_currency"]
-                    product_refactored["base_asset_symbol"] = product["base_currency"]
-                    product_refactored["quote_asset_id"] = product["quote_currency"]
-                    product_refactored["quote_asset_symbol"] = product["quote_currency"]
-
-                    # Compose tick_sizes
-                    tick_sizes = []
-                    for tick_size in product["tick_size_steps"]:
-                        tick_sizes.append(tick_size)
-                    self.__tick_size_steps[generated_symbol] = sorted(tick_sizes, key=lambda d: d['above_price'])
-
-                    # Temporary overwrite contract_size for BTC options
-                    if ((contract_type == "call_option" or contract_type == "put_option") and
-                        product["base_currency"] == "BTC"):
-                        product_refactored["contract_size"] = 0.1
-
-                    data[generated_symbol] = product_refactored
-                    self.__products[generated_symbol] = product_refactored
-            return data
-        else:
-            return self.__products
+                if not (contract_type := self.__compose_contract_type(product)):
+                    # Do not handle this product types
+                    continue
+                product_refactored["contract_type"] = contract_type
+                product_refactored["contract_size"] = product["contract_size"]
+
+                product_refactored["strike_price"] = float(product["strike"]) if "strike" in product else None
+
+                settlement_datetime = datetime.datetime.fromtimestamp(product["expiration_timestamp"]/1000,
+                                        tz=datetime.timezone.utc)
+                settlement_time = settlement_datetime.strftime('%Y-%m-%dT%H:%M:%SZ')
+                settlement_date = settlement_time[:10] if settlement_time else None
+                duration = (settlement_datetime.date() - datetime.date.today()).days
+                product_refactored["settlement_date"] = settlement_date
+                product_refactored["settlement_time"] = settlement_time
+                product_refactored["duration"] = duration
+                product_refactored["base_asset_id"] = product["base_currency"]
+                product_refactored["base_asset_symbol"] = product["base_currency"]
+                product_refactored["quote_asset_id"] = product["quote_currency"]
+                product_refactored["quote_asset_symbol"] = product["quote_currency"]
+
+                # Compose tick_sizes
+                tick_sizes = []
+                for tick_size in product["tick_size_steps"]:
+                    tick_sizes.append(tick_size)
+                tick_size_steps[generated_symbol] = sorted(tick_sizes, key=lambda d: d['above_price'])
+
+                # Temporary overwrite contract_size for BTC options
+                if ((contract_type == "call_option" or contract_type == "put_option") and
+                    product["base_currency"] == "BTC"):
+                    product_refactored["contract_size"] = 0.1
+
+                data[generated_symbol] = product_refactored
+        return {"products": data, "tick_size_steps": tick_size_steps}
 
     def get_product(self, symbol):
         if not self.__products:
@@ -524,7 +546,7 @@ class Deribit(CryptoConnector):
                     continue
 
                 # Find corresponding product
-                product = [product for symbol, product in self.__products.items() if product["exchange_symbol"] == position["instrument_name"]][0]
+                product = self.__products_by_exchange_symbol[position["instrument_name"]]
 
                 symbol = product["symbol"]
                 usd_price = self.__get_symbol_usd_price(symbol)
@@ -1183,7 +1205,7 @@ class Deribit(CryptoConnector):
 
             for order in response:
 
-                uniformized_symbol = next((product["symbol"] for product in self.__products.values() if product["exchange_symbol"] == order["instrument_name"]), None)
+                uniformized_symbol = self.__products_by_exchange_symbol.get(order["instrument_name"], {}).get("symbol")
 
                 if symbol != None and uniformized_symbol != symbol:
                     continue
@@ -1583,11 +1605,9 @@ class Deribit(CryptoConnector):
 
         if disconnect_all:
 
-            self.__receive_thread.stop()
-            self.__receive_thread.join()
-
             with self.__websocket_mutex:
                 for websocket in self.__websockets:
+                    self.__multiplexer.unregister(websocket)
                     websocket.close()
                 self.__websockets = []
 
@@ -1603,7 +1623,7 @@ class Deribit(CryptoConnector):
 ### Public channels ###
 #######################
 
-    def subscribe_orderbook(self, symbols, callback=None):
+    def subscribe_orderbook(self, symbols, callback=None, depth=None):
         if not self.__products:
             self.get_products()
 
@@ -1617,9 +1637,11 @@ class Deribit(CryptoConnector):
             else:
                 exchange_symbol = self.__products[symbol]["exchange_symbol"]
 
+            # Callbacks receive the best 'depth' levels of the local book, not the whole book copied on every update
+            self.__orderbooks_depth[symbol] = depth if depth is not None else self.ORDERBOOK_DEPTH
+
             interval = "100ms"
             group = "none"
-            depth = 20
             #channels.append(f"book.{exchange_symbol}.{group}.{depth}.{interval}")
             channels.append(f"book.{exchange_symbol}.{interval}")
 
@@ -1644,6 +1666,8 @@ class Deribit(CryptoConnector):
             depth = 20
             #channels.append(f"book.{exchange_symbol}.{group}.{depth}.{interval}")
             channels.append(f"book.{exchange_symbol}.{interval}")
+            self.__orderbooks.pop(symbol, None)
+            self.__orderbooks_depth.pop(symbol, None)
 
         self.__unsubscribe_dispatcher("orderbook", channels, symbols, callback)
 
@@ -2154,12 +2178,23 @@ class Deribit(CryptoConnector):
                 self.__authenticate()
             headers["Authorization"] = "Bearer " + self.__auth_token
 
+        endpoint_class = "private" if auth else "public"
+        rate_limit_key = self.api_key if auth else None
+
+        # Idempotent requests are retried by the transport, each retry waits for the rate limiter
+        def on_retry(response):
+            if response is not None:
+                self.__update_rate_limit(response, rate_limit_key, endpoint_class)
+            self.__rate_limiter.acquire(self.PLATFORM_NAME, rate_limit_key, endpoint_class)
+
+        self.__rate_limiter.acquire(self.PLATFORM_NAME, rate_limit_key, endpoint_class)
         if method == "GET":
             payload_str = urlencode(payload)
-            response = self.session.request(method, f"{url}?{payload_str}", headers=headers)
+            response = self.session.request(method, f"{url}?{payload_str}", headers=headers, on_retry=on_retry)
         else:
-            response = self.session.request(method, url, params=payload, headers=headers)
+            response = self.session.request(method, url, params=payload, headers=headers, on_retry=on_retry)
         self.__request_log(response)
+        self.__update_rate_limit(response, rate_limit_key, endpoint_class)
 
         try:
             parsed_response = self.__parse_response(response)
@@ -2171,6 +2206,11 @@ class Deribit(CryptoConnector):
 
         return parsed_response
 
+    def __update_rate_limit(self, response, rate_limit_key, endpoint_class):
+        if response.status_code == 429:
+            # Deribit gives no reset delay, credits are refilled within a second
+            self.__rate_limiter.penalize(self.PLATFORM_NAME, rate_limit_key, endpoint_class, 1)
+
     def __parse_response(self, response):
         status_code = response.status_code
         if status_code != 200:
@@ -2363,10 +2403,8 @@ class Deribit(CryptoConnector):
                 # Connect websocket
                 ws.connect(self.ws_url)
 
-                # Launch reception thread
-                if not self.__receive_thread:
-                    self.__receive_thread = StoppableThread(name="Thread-Deribit-websocket_callback", target=self.__websocket_callback)
-                    self.__receive_thread.start()
+                # Start reception
+                self.__multiplexer.register(ws, self.__on_frame, self.__on_connection_closed)
 
                 # Tell server to enable heartbeat
                 self.__heartbeat(ws)
@@ -2405,18 +2443,11 @@ class Deribit(CryptoConnector):
             self.__websockets.remove(websocket)
 
             # Close websocket connection
+            self.__multiplexer.unregister(websocket)
             websocket.close()
 
             self.__websocket_number -= 1
 
-            # Stop reception thread if no websocket anymore
-            if self.__websocket_number == 0:
-                self.__receive_thread.stop()
-                log(f"[{self}][DELETE] Joining reception thread")
-                #self.__receive_thread.join()
-                log(f"[{self}][DELETE] Reception thread joined")
-                self.__receive_thread = None
-
         #self.__ws_log(f"Websocket removed '{websocket}'.", "DELETE")
         log(f"[{self}][DELETE] Websocket removed '{websocket}'")
 
@@ -2717,6 +2748,7 @@ class Deribit(CryptoConnector):
         with self.__websocket_handlers_mutex:
             self.__websocket_handlers[websocket]["is_connected"] = False
             self.__websocket_handlers[websocket]["is_auth"] = False
+        self.__multiplexer.unregister(websocket)
         websocket.close()
 
     def __reconnect(self, websocket):
@@ -2734,7 +2766,9 @@ class Deribit(CryptoConnector):
         time.sleep(1)
         # Connect websocket
         with self.__websocket_mutex:
+            self.__multiplexer.unregister(websocket)
             websocket.connect(self.ws_url)
+            self.__multiplexer.register(websocket, self.__on_frame, self.__on_connection_closed)
             self.__heartbeat(websocket)
 
         # Set websocket handler
@@ -2786,42 +2820,23 @@ class Deribit(CryptoConnector):
         if connection_lost:
             self.__connection_aborted = True
 
-    def __websocket_callback(self):
-        while not self.__receive_thread.is_stopped():
-            with self.__websocket_handlers_mutex:
-                connected_websockets = [ws for ws in self.__websocket_handlers.keys() if self.__websocket_handlers[ws]["is_connected"]]
-            websockets,_,_ = select.select(connected_websockets, [], [], 0.1)
-            for ws in websockets:
-
-                try:
-                    op_code, frame = ws.recv_data_frame()
-                except websocket._exceptions.WebSocketConnectionClosedException:
-                    log(f"[{self}] [RECEIVE - {ws}] Connection closed by remote host")
-                    self.__connection_lost = True
-                    self.__on_close(ws)
-                    continue
-                except Exception as e:
-                    log(f"Exception occured in thread __websocket_callback on {ws}: {e}")
-                    log(format_traceback(e.__traceback__))
-                    continue
-
-                if op_code == op_codes.OPCODE_CLOSE:
-                    self.__ws_log(f"Close frame", f"RECEIVE - {ws}")
-                    self.__on_close(ws)
-                elif op_code == op_codes.OPCODE_PING:
-                    self.__ws_log(f"Ping frame : Not supported yet", f"RECEIVE - {ws}")
-                elif op_code == op_codes.OPCODE_PONG:
-                    self.__ws_log(f"Pong frame : Not supported yet", f"RECEIVE - {ws}")
-                elif op_code == op_codes.OPCODE_CONT:
-                    self.__ws_log(f"Continuation frame : Not supported yet", f"RECEIVE - {ws}")
-                elif op_code == op_codes.OPCODE_BINARY:
-                    self.__ws_log(f"Binary frame : Not supported yet", f"RECEIVE - {ws}")
-                else:
-                    self.__on_message(ws, frame.data.decode("utf-8"))
+    def __on_frame(self, ws, op_code, frame):
+        # Called by the multiplexer workers, in reception order for a given websocket
+        if op_code == op_codes.OPCODE_PING:
+            self.__ws_log(f"Ping frame : Not supported yet", f"RECEIVE - {ws}")
+        elif op_code == op_codes.OPCODE_PONG:
+            self.__ws_log(f"Pong frame : Not supported yet", f"RECEIVE - {ws}")
+        elif op_code == op_codes.OPCODE_CONT:
+            self.__ws_log(f"Continuation frame : Not supported yet", f"RECEIVE - {ws}")
+        elif op_code == op_codes.OPCODE_BINARY:
+            self.__ws_log(f"Binary frame : Not supported yet", f"RECEIVE - {ws}")
+        else:
+            self.__on_message(ws, frame.data.decode("utf-8"))
 
-        # Reset thread object if exiting
-        log(f"[{self}] Exit reception thread")
-        #self.__receive_thread = None
+    def __on_connection_closed(self, ws):
+        log(f"[{self}] [RECEIVE - {ws}] Connection closed")
+        self.__connection_lost = True
+        self.__on_close(ws)
 
     def __on_close(self, websocket):
 
@@ -2882,11 +2897,12 @@ class Deribit(CryptoConnector):
                     data = data["params"]["data"]
                     events = ["orderbook"]
 
-                    product = [product for key, product in self.__products.items() if product["exchange_symbol"] == data["instrument_name"]][0]
+                    product = self.__products_by_exchange_symbol[data["instrument_name"]]
                     symbol = product["symbol"]
 
                     if symbol not in self.__orderbooks:
-                        self.__orderbooks[symbol] = {"symbol": symbol, "buy": [], "sell": []}
+                        self.__orderbooks[symbol] = OrderBook(symbol)
+                    orderbook = self.__orderbooks[symbol]
 
                     data_refactored = {
                         "orderbook": {
@@ -2895,110 +2911,29 @@ class Deribit(CryptoConnector):
                             "exchange_symbol": product["exchange_symbol"],
                             "buy": [],
                             "sell": [],
+                            "timestamp": data["timestamp"],
                         },
                     }
 
                     if data["type"] == "snapshot":
-                        self.__orderbooks[symbol]["buy"] = []
-                        self.__orderbooks[symbol]["sell"] = []
-
-                        for order in data["bids"]:
-                            self.__orderbooks[symbol]["buy"].append({"price": float(order[1]), "size": float(order[2])})
-                        for order in data["asks"]:
-                            self.__orderbooks[symbol]["sell"].append({"price": float(order[1]), "size": float(order[2])})
+                        orderbook.set_snapshot(buy=[(order[1], order[2]) for order in data["bids"]],
+                                               sell=[(order[1], order[2]) for order in data["asks"]])
 
                     elif data["type"] == "change":
+                        # 'new' and 'change' actions set the level size, 'delete' removes the level
+                        orderbook.update_many("buy", [(order[1], 0 if order[0] == "delete" else order[2]) for order in data["bids"]])
+                        orderbook.update_many("sell", [(order[1], 0 if order[0] == "delete" else order[2]) for order in data["asks"]])
 
-                        for order in data["bids"]:
-                            action = order[0]
-                            price = order[1]
-                            size = order[2]
-
-                            # Size change
-                            if action == "change" or action == "delete":
-                                index = next((index for (index, existing_order) in enumerate(self.__orderbooks[symbol]["buy"]) if existing_order["price"] == price), None)
-
-                                if index != None:
-                                    # Remove price
-                                    if size == 0:
-                                        del self.__orderbooks[symbol]["buy"][index]
-                                    # Update size
-                                    else:
-                                        self.__orderbooks[symbol]["buy"][index]["size"] = size
-                            # New price
-                            else:
-                                # Insert price in sorted list
-                                inserted = False
-                                for index, existing_order in enumerate(self.__orderbooks[symbol]["buy"]):
-                                    if price > existing_order["price"]:
-                                        self.__orderbooks[symbol]["buy"].insert(index, {"price": price, "size": size})
-                                        inserted = True
-                                        break
-                                if not inserted:
-                                    self.__orderbooks[symbol]["buy"].append({"price": price, "size": size})
-
-                        for order in data["asks"]:
-                            action = order[0]
-                            price = order[1]
-                            size = order[2]
-
-                            # Size change
-                            if action == "change" or action == "delete":
-                                index = next((index for (index, existing_order) in enumerate(self.__orderbooks[symbol]["sell"]) if existing_order["price"] == price), None)
-
-                                if index != None:
-                                    # Remove price
-                                    if size == 0:
-                                        del self.__orderbooks[symbol]["sell"][index]
-                                    # Update size
-                                    else:
-                                        self.__orderbooks[symbol]["sell"][index]["size"] = size
-                            # New price
-                            else:
-                                # Insert price in sorted list
-                                inserted = False
-                                for index, existing_order in enumerate(self.__orderbooks[symbol]["sell"]):
-                                    if price < existing_order["price"]:
-                                        self.__orderbooks[symbol]["sell"].insert(index, {"price": price, "size": size})
-                                        inserted = True
-                                        break
-                                if not inserted:
-                                    self.__orderbooks[symbol]["sell"].append({"price": price, "size": size})
-
-                    data_refactored["orderbook"]["buy"] = copy.deepcopy(self.__orderbooks[symbol]["buy"])
-                    data_refactored["orderbook"]["sell"] = copy.deepcopy(self.__orderbooks[symbol]["sell"])
-
-                    """
-                    symbol = [key for key, product in self.__products.items() if product["exchange_symbol"] == data["instrument_name"]][0]
-
-                    data_refactored = {
-                        "orderbook": {
-                            "symbol": symbol,
-                            "buy": [],
-                            "sell": [],
-                        }
-                    }
-
-                    for order in data["bids"]:
-                        order_refactored = {
-                            "price": order[0],
-                            "size": order[1],
-                        }
-                        data_refactored["orderbook"]["buy"].append(order_refactored)
-                    for order in data["asks"]:
-                        order_refactored = {
-                            "price": order[0],
-                            "size": order[1],
-                        }
-                        data_refactored["orderbook"]["sell"].append(order_refactored)
-                    """
+                    snapshot = orderbook.to_dict(self.__orderbooks_depth.get(symbol, self.ORDERBOOK_DEPTH))
+                    data_refactored["orderbook"]["buy"] = snapshot["buy"]
+                    data_refactored["orderbook"]["sell"] = snapshot["sell"]
 
                 # Ticker update
                 elif channel.startswith("incremental_ticker"):
                     events = ["mark_price", "funding_rate", "volume"]
                     data = data["params"]["data"]
 
-                    symbol = [key for key, product in self.__products.items() if product["exchange_symbol"] == data["instrument_name"]][0]
+                    symbol = self.__products_by_exchange_symbol[data["instrument_name"]]["symbol"]
 
                     if symbol not in self.__last_mark_price:
                         self.__last_mark_price[symbol] = None
@@ -3031,7 +2966,7 @@ class Deribit(CryptoConnector):
                     events = ["orders"]
                     data = data["params"]["data"]
 
-                    symbol = [key for key, product in self.__products.items() if product["exchange_symbol"] == data["instrument_name"]][0]
+                    symbol = self.__products_by_exchange_symbol[data["instrument_name"]]["symbol"]
 
                     data_refactored = {
                         "orders": {
@@ -3083,7 +3018,7 @@ class Deribit(CryptoConnector):
 
                     data_refactored = {"positions": {}}
                     for position in positions:
-                        product = [product for key, product in self.__products.items() if product["exchange_symbol"] == position["instrument_name"]][0]
+                        product = self.__products_by_exchange_symbol[position["instrument_name"]]
                         symbol = product["symbol"]
 
                         data_refactored["positions"][symbol] = {
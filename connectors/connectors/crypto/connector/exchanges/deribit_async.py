@@ -0,0 +1,132 @@
+from connectors.crypto.connector.common.async_connector import AsyncCryptoConnector, get_session_pool
+from connectors.crypto.connector.exchanges.deribit import Deribit, DeribitErrorCodes
+from connectors.crypto.common.rate_limiter import RateLimiter
+from connectors.crypto.exceptions import *
+from urllib.parse import urlencode
+import requests
+import asyncio
+
+class AsyncDeribit(AsyncCryptoConnector):
+    PLATFORM_ID = 8
+    PLATFORM_NAME = "Deribit"
+
+    def __init__(self, testnet=False, session_pool=None):
+        self.testing = testnet
+        self.session_pool = session_pool if session_pool else get_session_pool()
+
+        # Product catalog is parsed by the synchronous connector so that both return the same products
+        self.__connector = Deribit("", "", testnet=testnet)
+        self.base_url = self.__connector.base_url
+        # Limits are configured by the synchronous connector, both consult the same buckets
+        self.__rate_limiter = RateLimiter()
+        self.__products = {}
+        self.__products_lock = None
+
+    async def get_products(self, reload=False):
+        if not self.__products or reload:
+            if self.__products_lock is None:
+                self.__products_lock = asyncio.Lock()
+            async with self.__products_lock:
+                if not self.__products or reload:
+                    loop = asyncio.get_running_loop()
+                    self.__products = await loop.run_in_executor(None, self.__connector.get_products, reload)
+        return self.__products
+
+    async def get_product(self, symbol):
+        products = await self.get_products()
+        if symbol not in products:
+            raise UnknownProductSymbolError(f"Unknown product symbol '{symbol}'")
+        return products[symbol]
+
+    async def get_orderbook(self, symbol):
+        product = await self.get_product(symbol)
+        response = await self.__api_get_orderbook_by_symbol(product["exchange_symbol"])
+
+        # Option prices are quoted in base asset
+        if product["contract_type"] == "call_option" or product["contract_type"] == "put_option":
+            price_factor = response["index_price"]
+        else:
+            price_factor = 1
+
+        return {
+            "symbol": symbol,
+            "exchange_id": product["exchange_id"],
+            "exchange_symbol": product["exchange_symbol"],
+            "buy": [{"price": order[0]*price_factor, "size": order[1]} for order in response["bids"]],
+            "sell": [{"price": order[0]*price_factor, "size": order[1]} for order in response["asks"]],
+        }
+
+    async def get_spot_price(self, symbol):
+        product = await self.get_product(symbol)
+        index_symbol = f"{product['base_asset_symbol']}_USDC".lower()
+        response = await self.__api_get_index_price(index_symbol)
+        return {
+            "symbol": symbol,
+            "exchange_id": product["exchange_id"],
+            "exchange_symbol": product["exchange_symbol"],
+            "spot_price": response["index_price"],
+        }
+
+    async def get_mark_price(self, symbol):
+        products = await self.get_products()
+        if symbol not in products:
+            # Assets are priced from several products, left to the synchronous connector
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self.__connector.get_mark_price, symbol)
+
+        product = products[symbol]
+        response = await self.__api_get_ticker(product["exchange_symbol"])
+        return {
+            "symbol": symbol,
+            "exchange_id": product["exchange_id"],
+            "exchange_symbol": product["exchange_symbol"],
+            "mark_price": response["mark_price"],
+        }
+
+    async def __api_get_orderbook_by_symbol(self, product_symbol):
+        response = await self.__request("GET", "/public/get_order_book", payload={
+            "instrument_name": str(product_symbol),
+            "depth": 1000,
+        })
+        return response
+
+    async def __api_get_index_price(self, product_symbol):
+        response = await self.__request("GET", "/public/get_index_price", payload={
+            "index_name": str(product_symbol)
+        })
+        return response
+
+    async def __api_get_ticker(self, product_symbol):
+        response = await self.__request("GET", "/public/ticker", payload={
+            "instrument_name": str(product_symbol)
+        })
+        return response
+
+    async def __request(self, method, path, payload=None):
+        url = '%s%s?%s' % (self.base_url, path, urlencode(payload if payload else {}))
+        session = self.session_pool.get_session(url)
+        await self.__rate_limiter.acquire_async(self.PLATFORM_NAME, None, "public")
+        async with session.request(method, url, headers={"Accept": "application/json"}) as response:
+            if response.status == 429:
+                # No reset time is given, the credits of one second are refilled
+                self.__rate_limiter.penalize(self.PLATFORM_NAME, None, "public", 1)
+            return await self.__parse_response(response)
+
+    async def __parse_response(self, response):
+        status_code = response.status
+        if status_code != 200:
+            try:
+                response_json = await response.json(content_type=None)
+            except:
+                raise requests.exceptions.HTTPError(status_code)
+
+            if response_json["error"]:
+                if response_json["error"]["code"] == DeribitErrorCodes.FORBIDDEN:
+                    raise ForbiddenError(f"Forbidden action : {response_json['error']['data']}")
+                if response_json["error"]["code"] == DeribitErrorCodes.UNAUTHORIZED:
+                    raise UnauthorizedError
+                raise requests.exceptions.HTTPError("{} : {}".format(status_code, response_json["error"]))
+            else:
+                raise requests.exceptions.HTTPError(status_code)
+        response_json = await response.json(content_type=None)
+        return response_json["result"]
@@ -3,6 +3,7 @@ from connectors.crypto.connector.core import is_stable_coin, is_fiat
 from connectors.threading.Threads import StoppableThread
 from connectors.crypto.common.logger import log
 from connectors.crypto.exceptions import *
+from connectors.crypto.connector.common.transport import get_transport
 import pandas as pd
 import websocket
 import threading
@@ -24,7 +25,7 @@ class DyDx(CryptoConnector):
     def __init__(self, user, use_websocket=False):
         self.user = user
         self.testing = user.testnet
-        self.session = requests.Session()
+        self.session = get_transport().session()
         if self.testing:
             self.base_url = "https://api.stage.dydx.exchange"
             self.ws_url = "https://api.stage.dydx.exchange"
@@ -41,6 +42,7 @@ class DyDx(CryptoConnector):
         self.future_fees = 0.004
 
         self.__products = {}
+        self.__products_by_exchange_symbol = {}
 
         self.use_websocket = use_websocket
         self.__websocket = None
@@ -215,6 +217,8 @@ class DyDx(CryptoConnector):
                 data[generated_symbol] = product_refactored
                 self.__products[generated_symbol] = product_refactored
 
+            # Reverse index used to resolve websocket messages
+            self.__products_by_exchange_symbol = {product["exchange_symbol"]: product for product in self.__products.values()}
             return data
         else:
             return self.__products
@@ -1283,7 +1287,7 @@ class DyDx(CryptoConnector):
                         if "action" in data and data["action"] == "snapshot":
                             continue
 
-                        symbol = [key for key, product in self.__products.items() if product["exchange_symbol"] == data["product_symbol"]][0]
+                        symbol = self.__products_by_exchange_symbol[data["product_symbol"]]["symbol"]
 
                         data_refactored = {
                             "id": data["id"],
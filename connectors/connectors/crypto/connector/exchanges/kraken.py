@@ -7,6 +7,7 @@ from urllib.parse import urlencode
 from connectors.crypto.singleton import Singleton
 from decimal import Decimal
 from connectors.crypto.connector.forex import Forex
+from connectors.crypto.connector.common.transport import get_transport
 import requests
 import datetime
 import hashlib
@@ -58,7 +59,7 @@ class Kraken:
         self.strategy = strategy
         self.base_currency = base_currency
         self.database = strategy.database if strategy else None
-        self.session = requests.Session()
+        self.session = get_transport().session()
 
         if self.testing:
             self.base_url = ""
@@ -2,8 +2,11 @@ from connectors.threading.Threads import StoppableThread, format_traceback
 from connectors.crypto.connector.common.connector import CryptoConnector
 import connectors.crypto.connector.common.websocket_codes as op_codes
 from connectors.crypto.connector.core import is_stable_coin, is_fiat
+from connectors.crypto.common.rate_limiter import RateLimiter
 from connectors.crypto.common.logger import log
+from connectors.crypto.common.product_cache import ProductCatalogCache
 from connectors.crypto.exceptions import *
+from connectors.crypto.connector.common.transport import get_transport
 from decimal import Decimal
 import pandas as pd
 import websocket
@@ -29,7 +32,12 @@ class OKX(CryptoConnector):
         self.passphrase = passphrase
         self.testing = testnet
         self.user = user
-        self.session = requests.Session()
+        self.session = get_transport().session()
+
+        # Most endpoints are limited to 20 requests every 2 seconds, per IP or per user
+        self.__rate_limiter = RateLimiter()
+        self.__rate_limiter.configure(self.PLATFORM_NAME, "private", 20, 2, burst=20)
+        self.__rate_limiter.configure(self.PLATFORM_NAME, "public", 20, 2, burst=20)
 
         if self.testing:
             self.base_url = "https://www.okx.com"
@@ -43,7 +51,9 @@ class OKX(CryptoConnector):
         self.option_fees = 0.0005
         self.future_fees = 0.001
 
+        self.__product_cache = ProductCatalogCache()
         self.__products = {}
+        self.__products_by_exchange_symbol = {}
 
         self.__websocket = None
         self.__heartbeat_timeout = 35
@@ -225,47 +235,51 @@ class OKX(CryptoConnector):
         return data
     #TOTEST
     def get_products(self, reload=False):
-        if not self.__products or reload:
-            data = {}
-            products = self.__api_get_products()
-            for product in products:
+        # Catalog is shared with every OKX connector of the process
+        catalog = self.__product_cache.get(self.PLATFORM_ID, self.testing, self.__load_products, reload=reload)
+        if catalog is not self.__products:
+            self.__products = catalog
+            # Reverse index used to resolve websocket messages
+            self.__products_by_exchange_symbol = {product["exchange_symbol"]: product for product in self.__products.values()}
+        return self.__products
+
+    def __load_products(self):
+        data = {}
+        products = self.__api_get_products()
+        for product in products:
 
-                generated_symbol = self.__compose_product_symbol(product)
+            generated_symbol = self.__compose_product_symbol(product)
 
-                product_refactored = {
-                    "symbol": generated_symbol,
-                    "exchange_id": product["instId"],
-                    "exchange_symbol": product["instId"],
-                }
+            product_refactored = {
+                "symbol": generated_symbol,
+                "exchange_id": product["instId"],
+                "exchange_symbol": product["instId"],
+            }
 
-                strike_price = product["stk"]
-                settlement_time = product["expTime"]
-                settlement_date = settlement_time
-                #settlement_date = settlement_time[:10] if settlement_time else None
-                duration = (datetime.datetime.strptime(settlement_date, "%Y-%m-%d").date() - datetime.date.today()).days if settlement_date else None
-
-                if not (contract_type := self.__compose_contract_type(product)):
-                    # Do not handle this product types
-                    continue
-                product_refactored["instType"] = contract_type
-                product_refactored["strike_price"] = float(strike_price) if strike_price else None
-                product_refactored["settlement_date"] = settlement_date
-                product_refactored["settlement_time"] = settlement_time
-                product_refactored["duration"] = duration
-                product_refactored["tick_size"] = float(product["tickSz"])
-                product_refactored["contract_size"] = float(product["lotSz"])
-                product_refactored["min_notional"] = float(product["minSz"])
-                product_refactored["base_asset_id"] = product["baseCcy"]
-                product_refactored["base_asset_symbol"] = product["baseCcy"]
-                product_refactored["quote_asset_id"] = product["quoteCcy"]
-                product_refactored["quote_asset_symbol"] = product["quoteCcy"]
-
-                data[generated_symbol] = product_refactored
-                self.__products[generated_symbol] = product_refactored
-
-            return data
-        else:
-            return self.__products
+            strike_price = product["stk"]
+            settlement_time = product["expTime"]
+            settlement_date = settlement_time
+            #settlement_date = settlement_time[:10] if settlement_time else None
+            duration = (datetime.datetime.strptime(settlement_date, "%Y-%m-%d").date() - datetime.date.today()).days if settlement_date else None
+
+            if not (contract_type := self.__compose_contract_type(product)):
+                # Do not handle this product types
+                continue
+            product_refactored["instType"] = contract_type
+            product_refactored["strike_price"] = float(strike_price) if strike_price else None
+            product_refactored["settlement_date"] = settlement_date
+            product_refactored["settlement_time"] = settlement_time
+            product_refactored["duration"] = duration
+            product_refactored["tick_size"] = float(product["tickSz"])
+            product_refactored["contract_size"] = float(product["lotSz"])
+            product_refactored["min_notional"] = float(product["minSz"])
+            product_refactored["base_asset_id"] = product["baseCcy"]
+            product_refactored["base_asset_symbol"] = product["baseCcy"]
+            product_refactored["quote_asset_id"] = product["quoteCcy"]
+            product_refactored["quote_asset_symbol"] = product["quoteCcy"]
+
+            data[generated_symbol] = product_refactored
+        return data
     #TOTEST
     def get_product(self, symbol):
         if not self.__products:
@@ -1562,10 +1576,26 @@ class OKX(CryptoConnector):
 
             signature_timestamp = timestamp
 
+        endpoint_class = "private" if auth else "public"
+        rate_limit_key = self.api_key if auth else None
+
+        # Idempotent requests are retried by the transport, each retry waits for the rate limiter
+        def on_retry(response):
+            if response is not None:
+                self.__update_rate_limit(response, rate_limit_key, endpoint_class)
+            self.__rate_limiter.acquire(self.PLATFORM_NAME, rate_limit_key, endpoint_class)
+            if auth:
+                # Signatures expire after a few seconds, the headers are sent again with a new one
+                timestamp = self.__get_timestamp()
+                headers['timestamp'] = timestamp
+                headers['signature'] = self.__generate_signature(method + timestamp + path + query_string + body_string)
+
         while retry > 0:
             try:
+                self.__rate_limiter.acquire(self.PLATFORM_NAME, rate_limit_key, endpoint_class)
                 bef_request_timestamp = self.__get_timestamp()
-                response = self.session.request(method, url, data=body_string, params=query, timeout=(3, 27), headers=headers)
+                response = self.session.request(method, url, data=body_string, params=query, timeout=(3, 27), headers=headers, on_retry=on_retry)
+                self.__update_rate_limit(response, rate_limit_key, endpoint_class)
                 af_request_timestamp = self.__get_timestamp()
                 parsed_response = self.__parse_response(response, parse)
                 break
@@ -1600,6 +1630,11 @@ class OKX(CryptoConnector):
 
         return parsed_response
 
+    def __update_rate_limit(self, response, rate_limit_key, endpoint_class):
+        if response.status_code == 429:
+            # Limits are counted over 2 seconds windows
+            self.__rate_limiter.penalize(self.PLATFORM_NAME, rate_limit_key, endpoint_class, 2)
+
     def __parse_response(self, response, parse="json"):
         status_code = response.status_code
         if status_code != 200:
@@ -1984,7 +2019,7 @@ class OKX(CryptoConnector):
             # Orderbook update
             elif event == "l2_orderbook":
 
-                symbol = [key for key, product in self.__products.items() if product["exchange_symbol"] == data["symbol"]][0]
+                symbol = self.__products_by_exchange_symbol[data["symbol"]]["symbol"]
 
                 data_refactored = {
                     "symbol": symbol,
@@ -2009,7 +2044,7 @@ class OKX(CryptoConnector):
             elif event == "mark_price":
 
                 product_symbol = data["symbol"].split(":")[1]
-                symbol = [key for key, product in self.__products.items() if product["exchange_symbol"] == product_symbol][0]
+                symbol = self.__products_by_exchange_symbol[product_symbol]["symbol"]
 
                 data_refactored = {
                     "symbol": symbol,
@@ -2020,7 +2055,7 @@ class OKX(CryptoConnector):
             elif event == "funding_rate":
 
                 product_symbol = data["symbol"]
-                symbol = [key for key, product in self.__products.items() if product["exchange_symbol"] == product_symbol][0]
+                symbol = self.__products_by_exchange_symbol[product_symbol]["symbol"]
 
                 data_refactored = {
                     "symbol": symbol,
@@ -2031,7 +2066,7 @@ class OKX(CryptoConnector):
             elif event == "v2/ticker":
 
                 product_symbol = data["symbol"]
-                symbol = [key for key, product in self.__products.items() if product["exchange_symbol"] == product_symbol][0]
+                symbol = self.__products_by_exchange_symbol[product_symbol]["symbol"]
 
                 data_refactored = {
                     "symbol": symbol,
@@ -2045,7 +2080,7 @@ class OKX(CryptoConnector):
                 if "action" in data and data["action"] == "snapshot":
                     return
 
-                symbol = [key for key, product in self.__products.items() if product["exchange_symbol"] == data["symbol"]][0]
+                symbol = self.__products_by_exchange_symbol[data["symbol"]]["symbol"]
 
                 data_refactored = {
                     "id": str(data["id"]),
@@ -4,6 +4,7 @@ from connectors.crypto.connector.exchanges.coinbase import CbForex
 from connectors.threading.Threads import format_traceback
 from connectors.crypto.common.logger import log
 from connectors.crypto.exceptions import *
+from connectors.crypto.connector.common.transport import get_transport
 from urllib.parse import urlencode
 from decimal import Decimal
 import websocket
@@ -33,7 +34,7 @@ class Woorton:
         self.strategy = strategy
         self.base_currency = base_currency
         self.database = strategy.database if strategy else None
-        self.session = requests.Session()
+        self.session = get_transport().session()
 
         if self.testing:
             self.base_url = "https://api.uat.woorton.net"
@@ -43,6 +44,7 @@ class Woorton:
             self.ws_url = "wss://socket.woorton.net/quotes"
 
         self.__products = {}
+        self.__products_by_exchange_symbol = {}
         self.__assets = {}
 
         self.__websocket_mutex = threading.Lock()
@@ -219,6 +221,9 @@ class Woorton:
                     "quote_asset_symbol": quote_asset_symbol,
                 }
                 self.__products[generated_symbol] = product_refactored
+
+            # Reverse index used to resolve websocket messages
+            self.__products_by_exchange_symbol = {product["exchange_symbol"]: product for product in self.__products.values()}
         return self.__products
 
     def get_product(self, symbol):
@@ -412,7 +417,7 @@ class Woorton:
                     "id": str(order_id),
                     "type": self.__compose_order_type(order),
                     "status": self.__compose_order_status(order),
-                    "symbol": next((product["symbol"] for product in self.__products.values() if product["exchange_symbol"] == pair), None),
+                    "symbol": self.__products_by_exchange_symbol.get(pair, {}).get("symbol"),
                     "exchange_id": pair,
                     "exchange_symbol": pair,
                     "side": order["descr"]["type"],
@@ -450,7 +455,7 @@ class Woorton:
             "id": str(order_id),
             "type": 'market' if response[0]['order_type'] =='MKT' else 'fill_or_kill',
             "status": self.__compose_order_status(response[0]),
-            "symbol": next((product["symbol"] for product in self.__products.values() if product["exchange_symbol"] == response[0]['instrument']), None),
+            "symbol": self.__products_by_exchange_symbol.get(response[0]['instrument'], {}).get("symbol"),
             "exchange_id": response[0]['instrument'],
             "exchange_symbol": response[0]['instrument'],
             "side": response[0]['side'],
@@ -507,7 +512,7 @@ class Woorton:
                 "id": str(order_id),
                 "type": self.__compose_order_type(order),
                 "status": self.__compose_order_status(order),
-                "symbol": next((product["symbol"] for product in self.__products.values() if product["exchange_symbol"] == pair), None),
+                "symbol": self.__products_by_exchange_symbol.get(pair, {}).get("symbol"),
                 "exchange_id": pair,
                 "exchange_symbol": pair,
                 "side": order["descr"]["type"],
@@ -1168,7 +1173,7 @@ class Woorton:
             event = data["event"]
 
             if event == "price":
-                symbol = [key for key, product in self.__products.items() if product["exchange_symbol"] == data["instrument"]][0]
+                symbol = self.__products_by_exchange_symbol[data["instrument"]]["symbol"]
 
                 data_refactored = {
                     "symbol": symbol,
@@ -1,6 +1,7 @@
 from connectors.crypto.connector.exchanges.coinbase import CbForex
 from connectors.crypto.common.logger import log
 from connectors.crypto.exceptions import *
+from connectors.crypto.connector.common.transport import get_transport
 from urllib.parse import urlencode
 from hashlib import sha256
 import datetime
@@ -167,7 +168,7 @@ class Fireblocks:
         self.strategy = strategy
         self.base_currency = base_currency
         self.database = strategy.database if strategy else None
-        self.session = requests.Session()
+        self.session = get_transport().session()
 
         if not os.path.isfile(api_secret_file_path):
             raise OSError(f"[ERROR] Fireblocks private key path '{api_secret_file_path}' doesn't exist or is not a file")
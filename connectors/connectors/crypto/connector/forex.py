@@ -1,4 +1,5 @@
 from connectors.crypto.common.logger import log
+from connectors.crypto.connector.common.transport import get_transport
 import requests
 import datetime
 
@@ -8,7 +9,7 @@ class Forex:
         #self.base_url = "https://theforexapi.com/api/"
         self.base_url = "https://cdn.jsdelivr.net/gh/fawazahmed0/currency-api@1"
         self.gold_url = 'https://forex-data-feed.swissquote.com/public-quotes/bboquotes/instrument/XAU/USD'
-        self.session = requests.Session()
+        self.session = get_transport().session()
 
     """
     def get_rate(self, base_currency, dest_currency, date=None):
@@ -1,4 +1,5 @@
 from connectors.crypto.connector.exchanges.coinbase import CbForex
+from connectors.crypto.connector.common.transport import get_transport
 from urllib.parse import urlencode
 import requests
 import datetime
@@ -12,7 +13,7 @@ class MevCapital:
         self.base_currency = base_currency
         self.base_url = "https://api.mevcapital.com"
 
-        self.session = requests.Session()
+        self.session = get_transport().session()
 
     def get_hedging(self):
         response = self.__request("GET", "/fxhedge", auth=True)
@@ -1,3 +1,4 @@
+from connectors.crypto.connector.common.transport import get_transport
 from urllib.parse import urlencode
 import requests
 import datetime
@@ -10,7 +11,7 @@ class Pappers:
         self.database = database
         self.base_url = "https://api.pappers.fr/v2/"
 
-        self.session = requests.Session()
+        self.session = get_transport().session()
 
     def get_company(self, siret=None):
         payload = {
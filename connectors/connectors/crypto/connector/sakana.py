@@ -1,3 +1,4 @@
+from connectors.crypto.connector.common.transport import get_transport
 import requests
 import json
 import time
@@ -9,7 +10,7 @@ class Sakana:
         self.password = password
         self.base_url = "https://api.sakana.capital"
 
-        self.session = requests.Session()
+        self.session = get_transport().session()
 
         self.__auth_token_ttl = 30
         self.__auth_token = None
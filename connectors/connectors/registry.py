@@ -0,0 +1,70 @@
+"""
+registry.py
+
+Per-platform registry of long-lived exchange connectors.
+"""
+
+from connectors.crypto.connector.common.platforms import Exchange
+from connectors.crypto.common.product_cache import ProductCatalogCache
+import threading
+
+class ConnectorRegistry():
+    '''
+    ConnectorRegistry class
+
+    Keep one public connector per platform alive across fetches.
+
+    Connectors are created on first use with empty API keys. Product catalogs live in the process-wide
+    ProductCatalogCache, which reloads them in background once older than 'products_ttl' seconds,
+    each access rebinds the connector to the current catalog.
+
+    Methods
+    -------
+    get(platform_id)
+        Returns the connector of the given platform.
+    '''
+
+    def __init__(self, products_ttl=3600, products_redis=None):
+        """
+        Parameters
+        ----------
+        products_ttl : float
+            Number of seconds after which a product catalog is reloaded.
+        products_redis : redis.Redis
+            Client used to share product catalogs with other processes, None to keep them in process.
+        """
+        ProductCatalogCache().configure(ttl=products_ttl, redis_client=products_redis)
+        self.__mutex = threading.Lock()
+        self.__platform_mutexes = {}
+        self.__connectors = {}
+
+    def get(self, platform_id):
+        """Returns the connector of the given platform.
+
+        Parameters
+        ----------
+        platform_id : int
+            The platform database id.
+
+        Returns
+        -------
+        CryptoConnector
+            The shared connector instance.
+        """
+        platform_id = int(platform_id)
+        if platform_id not in self.__connectors:
+            with self.__mutex:
+                platform_mutex = self.__platform_mutexes.setdefault(platform_id, threading.Lock())
+            with platform_mutex:
+                if platform_id not in self.__connectors:
+                    connector_class = Exchange(platform_id=platform_id).connector
+                    if connector_class is None:
+                        raise NotImplementedError(f"No connector for platform '{platform_id}'")
+                    connector = connector_class("", "")
+                    connector.get_products()
+                    self.__connectors[platform_id] = connector
+
+        connector = self.__connectors[platform_id]
+        # Cheap once cached, triggers the background reload of an expired catalog
+        connector.get_products()
+        return connector
@@ -0,0 +1,241 @@
+"""
+scheduler.py
+
+Rate-aware fetch scheduler for connectors instructions.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from connectors.crypto.common.logger import log
+from connectors.threading.Threads import format_traceback
+import collections
+import itertools
+import threading
+import heapq
+import math
+import time
+
+# Shortest period between two runs of an instruction, in seconds
+MIN_PERIOD = 0.1
+
+# Returned by a task that had nothing to fetch, counted as a miss rather than a successful run
+MISSED = object()
+
+class InstructionMetrics():
+    '''
+    InstructionMetrics class
+
+    Track how well an instruction rate is honoured.
+
+    Drift is the delay between the time a fetch was due and the time it actually started.
+    Jitter is the standard deviation of the drift.
+    Misses are runs that completed without producing a sample.
+    '''
+
+    def __init__(self):
+        self.runs = 0
+        self.errors = 0
+        self.misses = 0
+        self.overruns = 0
+        self.last_drift = 0.0
+        self.max_drift = 0.0
+        self.last_duration = 0.0
+        self.__mean_drift = 0.0
+        self.__m2_drift = 0.0
+
+    def add_run(self, drift, duration, success, missed=False):
+        self.runs += 1
+        if not success:
+            self.errors += 1
+        if missed:
+            self.misses += 1
+        self.last_drift = drift
+        self.max_drift = max(self.max_drift, drift)
+        self.last_duration = duration
+        # Welford online mean / variance
+        delta = drift - self.__mean_drift
+        self.__mean_drift += delta / self.runs
+        self.__m2_drift += delta * (drift - self.__mean_drift)
+
+    def to_dict(self):
+        return {
+            "runs": self.runs,
+            "errors": self.errors,
+            "misses": self.misses,
+            "overruns": self.overruns,
+            "last_drift": self.last_drift,
+            "mean_drift": self.__mean_drift,
+            "max_drift": self.max_drift,
+            "jitter": math.sqrt(self.__m2_drift / self.runs) if self.runs > 1 else 0.0,
+            "last_duration": self.last_duration,
+        }
+
+class FetchScheduler():
+    '''
+    FetchScheduler class
+
+    Run instructions at their configured rate on a worker pool.
+
+    Instructions are kept in a priority queue keyed by their next due time. Due instructions are
+    dispatched to a thread pool, with at most 'exchange_concurrency' fetches in flight per exchange.
+    Instructions waiting for an exchange slot are started as soon as a fetch on that exchange completes.
+
+    Methods
+    -------
+    set_instructions(instructions)
+        Replace the scheduled instructions.
+    run_pending()
+        Dispatch due instructions and returns the delay until the next one.
+    get_metrics()
+        Returns drift and jitter metrics per instruction id.
+    shutdown()
+        Stop the worker pool.
+    '''
+
+    def __init__(self, task, max_workers=8, exchange_concurrency=2, period=None, min_period=MIN_PERIOD):
+        """
+        Parameters
+        ----------
+        task : callable
+            Called with the instruction to run, from a worker thread. Returns MISSED when it had nothing to fetch.
+        max_workers : int
+            Size of the worker pool.
+        exchange_concurrency : int or dict
+            Maximum number of fetches in flight per exchange, either for every exchange
+            or as a dict keyed by exchange id (missing exchanges default to 1).
+        period : callable
+            Called with an instruction, returns the number of seconds between two runs.
+            Defaults to the instruction 'rate' in minutes. Periods shorter than 'min_period' are clamped.
+        min_period : float
+            Shortest number of seconds between two runs of an instruction.
+        """
+        self.__task = task
+        self.__period = period if period is not None else lambda instruction: instruction["rate"] * 60
+        self.__min_period = min_period
+        self.__executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fetch_worker")
+        self.__exchange_concurrency = exchange_concurrency
+        self.__mutex = threading.Lock()
+        self.__instructions = {}
+        self.__queue = []
+        self.__sequence = itertools.count()
+        self.__running = set()
+        self.__waiting_ids = set()
+        self.__in_flight = collections.Counter()
+        self.__waiting = collections.defaultdict(collections.deque)
+        self.__metrics = {}
+
+    def set_instructions(self, instructions):
+        """Replace the scheduled instructions.
+
+        Instructions already scheduled keep their due time, new ones are due immediately.
+
+        Parameters
+        ----------
+        instructions : list
+            The instructions dicts, identified by their 'id' key.
+        """
+        now = time.monotonic()
+        with self.__mutex:
+            due_times = {instruction_id: due for due, _, instruction_id in self.__queue}
+            self.__instructions = {instruction["id"]: instruction for instruction in instructions or []}
+            self.__queue = []
+            for instruction_id in self.__instructions.keys():
+                heapq.heappush(self.__queue, (due_times.get(instruction_id, now), next(self.__sequence), instruction_id))
+
+            # Drop removed instructions waiting for an exchange slot
+            for exchange in list(self.__waiting.keys()):
+                self.__waiting[exchange] = collections.deque((due, instruction_id) for due, instruction_id in self.__waiting[exchange]
+                                                             if instruction_id in self.__instructions)
+            self.__waiting_ids &= set(self.__instructions.keys())
+            self.__metrics = {instruction_id: self.__metrics.get(instruction_id, InstructionMetrics())
+                              for instruction_id in self.__instructions.keys()}
+
+    def run_pending(self):
+        """Dispatch due instructions.
+
+        Returns
+        -------
+        float
+            The number of seconds until the next instruction is due, None if nothing is scheduled.
+        """
+        now = time.monotonic()
+        with self.__mutex:
+            while self.__queue and self.__queue[0][0] <= now:
+                due, _, instruction_id = heapq.heappop(self.__queue)
+                instruction = self.__instructions[instruction_id]
+
+                # Schedule next run on a fixed rate, without accumulating drift
+                # A non positive period would keep the instruction due forever
+                period = max(self.__period(instruction), self.__min_period)
+                next_due = due + period
+                if next_due <= now:
+                    next_due = now + period
+                heapq.heappush(self.__queue, (next_due, next(self.__sequence), instruction_id))
+
+                if instruction_id in self.__running or instruction_id in self.__waiting_ids:
+                    self.__metrics[instruction_id].overruns += 1
+                    continue
+                self.__dispatch(instruction_id, due)
+
+            if not self.__queue:
+                return None
+            return max(0, self.__queue[0][0] - time.monotonic())
+
+    def get_metrics(self):
+        """Returns drift and jitter metrics per instruction id.
+
+        Returns
+        -------
+        dict
+            The metrics dicts keyed by instruction id.
+        """
+        with self.__mutex:
+            return {instruction_id: metrics.to_dict() for instruction_id, metrics in self.__metrics.items()}
+
+    def shutdown(self):
+        """Stop the worker pool, waiting for fetches in flight.
+        """
+        self.__executor.shutdown(wait=True)
+
+    def __get_exchange_limit(self, exchange):
+        if isinstance(self.__exchange_concurrency, dict):
+            return self.__exchange_concurrency.get(exchange, 1)
+        return self.__exchange_concurrency
+
+    def __dispatch(self, instruction_id, due):
+        # Called with mutex held
+        exchange = self.__instructions[instruction_id]["exchange"]
+        if self.__in_flight[exchange] >= self.__get_exchange_limit(exchange):
+            self.__waiting[exchange].append((due, instruction_id))
+            self.__waiting_ids.add(instruction_id)
+            return
+        self.__in_flight[exchange] += 1
+        self.__running.add(instruction_id)
+        self.__executor.submit(self.__run, self.__instructions[instruction_id], due)
+
+    def __run(self, instruction, due):
+        started = time.monotonic()
+        success = True
+        missed = False
+        try:
+            missed = self.__task(instruction) is MISSED
+        except Exception as e:
+            success = False
+            log(f"[FetchScheduler][ERROR] Instruction {instruction['id']} failed : {type(e).__name__} - {e}\n{format_traceback(e.__traceback__)}")
+        finally:
+            self.__on_done(instruction, due, started, success, missed)
+
+    def __on_done(self, instruction, due, started, success, missed):
+        exchange = instruction["exchange"]
+        with self.__mutex:
+            if instruction["id"] in self.__metrics:
+                self.__metrics[instruction["id"]].add_run(started - due, time.monotonic() - started, success, missed)
+            self.__running.discard(instruction["id"])
+            self.__in_flight[exchange] -= 1
+
+            # Start the oldest instruction waiting for this exchange
+            while self.__waiting[exchange]:
+                waiting_due, instruction_id = self.__waiting[exchange].popleft()
+                self.__waiting_ids.discard(instruction_id)
+                if instruction_id in self.__instructions and instruction_id not in self.__running:
+                    self.__dispatch(instruction_id, waiting_due)
+                    break
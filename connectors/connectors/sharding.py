@@ -0,0 +1,163 @@
+"""
+sharding.py
+
+Partition of the instructions between connectors workers.
+"""
+
+from connectors.crypto.common.logger import log
+import hashlib
+import bisect
+
+WORKERS_KEY = "connectors:workers"
+
+def hash_key(key):
+    """Returns the position of a key on the hash ring.
+
+    Parameters
+    ----------
+    key : str
+        The key.
+
+    Returns
+    -------
+    int
+        The 64 bits hash of the key, stable across processes.
+    """
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+class HashRing():
+    '''
+    HashRing class
+
+    Consistent hashing of keys onto workers.
+
+    Each worker is placed 'replicas' times on the ring, a key belongs to the first worker following
+    its hash. When a worker joins or leaves, only the keys of the ring arcs it takes or releases
+    change owner.
+
+    Methods
+    -------
+    get_owner(key)
+        Returns the worker owning the key.
+    '''
+
+    def __init__(self, workers, replicas=64):
+        """
+        Parameters
+        ----------
+        workers : list
+            The worker ids.
+        replicas : int
+            Number of points of each worker on the ring.
+        """
+        self.workers = sorted(workers)
+        points = sorted((hash_key(f"{worker}#{replica}"), worker) for worker in self.workers for replica in range(replicas))
+        self.__hashes = [point for point, _ in points]
+        self.__workers = [worker for _, worker in points]
+
+    def get_owner(self, key):
+        """Returns the worker owning the key.
+
+        Parameters
+        ----------
+        key : str
+            The key.
+
+        Returns
+        -------
+        str
+            The worker id, None if the ring is empty.
+        """
+        if not self.__hashes:
+            return None
+        index = bisect.bisect(self.__hashes, hash_key(key)) % len(self.__hashes)
+        return self.__workers[index]
+
+class ShardMembership():
+    '''
+    ShardMembership class
+
+    Track the live connectors workers through a Redis lease and tell which instructions this worker owns.
+
+    Every worker heartbeats into a sorted set scored with the Redis server time. Workers whose last
+    heartbeat is older than 'lease' seconds are considered dead and removed. Instructions are assigned
+    by consistent hashing of their (exchange, symbol) onto the live workers, so that a worker joining
+    or dying only moves its share of the instructions.
+
+    Methods
+    -------
+    heartbeat()
+        Renew the lease and refresh the live workers.
+    owns(instruction)
+        Tells if this worker shall run the instruction.
+    leave()
+        Release the lease so that the other workers take over immediately.
+    '''
+
+    def __init__(self, r, worker_id, lease=15, replicas=64):
+        """
+        Parameters
+        ----------
+        r : redis.Redis
+            The Redis client.
+        worker_id : str
+            The unique id of this worker.
+        lease : float
+            Number of seconds without heartbeat after which a worker is considered dead.
+            Heartbeats shall be sent several times per lease.
+        replicas : int
+            Number of points of each worker on the hash ring.
+        """
+        self.r = r
+        self.worker_id = worker_id
+        self.lease = lease
+        self.__replicas = replicas
+        # Until the first heartbeat, the worker only knows itself
+        self.ring = HashRing([worker_id], replicas)
+
+    def heartbeat(self):
+        """Renew the lease and refresh the live workers.
+
+        Returns
+        -------
+        bool
+            Whether the live workers changed, meaning instructions have to be rebalanced.
+        """
+        seconds, microseconds = self.r.time()
+        now = seconds + microseconds / 1e6
+
+        pipeline = self.r.pipeline()
+        pipeline.zadd(WORKERS_KEY, {self.worker_id: now})
+        pipeline.zremrangebyscore(WORKERS_KEY, "-inf", now - self.lease)
+        pipeline.zrange(WORKERS_KEY, 0, -1)
+        workers = pipeline.execute()[-1]
+        workers = [worker.decode() if isinstance(worker, bytes) else worker for worker in workers]
+
+        if sorted(workers) == self.ring.workers:
+            return False
+        log(f"[ShardMembership] Workers changed from {self.ring.workers} to {sorted(workers)}")
+        self.ring = HashRing(workers, self.__replicas)
+        return True
+
+    def owns(self, instruction):
+        """Tells if this worker shall run the instruction.
+
+        Parameters
+        ----------
+        instruction : dict
+            The instruction, with its 'exchange' and 'symbol'.
+
+        Returns
+        -------
+        bool
+            Whether the instruction is assigned to this worker.
+        """
+        return self.ring.get_owner(f"{instruction['exchange']}:{instruction['symbol']}") == self.worker_id
+
+    def leave(self):
+        """Release the lease so that the other workers take over immediately.
+        """
+        try:
+            self.r.zrem(WORKERS_KEY, self.worker_id)
+        except Exception as e:
+            log(f"[ShardMembership][ERROR] Unable to leave : {type(e).__name__} - {e}")
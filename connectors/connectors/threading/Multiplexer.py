@@ -0,0 +1,325 @@
+"""
+Multiplexer.py
+
+Process-wide websocket reader shared by every connector.
+"""
+
+from connectors.threading.Threads import StoppableThread, format_traceback
+import connectors.crypto.connector.common.websocket_codes as op_codes
+from connectors.crypto.common.logger import log
+import collections
+import itertools
+import selectors
+import threading
+import websocket
+import socket
+import queue
+
+websocket_exceptions = websocket._exceptions
+
+class WebsocketMultiplexer():
+    '''
+    WebsocketMultiplexer class
+
+    Watch every registered websocket from a single thread and read them from a fixed pool of workers.
+
+    A websocket is bound to one worker when it is registered. When it becomes readable, the watching
+    thread stops watching it and hands it to its worker, which reads and handles the available frames
+    then hands it back. The watching thread never blocks on a partial frame, frames of a websocket are
+    handled in reception order, and the thread count doesn't depend on the number of websockets.
+    A slow consumer leaves its websockets unread instead of buffering frames without limit.
+
+    Closing, either by a close frame or by a connection error, unregisters the websocket and runs its
+    'on_close' callback from a dedicated thread, once every frame received before has been handled,
+    so that reconnection loops don't hold a worker.
+
+    Methods
+    -------
+    register(websocket, on_frame, on_close)
+        Start reading a connected websocket.
+    unregister(websocket)
+        Stop reading a websocket.
+    stop()
+        Stop the reader and worker threads.
+    '''
+
+    def __init__(self, workers=4, queue_size=10000, read_timeout=5):
+        """
+        Parameters
+        ----------
+        workers : int
+            Number of threads running the frame callbacks.
+        queue_size : int
+            Maximum number of readable websockets waiting per worker.
+        read_timeout : float
+            Timeout applied to websockets created without one, so that a partial frame can't block a worker.
+        """
+        self.__read_timeout = read_timeout
+        self.__selector = selectors.DefaultSelector()
+        self.__mutex = threading.Lock()
+        self.__pending = collections.deque()
+        self.__handlers = {}
+        # Handlers handed over to a worker, not watched until it is done reading them
+        self.__reading = {}
+        self.__worker_ids = itertools.cycle(range(workers))
+
+        # Written to wake the reader up when registrations change
+        self.__wakeup_receiver, self.__wakeup_sender = socket.socketpair()
+        self.__wakeup_receiver.setblocking(False)
+        self.__wakeup_sender.setblocking(False)
+        self.__selector.register(self.__wakeup_receiver, selectors.EVENT_READ, None)
+
+        self.__queues = [queue.Queue(maxsize=queue_size) for _ in range(workers)]
+        self.__workers = [StoppableThread(name=f"websocket_worker_{worker_id}", target=self.__work, args=[worker_id], daemon=True)
+                          for worker_id in range(workers)]
+        self.__reader = StoppableThread(name="websocket_reader", target=self.__read, daemon=True)
+        self.__started = False
+
+    def register(self, websocket, on_frame, on_close=None):
+        """Start reading a connected websocket.
+
+        Parameters
+        ----------
+        websocket : websocket.WebSocket
+            The connected websocket. Registering it again replaces the previous callbacks.
+        on_frame : callable
+            Called with the websocket, the frame op code and the frame for every data frame.
+        on_close : callable
+            Called with the websocket once the connection has been closed.
+        """
+        if websocket.gettimeout() is None:
+            websocket.settimeout(self.__read_timeout)
+
+        handler = {
+            "websocket": websocket,
+            "on_frame": on_frame,
+            "on_close": on_close,
+            "worker_id": next(self.__worker_ids),
+            "fd": None,
+            # Cleared once unregistered or closed
+            "active": True,
+            # Unregister events set once the worker is done reading
+            "released": [],
+        }
+        self.__start()
+        self.__request("register", handler)
+
+    def unregister(self, websocket, wait=True, timeout=5):
+        """Stop reading a websocket.
+
+        Parameters
+        ----------
+        websocket : websocket.WebSocket
+            The websocket to forget, before closing it.
+        wait : bool
+            If 'True', returns once no thread reads the websocket anymore.
+        timeout : float
+            Maximum number of seconds to wait for the reading thread.
+        """
+        done = threading.Event()
+        self.__request("unregister", {"websocket": websocket, "done": done})
+        if wait and self.__started and threading.current_thread() not in [self.__reader, *self.__workers]:
+            if not done.wait(timeout):
+                log(f"[WebsocketMultiplexer][WARNING] Websocket {websocket} not released within {timeout}s")
+
+    def stop(self):
+        """Stop the reader and worker threads.
+        """
+        self.__reader.stop()
+        self.__wakeup()
+        for worker_queue in self.__queues:
+            worker_queue.put(None)
+
+    def __start(self):
+        with self.__mutex:
+            if not self.__started:
+                for worker in self.__workers:
+                    worker.start()
+                self.__reader.start()
+                self.__started = True
+
+    def __request(self, action, handler):
+        with self.__mutex:
+            self.__pending.append((action, handler))
+        self.__wakeup()
+
+    def __wakeup(self):
+        try:
+            self.__wakeup_sender.send(b"\0")
+        except BlockingIOError:
+            # Reader already has a pending wake up
+            pass
+
+    ##############
+    ### Reader ###
+    ##############
+
+    def __read(self):
+        while not self.__reader.is_stopped():
+            self.__apply_pending()
+            for key, _ in self.__selector.select(timeout=1):
+                if key.data is None:
+                    self.__drain_wakeup()
+                else:
+                    self.__hand_over(key.data)
+        self.__selector.close()
+
+    def __apply_pending(self):
+        with self.__mutex:
+            pending = list(self.__pending)
+            self.__pending.clear()
+
+        for action, handler in pending:
+            websocket = handler["websocket"]
+            if action == "register":
+                if websocket in self.__handlers:
+                    self.__forget(self.__handlers[websocket])
+                with self.__mutex:
+                    reading_handlers = self.__reading_handlers(websocket)
+                # A websocket registered again while read is left to the same worker, never read concurrently
+                if reading_handlers:
+                    handler["worker_id"] = reading_handlers[0]["worker_id"]
+                try:
+                    handler["fd"] = websocket.fileno()
+                    # A closed websocket may not have been unregistered before its descriptor was reused
+                    stale_key = self.__selector.get_map().get(handler["fd"])
+                    if stale_key is not None:
+                        self.__forget(stale_key.data)
+                    self.__selector.register(handler["fd"], selectors.EVENT_READ, handler)
+                    self.__handlers[websocket] = handler
+                except Exception as e:
+                    log(f"[WebsocketMultiplexer][ERROR] Unable to register websocket {websocket} : {type(e).__name__} - {e}")
+            elif action == "rearm":
+                self.__rearm(handler)
+            elif action == "closed":
+                if self.__handlers.get(websocket) is handler:
+                    del self.__handlers[websocket]
+            else:
+                if websocket in self.__handlers:
+                    self.__forget(self.__handlers[websocket])
+                with self.__mutex:
+                    reading_handlers = self.__reading_handlers(websocket)
+                    for reading_handler in reading_handlers:
+                        reading_handler["released"].append(handler["done"])
+                if not reading_handlers:
+                    handler["done"].set()
+
+    def __reading_handlers(self, websocket):
+        # Handlers of the websocket a worker is reading, called with mutex held
+        return [handler for handler in self.__reading.values() if handler["websocket"] is websocket]
+
+    def __drain_wakeup(self):
+        try:
+            while self.__wakeup_receiver.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def __hand_over(self, handler):
+        # The websocket is not watched until its worker is done reading it
+        self.__selector.unregister(handler["fd"])
+        with self.__mutex:
+            self.__reading[id(handler)] = handler
+        # Blocks when the worker is late, which slows down watching instead of buffering
+        self.__queues[handler["worker_id"]].put(handler)
+
+    def __rearm(self, handler):
+        if self.__handlers.get(handler["websocket"]) is not handler:
+            return
+        try:
+            self.__selector.register(handler["fd"], selectors.EVENT_READ, handler)
+        except Exception as e:
+            log(f"[WebsocketMultiplexer][ERROR] Unable to watch websocket {handler['websocket']} again : {type(e).__name__} - {e}")
+            self.__forget(handler)
+
+    def __forget(self, handler):
+        with self.__mutex:
+            handler["active"] = False
+        if self.__handlers.get(handler["websocket"]) is handler:
+            del self.__handlers[handler["websocket"]]
+        key = self.__selector.get_map().get(handler["fd"])
+        if key is not None and key.data is handler:
+            self.__selector.unregister(handler["fd"])
+
+    ###############
+    ### Workers ###
+    ###############
+
+    def __work(self, worker_id):
+        worker_queue = self.__queues[worker_id]
+        while True:
+            handler = worker_queue.get()
+            if handler is None:
+                return
+            closed = self.__receive(handler)
+
+            with self.__mutex:
+                self.__reading.pop(id(handler), None)
+                released, handler["released"] = handler["released"], []
+                active = handler["active"]
+                if closed:
+                    handler["active"] = False
+            for done in released:
+                done.set()
+
+            if not active:
+                continue
+            if closed:
+                self.__request("closed", handler)
+                if handler["on_close"]:
+                    threading.Thread(name=f"websocket_on_close_{hex(id(handler['websocket']))}", target=self.__run_callback,
+                                     args=[handler["on_close"], handler["websocket"]], daemon=True).start()
+            else:
+                self.__request("rearm", handler)
+
+    def __receive(self, handler):
+        # Returns whether the connection has been closed
+        websocket = handler["websocket"]
+        while True:
+            try:
+                # Control frames are returned, otherwise a ping on a quiet websocket blocks the worker until the next data frame
+                op_code, frame = websocket.recv_data_frame(control_frame=True)
+            except websocket_exceptions.WebSocketTimeoutException:
+                log(f"[WebsocketMultiplexer][RECEIVE] Read timeout on {websocket}")
+                return False
+            except (websocket_exceptions.WebSocketConnectionClosedException, OSError) as e:
+                if handler["active"]:
+                    log(f"[WebsocketMultiplexer][RECEIVE] Connection closed on {websocket} : {type(e).__name__} - {e}")
+                return True
+            except Exception as e:
+                log(f"[WebsocketMultiplexer][ERROR] Unable to receive on {websocket} : {type(e).__name__} - {e}\n{format_traceback(e.__traceback__)}")
+                return False
+
+            if op_code == op_codes.OPCODE_CLOSE:
+                return True
+            # Pings are answered by the websocket itself, neither pings nor pongs reach the callbacks
+            if op_code not in [op_codes.OPCODE_PING, op_codes.OPCODE_PONG] and handler["active"]:
+                self.__run_callback(handler["on_frame"], websocket, op_code, frame)
+
+            # Frames already decrypted by the TLS layer are not signaled by the selector
+            sock = websocket.sock
+            if sock is None or not hasattr(sock, "pending") or sock.pending() == 0:
+                return False
+
+    def __run_callback(self, callback, *args):
+        try:
+            callback(*args)
+        except Exception as e:
+            log(f"[WebsocketMultiplexer][ERROR] Exception occured into websocket callback : {type(e).__name__} - {e}\n{format_traceback(e.__traceback__)}")
+
+shared_multiplexer = None
+shared_multiplexer_mutex = threading.Lock()
+
+def get_multiplexer():
+    """Returns the websocket multiplexer shared by the whole process.
+
+    Returns
+    -------
+    WebsocketMultiplexer
+        The shared instance, created on first call.
+    """
+    global shared_multiplexer
+    with shared_multiplexer_mutex:
+        if shared_multiplexer is None:
+            shared_multiplexer = WebsocketMultiplexer()
+        return shared_multiplexer
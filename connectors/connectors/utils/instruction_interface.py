@@ -21,6 +21,8 @@ class Rate(Enum):
     
 class DataType(Enum):
     ORDERBOOK = "orderbook"
+    # sampled from a websocket book, 'rate' is in milliseconds
+    ORDERBOOK_STREAM = "orderbook_stream"
     OPTION = "option"
     """
     coming up: FUTURE, UNISWAP, ONCHAIN
@@ -1,47 +1,108 @@
 from connectors.core import Core
+from connectors.sharding import ShardMembership
 import redis
 import json
 # import yaml
 # import sys
 
 from dotenv import load_dotenv
+import signal
+import socket
+import time
+import sys
 import os
 
 load_dotenv()
 
 REDIS_HOST = os.getenv('REDIS_HOST')
+SEND_DATA_INTERVAL = float(os.getenv('SEND_DATA_INTERVAL', 1))
+METRICS_INTERVAL = float(os.getenv('METRICS_INTERVAL', 60))
+MAX_WORKERS = int(os.getenv('MAX_WORKERS', 8))
+EXCHANGE_CONCURRENCY = int(os.getenv('EXCHANGE_CONCURRENCY', 2))
+PRODUCTS_TTL = float(os.getenv('PRODUCTS_TTL', 3600))
+# 'redis' shares product catalogs between connector processes, 'memory' keeps them per process
+PRODUCTS_CACHE = os.getenv('PRODUCTS_CACHE', 'memory')
+STREAM_MAXLEN = int(os.getenv('STREAM_MAXLEN', 100000))
+# instructions are shared between the workers alive, each one shall have its own id
+WORKER_ID = os.getenv('WORKER_ID', socket.gethostname())
+WORKER_LEASE = float(os.getenv('WORKER_LEASE', 15))
+HEARTBEAT_INTERVAL = float(os.getenv('HEARTBEAT_INTERVAL', 5))
+# websocket books without update for longer are not sampled
+BOOK_MAX_AGE = float(os.getenv('BOOK_MAX_AGE', 60))
+# shortest period between two samples of a book, in seconds
+MIN_SAMPLE_PERIOD = float(os.getenv('MIN_SAMPLE_PERIOD', 0.1))
 
 
 SUB_KEY = "connector_request"
+# last instructions broadcast by the collector, read by workers joining afterwards
+LAST_INSTRUCTIONS_KEY = "connector_request:last"
 
 
-def stream(core_model, r):
-    p = r.pubsub()
+def process_message(core_model, data):
+    """
+    apply instructions broadcast by the collector, returns whether they were applied
+    """
+    try:
+        instructions = json.loads(data)
+    except TypeError:
+        instructions = None
+    if isinstance(instructions, dict):
+        if instructions["from"] == "collector":
+            core_model.negotiate_codec(instructions.get("codecs"))
+            core_model.process_instructions(instructions["data"])
+            return True
+    return False
+
+def stream(core_model, membership, r):
+    p = r.pubsub(ignore_subscribe_messages=True)
     p.psubscribe(SUB_KEY)
+    # subscribed first so that no broadcast is missed between both
+    if (last_instructions := r.get(LAST_INSTRUCTIONS_KEY)) is not None:
+        process_message(core_model, last_instructions)
+    next_sending = time.monotonic()
+    next_metrics = time.monotonic() + METRICS_INTERVAL
+    next_heartbeat = time.monotonic() + HEARTBEAT_INTERVAL
     while True:
-        # listen to odd_request
-        message = p.get_message()
+        # periodic work runs on its own timer, independently of the message rate
+        now = time.monotonic()
+        if now >= next_heartbeat:
+            if membership.heartbeat():
+                core_model.rebalance()
+                # instructions taken over are due immediately
+                next_sending = time.monotonic()
+            next_heartbeat = time.monotonic() + HEARTBEAT_INTERVAL
+        if now >= next_sending:
+            next_due = core_model.send_data(r)
+            next_sending = time.monotonic() + min(next_due if next_due is not None else SEND_DATA_INTERVAL, SEND_DATA_INTERVAL)
+        if now >= next_metrics:
+            core_model.publish_metrics(r)
+            next_metrics = time.monotonic() + METRICS_INTERVAL
+
+        # block until a message arrives or the next periodic work is due
+        message = p.get_message(timeout=max(0, min(next_sending, next_metrics, next_heartbeat) - time.monotonic()))
         if message is not None and isinstance(message, dict) :
-            # print(message["data"])
-            # print(isinstance(message["data"], dict))
-            try:
-                instructions = json.loads(message["data"])
-            except TypeError:
-                instructions = None
-            if isinstance(instructions, dict):
-                if instructions["from"] == "collector":
-                    core_model.process_instructions(instructions["data"])
-                    
-        core_model.send_data(r)
+            if process_message(core_model, message["data"]):
+                # new instructions are due immediately
+                next_sending = time.monotonic()
                 
 
 
 if __name__ == "__main__":
     # global_config = yaml.safe_load(open(sys.argv[1], "r"))
+    # 'docker stop' and scale downs send SIGTERM, exiting through 'finally' releases the lease right away
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
     r = redis.Redis(REDIS_HOST, 6379, charset="utf-8", decode_responses=True)
     print("SETUP INSTANCE")
-    core_model = Core()
+    membership = ShardMembership(r, WORKER_ID, lease=WORKER_LEASE)
+    # join before taking any instruction, so that other workers give up their share
+    membership.heartbeat()
+    core_model = Core(max_workers=MAX_WORKERS, exchange_concurrency=EXCHANGE_CONCURRENCY, products_ttl=PRODUCTS_TTL,
+                      products_redis=r if PRODUCTS_CACHE == "redis" else None, stream_maxlen=STREAM_MAXLEN,
+                      membership=membership, book_max_age=BOOK_MAX_AGE,
+                      min_sample_period=MIN_SAMPLE_PERIOD)
     print("STREAM")
 
-
-    stream(core_model,r)
\ No newline at end of file
+    try:
+        stream(core_model, membership, r)
+    finally:
+        core_model.close()
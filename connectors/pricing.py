@@ -0,0 +1,31 @@
+from connectors.crypto.common.pricing_client import PricingClient
+import redis
+
+from dotenv import load_dotenv
+import signal
+import time
+import sys
+import os
+
+load_dotenv()
+
+REDIS_HOST = os.getenv('REDIS_HOST')
+PRICING_MAX_AGE = float(os.getenv('PRICING_MAX_AGE', 5))
+PRICING_IDLE_TIMEOUT = float(os.getenv('PRICING_IDLE_TIMEOUT', 600))
+
+
+if __name__ == "__main__":
+    # 'docker stop' sends SIGTERM, exiting through 'finally' unsubscribes from the exchanges
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    # Serve prices to the RedisPricingClient of other processes
+    r = redis.Redis(REDIS_HOST, 6379, charset="utf-8", decode_responses=True)
+    print("SETUP PRICING")
+    pricing_client = PricingClient(max_age=PRICING_MAX_AGE, idle_timeout=PRICING_IDLE_TIMEOUT, redis_client=r)
+    print("SERVE")
+
+    try:
+        while True:
+            time.sleep(60)
+    finally:
+        pricing_client.close()
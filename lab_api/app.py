@@ -1,5 +1,8 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from starlette.concurrency import run_in_threadpool
 import uvicorn
+import redis
 
 from lab_api.utils import request_interface
 from lab_api.core import Core
@@ -12,11 +15,27 @@ DATABASE_CONFIG = {
         "ip":os.getenv('IP'),
         "user":os.getenv('USER'),
         "password":os.getenv('PASSWORD'),
-        "dbName":os.getenv('DBNAME')
+        "dbName":os.getenv('DBNAME'),
+        "pool":{
+            "pool_size":int(os.getenv('DB_POOL_SIZE', 5)),
+            "max_overflow":int(os.getenv('DB_MAX_OVERFLOW', 10)),
+            "pool_recycle":int(os.getenv('DB_POOL_RECYCLE', 3600)),
+        }
     }
+REDIS_HOST = os.getenv('REDIS_HOST')
 
+redis_client = redis.Redis(REDIS_HOST, 6379, decode_responses=True) if REDIS_HOST else None
 
-app = FastAPI(root_path="/prod")
+
+@asynccontextmanager
+async def lifespan(app:FastAPI):
+    # One Core, and so one database connection pool, per worker process
+    app.state.core_model = Core(database_config=DATABASE_CONFIG, redis_client=redis_client)
+    yield
+    app.state.core_model.close()
+
+
+app = FastAPI(root_path="/prod", lifespan=lifespan)
 
 
 @app.get("/")
@@ -33,28 +52,44 @@ async def root() -> dict:
 
 
 @app.post("/add_instruction")
-async def add_instruction(request:request_interface.InstructionBody) -> dict:
-    core_model = Core(database_config=DATABASE_CONFIG) 
-    status = core_model.add_instruction(instruction_table=request.table, instruction=request.instruction)
-    return {"status": status}
+async def add_instruction(request:request_interface.InstructionBody, http_request:Request) -> dict:
+    core_model = http_request.app.state.core_model
+    instruction = request.instruction.model_dump()
+    status = await run_in_threadpool(core_model.add_instruction, instruction_table=request.table, instruction=instruction)
+    return {"status": status, "id": instruction.get("id")}
 
 
 @app.post("/remove_instruction")
-async def remove_instruction(request:request_interface.InstructionBody) -> dict:
-    core_model = Core(database_config=DATABASE_CONFIG) 
-    status = core_model.remove_instruction(instruction_table=request.table, instruction=request.instruction)
+async def remove_instruction(request:request_interface.InstructionBody, http_request:Request) -> dict:
+    core_model = http_request.app.state.core_model
+    status = await run_in_threadpool(core_model.remove_instruction, instruction_table=request.table, instruction=request.instruction.model_dump())
     return {"status": status}
 
+@app.post("/add_instructions")
+async def add_instructions(request:request_interface.InstructionsBody, http_request:Request) -> dict:
+    core_model = http_request.app.state.core_model
+    instructions = [instruction.model_dump() for instruction in request.instructions]
+    results = await run_in_threadpool(core_model.add_instructions, instruction_table=request.table, instructions=instructions)
+    return {"status": "Success", "data": results}
+
+
+@app.post("/remove_instructions")
+async def remove_instructions(request:request_interface.InstructionsBody, http_request:Request) -> dict:
+    core_model = http_request.app.state.core_model
+    instructions = [instruction.model_dump() for instruction in request.instructions]
+    results = await run_in_threadpool(core_model.remove_instructions, instruction_table=request.table, instructions=instructions)
+    return {"status": "Success", "data": results}
+
 @app.post("/display_instructions")
-async def display_instructions(request:request_interface.DisplayBody) -> dict:
-    core_model = Core(database_config=DATABASE_CONFIG) 
-    instructions = core_model.display_instructions(instruction_table=request.table)
+async def display_instructions(request:request_interface.DisplayBody, http_request:Request) -> dict:
+    core_model = http_request.app.state.core_model
+    instructions = await run_in_threadpool(core_model.display_instructions, instruction_table=request.table)
     return {"status": "Success", "data":instructions}
 
 @app.post("/remove_all_instructions")
-async def remove_all_instructions(request:request_interface.DisplayBody) -> dict:
-    core_model = Core(database_config=DATABASE_CONFIG) 
-    status = core_model.remove_all_instructions(instruction_table=request.table)
+async def remove_all_instructions(request:request_interface.DisplayBody, http_request:Request) -> dict:
+    core_model = http_request.app.state.core_model
+    status = await run_in_threadpool(core_model.remove_all_instructions, instruction_table=request.table)
     return {"status": status}
 
 if __name__ == "__main__":
@@ -1,29 +1,60 @@
-from .utils import Database
+from .utils import Database, InstructionNotifier
 from .instruction_manager import InstructionManager
 
 
 class Core():
-    def __init__(self, database_config) -> None:
+    def __init__(self, database_config, redis_client=None) -> None:
         self.database = Database(ip=database_config["ip"],
                                  user=database_config["user"],
                                  password=database_config["password"],
-                                 dbName=database_config["dbName"])
-        self.database.connect()
+                                 dbName=database_config["dbName"],
+                                 **database_config.get("pool", {}))
+        # Queries borrow connections from the database pool, the instance is shared between requests
         self.instruction_manager = InstructionManager(database=self.database)
-        
+        self.notifier = InstructionNotifier(redis_client) if redis_client else None
+
+    def close(self):
+        """
+        close the pooled database connections
+        """
+        self.database.disconnect()
+
     #----------------INSTRUCTION MANAGER-------------
     def display_instructions(self, instruction_table):
         return self.instruction_manager.display_instructions(instruction_table)
-    
+
     def remove_all_instructions(self, instruction_table):
-        return self.instruction_manager.remove_all_instructions(instruction_table)
-    
-    
+        status = self.instruction_manager.remove_all_instructions(instruction_table)
+        self.__notify(instruction_table, status)
+        return status
+
+
     def add_instruction(self, instruction_table, instruction):
-        return self.instruction_manager.add_instruction(instruction_table, instruction)
+        status = self.instruction_manager.add_instruction(instruction_table, instruction)
+        self.__notify(instruction_table, status)
+        return status
 
     def remove_instruction(self, instruction_table, instruction):
-        return self.instruction_manager.remove_instruction(instruction_table, instruction)
+        status = self.instruction_manager.remove_instruction(instruction_table, instruction)
+        self.__notify(instruction_table, status)
+        return status
+
+    def add_instructions(self, instruction_table, instructions):
+        results = self.instruction_manager.add_instructions(instruction_table, instructions)
+        self.__notify(instruction_table, *[result["status"] for result in results])
+        return results
+
+    def remove_instructions(self, instruction_table, instructions):
+        results = self.instruction_manager.remove_instructions(instruction_table, instructions)
+        self.__notify(instruction_table, *[result["status"] for result in results])
+        return results
+
+    def __notify(self, instruction_table, *statuses):
+        """
+        publish a single change event when the instruction table has been mutated
+        """
+        if self.notifier and "Success" in statuses:
+            self.notifier.notify(instruction_table)
+
+
 
-        
-    
\ No newline at end of file
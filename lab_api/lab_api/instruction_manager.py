@@ -1,4 +1,8 @@
-import pandas as pd
+from pymysql.constants import ER
+import pymysql
+
+# Instructions are unique on these columns, see 'scripts/create_table.py'
+INSTRUCTION_KEY = ["exchange", "symbol", "rate", "data_type"]
 
 class InstructionManager():
     def __init__(self, database):
@@ -7,42 +11,86 @@ class InstructionManager():
     def display_instructions(self, instruction_table):
         df = self.database.getTable(instruction_table)
         return df.to_dict(orient='records')
-    
 
-        
-    def is_instruction_exist(self, instruction_table, instruction):
-        instruction.pop("id", None)
 
-        instruction_already_exist = False
-        instruction_id = None
-        instructions_inside_db = self.database.getTable(instruction_table)
-        instructions_inside_db = instructions_inside_db.to_dict(orient='records')
-        for existing_instruction in instructions_inside_db:
-            id = existing_instruction.pop("id", None)
-            if instruction == existing_instruction:
-                instruction_already_exist = True
-                instruction_id = id
-        if instruction_id is None:
-            instruction_id = len(instructions_inside_db) + 1
-        return instruction_already_exist, instruction_id
-        
+
+    def get_instruction_id(self, instruction_table, instruction):
+        """
+        id of the instruction through the composite unique index, None if it does not exist
+        """
+        rows = self.database.execute(self.__select_id_query(instruction_table), self.__key(instruction), fetch=True)
+        if rows:
+            return rows[0][0]
+        return None
+
     def add_instruction(self, instruction_table, instruction):
-        instruction_already_exist,instruction_id = self.is_instruction_exist(instruction_table, instruction)
-        instruction["id"] = instruction_id
-        if not instruction_already_exist:
-            self.database.append_to_table(instruction_table, pd.DataFrame([instruction]))
+        instruction.pop("id", None)
+        try:
+            _, instruction["id"] = self.database.execute_write(self.__insert_query(instruction_table), self.__key(instruction))
             return "Success"
+        except pymysql.err.IntegrityError as e:
+            if e.args[0] != ER.DUP_ENTRY:
+                raise
+        instruction["id"] = self.get_instruction_id(instruction_table, instruction)
         return "Already exist"
 
     def remove_instruction(self, instruction_table, instruction):
-        instruction_already_exist, instruction_id = self.is_instruction_exist(instruction_table, instruction)
-        if instruction_already_exist:
-            update_users_sql = f"DELETE FROM {instruction_table} WHERE id = {instruction_id}"
-            self.database.execute(update_users_sql)
+        instruction.pop("id", None)
+        affected_rows, _ = self.database.execute_write(self.__delete_query(instruction_table), self.__key(instruction))
+        if affected_rows:
             return "Success"
         return "Instruction not exist"
-    
+
+    def add_instructions(self, instruction_table, instructions):
+        """
+        add a list of instructions in one transaction, returns one {"status", "id"} dict per instruction
+        """
+        results = []
+        with self.database.transaction() as cursor:
+            for instruction in instructions:
+                try:
+                    # a duplicate key only fails its own statement, the transaction goes on
+                    cursor.execute(self.__insert_query(instruction_table), self.__key(instruction))
+                    results.append({"status": "Success", "id": cursor.lastrowid})
+                except pymysql.err.IntegrityError as e:
+                    if e.args[0] != ER.DUP_ENTRY:
+                        raise
+                    cursor.execute(self.__select_id_query(instruction_table), self.__key(instruction))
+                    results.append({"status": "Already exist", "id": cursor.fetchone()[0]})
+        return results
+
+    def remove_instructions(self, instruction_table, instructions):
+        """
+        remove a list of instructions in one transaction, returns one {"status"} dict per instruction
+        """
+        results = []
+        with self.database.transaction() as cursor:
+            for instruction in instructions:
+                cursor.execute(self.__delete_query(instruction_table), self.__key(instruction))
+                results.append({"status": "Success" if cursor.rowcount else "Instruction not exist"})
+        return results
+
     def remove_all_instructions(self, instruction_table):
         update_users_sql = f"DELETE FROM {instruction_table}"
         self.database.execute(update_users_sql)
-        return "Success"
\ No newline at end of file
+        return "Success"
+
+    @staticmethod
+    def __key(instruction):
+        return [instruction[column] for column in INSTRUCTION_KEY]
+
+    @staticmethod
+    def __insert_query(instruction_table):
+        columns = ", ".join(INSTRUCTION_KEY)
+        placeholders = ", ".join(["%s"] * len(INSTRUCTION_KEY))
+        return f"INSERT INTO {instruction_table} ({columns}) VALUES ({placeholders})"
+
+    @staticmethod
+    def __select_id_query(instruction_table):
+        conditions = " AND ".join([f"{column} = %s" for column in INSTRUCTION_KEY])
+        return f"SELECT id FROM {instruction_table} WHERE {conditions}"
+
+    @staticmethod
+    def __delete_query(instruction_table):
+        conditions = " AND ".join([f"{column} = %s" for column in INSTRUCTION_KEY])
+        return f"DELETE FROM {instruction_table} WHERE {conditions}"
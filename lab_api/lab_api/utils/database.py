@@ -5,11 +5,16 @@ Database module for Myfo.
 """
 
 from sqlalchemy import create_engine
+from contextlib import contextmanager
 import pandas as pd
 import numpy as np
-import threading
 import pymysql
 
+# numpy floats are sent as plain floats, patched once for every connection
+pymysql.converters.encoders[np.float64] = pymysql.converters.escape_float
+pymysql.converters.conversions = pymysql.converters.encoders.copy()
+pymysql.converters.conversions.update(pymysql.converters.decoders)
+
 class Table():
     '''
     Table class
@@ -42,7 +47,7 @@ class Table():
         self.__name = name
         self.__db = database
 
-    def getDataframe(self, columns=None, arg="", headers=None):
+    def getDataframe(self, columns=None, arg="", headers=None, params=None):
         """Return the formatted table dataframe.
 
         Parameters
@@ -54,6 +59,8 @@ class Table():
             Additionnal arguments to pass to SQL query.
         header : list
             Names of dataframe columns. If empty uses 'columns' names
+        params : tuple or list
+            The params passed as values to the '%s' placeholders of 'arg'.
 
         Returns
         -------
@@ -75,8 +82,8 @@ class Table():
             select = "*"
             columns = self.getColumns()
 
-        rawDataframe = self.__db.extract(self.__name, select, arg)
-        dataframe = pd.DataFrame(list(rawDataframe), columns=columns)
+        rawDataframe = self.__db.extract(self.__name, select, arg, params=params)
+        dataframe = pd.DataFrame.from_records(rawDataframe, columns=columns, nrows=len(rawDataframe))
         return dataframe
 
     def getColumns(self):
@@ -95,20 +102,32 @@ class Database():
 
     Represent a database.
 
+    Queries are run on connections borrowed from the SQLAlchemy engine pool: each calling
+    thread gets its own connection for the duration of a call, so a Database instance can
+    be shared between threads without serializing them.
+
     Methods
     -------
-    setTables(tables)
-        Set the given dictionary as the database table list
     getTable(table)
         Extract the given table and returns its dataframe.
+    getTableChunked(table, chunksize, columns, where)
+        Iterate over a table by dataframes of 'chunksize' rows.
+    append_to_table(table, dataframe)
+        Append a dataframe to the given table.
     connect()
         Connects to database.
     disconnect()
         Disconnects from database.
-    execute(query, fetch)
-        Stack an SQL query to be sent.
-    extract()
-        "Extract data from table using composed query.
+    execute(query, params, fetch)
+        Execute and commit an SQL query.
+    execute_write(query, params)
+        Execute a write query and returns affected rows and last inserted id.
+    insert_rows(table, columns, rows, ignore)
+        Insert several rows with a single multi-row INSERT query.
+    transaction()
+        Context manager yielding a cursor whose queries are committed together.
+    extract(table, select, arg, params)
+        Extract data from table using composed query.
     '''
     isConnected = False
     engine = None
@@ -116,10 +135,8 @@ class Database():
     __ip = None
     __user = None
     __password = None
-    __connection = None
-    __cursor = None
 
-    def __init__(self, ip, user, password, dbName):
+    def __init__(self, ip, user, password, dbName, pool_size=5, max_overflow=10, pool_recycle=3600):
         """
         Parameters
         ----------
@@ -131,20 +148,30 @@ class Database():
             The user password.
         dbName : str
             The name of the database.
+        pool_size : int
+            Number of connections kept open in the engine pool.
+        max_overflow : int
+            Number of connections allowed above 'pool_size' under load.
+        pool_recycle : int
+            Number of seconds after which a pooled connection is replaced,
+            below the MySQL 'wait_timeout'.
         """
         self.__ip = ip
         self.__user = user
         self.__password = password
-        self.__mutex = threading.Lock()
         self.dbName = dbName
 
         self.engine = create_engine("mysql+pymysql://{user}:{pw}@{ip}/{db}"
             .format(user=self.__user,
                     pw=self.__password,
                     ip=self.__ip,
-                    db=self.dbName))
+                    db=self.dbName),
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_recycle=pool_recycle,
+            pool_pre_ping=True)
 
-    def getTable(self, table, columns=None, arg="", headers=None):
+    def getTable(self, table, columns=None, arg="", headers=None, params=None):
         """Extract the given table and returns its dataframe.
 
         Parameters
@@ -158,35 +185,95 @@ class Database():
             Additionnal arguments to pass to SQL query.
         header : list
             Names of dataframe columns. If empty uses 'columns' names
+        params : tuple or list
+            The params passed as values to the '%s' placeholders of 'arg'.
 
         Returns
         -------
         pandas.DataFrame
             The table dataframe.
         """
-        return Table(self, table).getDataframe(columns=columns, arg=arg, headers=headers)
+        return Table(self, table).getDataframe(columns=columns, arg=arg, headers=headers, params=params)
 
     def append_to_table(self, table, dataframe):
-        self.__mutex.acquire()
+        """Append a dataframe to the given table.
+
+        Parameters
+        ----------
+        table : str
+            The table name.
+        dataframe : pandas.DataFrame
+            The rows to append, columns named as the table columns.
+        """
+        dataframe.to_sql(table, con=self.engine, if_exists='append', index=False)
+
+    def getTableChunked(self, table, chunksize=10000, columns=None, where=None, arg="", params=None):
+        """Iterate over a table by dataframes of 'chunksize' rows.
+
+        Rows are streamed from the server through an unbuffered cursor, so memory usage
+        only depends on 'chunksize', whatever the table size.
+
+        Parameters
+        ----------
+        table : str
+            The table to extract.
+        chunksize : int
+            Number of rows per dataframe.
+        columns : list
+            The columns to be extracted. Defaults to every column.
+        where : dict
+            Equality conditions keyed by column. A list or tuple value is turned into an
+            'IN' condition and None into 'IS NULL'.
+        arg : str
+            Additionnal arguments appended to the SQL query, such as 'ORDER BY'.
+        params : tuple or list
+            The params passed as values to the '%s' placeholders of 'arg'.
+
+        Yields
+        ------
+        pandas.DataFrame
+            The next 'chunksize' rows of the table, the last one may be shorter.
+        """
+        if not columns:
+            columns = Table(self, table).getColumns()
+        conditions, where_params = self.__build_where(where)
+        sql_query = "SELECT {} FROM {} {} {}".format(", ".join(columns), table, conditions, arg)
+        query_params = where_params + list(params or [])
+
+        connection = self.engine.raw_connection()
+        cursor = connection.cursor(pymysql.cursors.SSCursor)
+        exhausted = False
         try:
-            dataframe.to_sql(table, con=self.engine, if_exists='append', index=False)
+            cursor.execute(sql_query, query_params or None)
+            while True:
+                rows = cursor.fetchmany(chunksize)
+                if not rows:
+                    exhausted = True
+                    break
+                yield pd.DataFrame.from_records(rows, columns=columns, nrows=len(rows))
         finally:
-            self.__mutex.release()
-
-    def getTableChunked(self, table):
-        columns = [column[0] for column in self.execute("SHOW columns FROM {}".format(table), fetch=True)]
-        df = pd.DataFrame(list(self.extract(table, "*")), columns=columns)
-        print(df.dtypes)
+            if exhausted:
+                cursor.close()
+            else:
+                # Closing an unbuffered cursor reads the remaining rows, drop the connection instead
+                connection.invalidate()
+            connection.close()
 
     def connect(self):
         """Connects to database.
+
+        Opens a first pooled connection, which fails early if the server is unreachable.
         """
-        self.__connect()
+        with self.__cursor():
+            self.isConnected = True
 
     def disconnect(self):
         """Disconnects from database.
+
+        Closes every pooled connection.
         """
-        self.__disconnect()
+        self.engine.dispose()
+        self.isConnected = False
 
     def execute(self, query, params=None, fetch=False):
         """Execute and commit an SQL query.
@@ -206,31 +293,86 @@ class Database():
             The tuple associated to the query if fetch is 'True'. Nothing otherwise
         """
 
-        self.__mutex.acquire()
-        try:
-            # Save initial connection status
-            connection_status = self.isConnected
+        with self.__cursor() as (connection, cursor):
+            cursor.execute(query, params or None)
+            connection.commit()
+            if fetch:
+                return cursor.fetchall()
 
-            # Connect
-            self.__connect()
+    def execute_write(self, query, params=None):
+        """Execute and commit a write SQL query.
 
-            # Execute SDL query
-            if params:
-                self.__cursor.execute(query, params)
-            else:
-                self.__cursor.execute(query)
-            self.__connection.commit()
+        Parameters
+        ----------
+        query : str
+            The INSERT, UPDATE or DELETE query to execute.
+        params : tuple or list
+            The params passed as values to the query.
 
-            # Reset connection to initial state
-            if not connection_status:
-                self.__disconnect()
+        Returns
+        -------
+        tuple
+            The number of affected rows and the last inserted id.
+        """
 
-            if fetch:
-                return self.__cursor.fetchall()
-        finally:
-            self.__mutex.release()
+        with self.__cursor() as (connection, cursor):
+            cursor.execute(query, params or None)
+            connection.commit()
+            return cursor.rowcount, cursor.lastrowid
+
+    def insert_rows(self, table, columns, rows, ignore=False):
+        """Insert several rows with a single multi-row INSERT query.
+
+        Parameters
+        ----------
+        table : str
+            The table name.
+        columns : list
+            The names of the columns to fill.
+        rows : list
+            The rows to insert, each one being a tuple of values ordered as 'columns'.
+        ignore : bool
+            If 'True', rows conflicting with a unique key are skipped. Defaults to 'False'.
+
+        Returns
+        -------
+        int
+            The number of inserted rows.
+        """
+        if not rows:
+            return 0
+
+        query = "INSERT {}INTO {} ({}) VALUES ({})".format("IGNORE " if ignore else "",
+                                                           table,
+                                                           ", ".join(columns),
+                                                           ", ".join(["%s"] * len(columns)))
+        with self.__cursor() as (connection, cursor):
+            # 'executemany' packs the rows into multi-row INSERT statements
+            row_count = cursor.executemany(query, rows)
+            connection.commit()
+            return row_count
+
+    @contextmanager
+    def transaction(self):
+        """Run several queries in a single transaction.
+
+        The transaction is committed when the block exits normally and rolled back if it raises.
+
+        Yields
+        ------
+        pymysql.cursors.Cursor
+            The cursor to execute the queries with.
+        """
 
-    def extract(self, table, select, arg=""):
+        with self.__cursor() as (connection, cursor):
+            try:
+                yield cursor
+                connection.commit()
+            except BaseException:
+                connection.rollback()
+                raise
+
+    def extract(self, table, select, arg="", params=None):
         """Extract data from table using composed query.
 
         Parameters
@@ -241,6 +383,8 @@ class Database():
             Fields selection into table (comma separated).
         arg : str
             Query arguments. Unused by default.
+        params : tuple or list
+            The params passed as values to the '%s' placeholders of 'arg'.
 
         Returns
         -------
@@ -248,38 +392,39 @@ class Database():
             The tuple associated to the query.
         """
 
-        self.__mutex.acquire()
+        sql_query = "SELECT {} FROM {} {}".format(select, table, arg)
+        with self.__cursor() as (_, cursor):
+            cursor.execute(sql_query, params or None)
+            return cursor.fetchall()
+
+    @staticmethod
+    def __build_where(where):
+        if not where:
+            return "", []
+        conditions = []
+        params = []
+        for column, value in where.items():
+            if value is None:
+                conditions.append("{} IS NULL".format(column))
+            elif isinstance(value, (list, tuple)) and not value:
+                conditions.append("1 = 0")
+            elif isinstance(value, (list, tuple)):
+                conditions.append("{} IN ({})".format(column, ", ".join(["%s"] * len(value))))
+                params.extend(value)
+            else:
+                conditions.append("{} = %s".format(column))
+                params.append(value)
+        return "WHERE " + " AND ".join(conditions), params
+
+    @contextmanager
+    def __cursor(self):
+        # Borrow a connection from the engine pool for the calling thread, 'close()' gives it back
+        connection = self.engine.raw_connection()
         try:
-            # Save initial connection status
-            connection_status = self.isConnected
-
-            # Connect
-            self.__connect()
-
-            # Execute SQL query
-            sql_query = "SELECT {} FROM {} {}".format(select, table, arg)
-            self.__cursor.execute(sql_query)
-
-            # Reset connection to initial state
-            if not connection_status:
-                self.__disconnect()
-
-            # Returns query tuple
-            return self.__cursor.fetchall()
+            cursor = connection.cursor()
+            try:
+                yield connection, cursor
+            finally:
+                cursor.close()
         finally:
-            self.__mutex.release()
-
-    def __connect(self):
-        if not self.isConnected:
-            self.__connection = pymysql.connect(host=self.__ip, user=self.__user, password=self.__password, database=self.dbName)
-            self.__cursor = self.__connection.cursor()
-            pymysql.converters.encoders[np.float64] = pymysql.converters.escape_float
-            pymysql.converters.conversions = pymysql.converters.encoders.copy()
-            pymysql.converters.conversions.update(pymysql.converters.decoders)
-            self.isConnected = True
-
-    def __disconnect(self):
-        if self.isConnected:
-            self.__cursor.close()
-            self.__connection.close()
-            self.isConnected = False
+            connection.close()
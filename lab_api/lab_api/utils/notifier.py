@@ -0,0 +1,59 @@
+"""
+notifier.py
+
+Instruction change notifications for the lab API.
+"""
+
+import json
+
+INSTRUCTIONS_CHANNEL = "instructions_update"
+
+class InstructionNotifier():
+    '''
+    InstructionNotifier class
+
+    Publish a change event on Redis whenever an instruction table is mutated.
+
+    Each table has a version counter stored under '<table>:version'. The counter is
+    incremented on every change and the new version is published on the
+    'instructions_update' channel so that consumers only re-read the table when it changed.
+
+    Methods
+    -------
+    notify(instruction_table)
+        Bump the table version and publish the change event.
+    '''
+
+    def __init__(self, redis_client):
+        """
+        Parameters
+        ----------
+        redis_client : redis.Redis
+            The Redis client used to publish events.
+        """
+        self.__redis = redis_client
+
+    def notify(self, instruction_table):
+        """Bump the table version and publish the change event.
+
+        Redis failures are logged and swallowed: consumers keep a safety poll on the table.
+
+        Parameters
+        ----------
+        instruction_table : str
+            The mutated table.
+
+        Returns
+        -------
+        int
+            The new table version, None if the event could not be published.
+        """
+        try:
+            version = self.__redis.incr(f"{instruction_table}:version")
+            self.__redis.publish(INSTRUCTIONS_CHANNEL, json.dumps({"table": instruction_table,
+                                                                   "version": version,
+                                                                   "from": "lab_api"}))
+            return version
+        except Exception as e:
+            print(f"[InstructionNotifier][ERROR] Unable to notify change on '{instruction_table}' : {type(e).__name__} - {e}")
+            return None
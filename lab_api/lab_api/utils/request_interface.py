@@ -1,15 +1,19 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+class CollectorInstruction(BaseModel):
+    exchange:int
+    symbol:str
+    rate:int = Field(gt=0)
+    data_type:str
 
 class InstructionBody(BaseModel):
     table:str
-    instruction: dict
+    instruction: CollectorInstruction
 
 class DisplayBody(BaseModel):
     table:str
 
-class CollectorInstruction:
-    exchange:int
-    symbol:str
-    rate:int
-    data_type:str
+class InstructionsBody(BaseModel):
+    table:str
+    instructions: list[CollectorInstruction]
 
@@ -21,6 +21,20 @@ class Connector():
         cursor.execute(create_table_query)
         self.__connection.commit()
         print("Table created successfully")
+
+    def add_unique_index(self, table, index, columns):
+        # Tables created before the index was part of their definition
+        cursor = self.__connection.cursor()
+        cursor.execute("SELECT 1 FROM information_schema.statistics WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s", (table, index))
+        if cursor.fetchone() is None:
+            # Keep the first row of each duplicated key, the index could not be created otherwise
+            conditions = " AND ".join([f"t1.{column} = t2.{column}" for column in columns])
+            cursor.execute(f"DELETE t1 FROM {table} t1 JOIN {table} t2 ON {conditions} AND t1.id > t2.id")
+            if cursor.rowcount:
+                print(f"{cursor.rowcount} duplicated rows removed from {table}")
+            cursor.execute(f"ALTER TABLE {table} ADD UNIQUE KEY {index} ({', '.join(columns)})")
+            self.__connection.commit()
+            print(f"Index {index} created successfully")
         
 if __name__ == "__main__":
     conn = Connector(ip=IP, user=USER, password=PASSWORD, database=DATABASE)
@@ -30,10 +44,12 @@ if __name__ == "__main__":
             exchange INTEGER,
             symbol VARCHAR(255),
             rate INTEGER,
-            data_type VARCHAR(255)
+            data_type VARCHAR(255),
+            UNIQUE KEY uq_collector_instructions (exchange, symbol, rate, data_type)
         );
         """
     
+    # Legacy JSON storage, kept for 'ORDERBOOK_STORAGE=json' collectors and existing history
     create_orderbooks_table_query = """
         CREATE TABLE IF NOT EXISTS orderbooks (
             id INT AUTO_INCREMENT PRIMARY KEY,
@@ -44,8 +60,33 @@ if __name__ == "__main__":
             date VARCHAR(255)
         );
         """
-    
 
-    
+    # One row per snapshot, unique per (platform_id, symbol, ts) so that one symbol history is an index range scan
+    create_orderbook_snapshots_table_query = """
+        CREATE TABLE IF NOT EXISTS orderbook_snapshots (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            platform_id INTEGER NOT NULL,
+            symbol VARCHAR(64) NOT NULL,
+            ts DATETIME(6) NOT NULL,
+            UNIQUE KEY uq_orderbook_snapshots_platform_symbol_ts (platform_id, symbol, ts)
+        );
+        """
+
+    # One row per price level, side is 0 for buy and 1 for sell, level 0 is the top of book
+    create_orderbook_levels_table_query = """
+        CREATE TABLE IF NOT EXISTS orderbook_levels (
+            snapshot_id BIGINT NOT NULL,
+            side TINYINT NOT NULL,
+            level SMALLINT NOT NULL,
+            price DOUBLE NOT NULL,
+            size DOUBLE NOT NULL,
+            PRIMARY KEY (snapshot_id, side, level),
+            FOREIGN KEY (snapshot_id) REFERENCES orderbook_snapshots(id) ON DELETE CASCADE
+        );
+        """
+
     res = conn.fetch(create_collector_instructions_table_query)
-    res = conn.fetch(create_orderbooks_table_query)
\ No newline at end of file
+    conn.add_unique_index("collector_instructions", "uq_collector_instructions", ["exchange", "symbol", "rate", "data_type"])
+    res = conn.fetch(create_orderbooks_table_query)
+    res = conn.fetch(create_orderbook_snapshots_table_query)
+    res = conn.fetch(create_orderbook_levels_table_query)
\ No newline at end of file